@@ -0,0 +1,17 @@
+"""CPU压榨机 无界面压力测试引擎
+
+本包不依赖 tkinter / customtkinter / PIL，可在无显示器的服务器、SSH 会话和容器中使用:
+
+    python -m cpupress run --duration 30 --workers 4
+"""
+
+__all__ = ["StressEngine", "cpu_stress_worker"]
+
+
+def __getattr__(name):
+    # 引擎在第一次访问时才导入: 界面只用到部分子模块时不必加载 multiprocessing 进程池与 sqlite3
+    if name in __all__:
+        from . import engine
+        
+        return getattr(engine, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
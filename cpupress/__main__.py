@@ -0,0 +1,567 @@
+"""命令行入口: python -m cpupress run --duration 30 --workers 4 --target 80"""
+
+import argparse
+import json
+import multiprocessing
+import sys
+
+from .cgroup import describe_limits, usable_cpus
+from .engine import StressEngine, summary_lines
+from .executors import DEFAULT_EXECUTOR, DEFAULT_THREADS_PER_PROCESS, EXECUTORS, executor_warning
+from .history import RunHistory, format_runs
+from .kernels import DEFAULT_KERNEL, KERNELS, describe_kernels
+from .latency import DEFAULT_PERIOD_MS
+from .logpipe import LogPipeline
+from .memory import CACHE_LINE, DEFAULT_WORKING_SET, MEMORY_BACKINGS, MEMORY_PATTERNS
+from .startup import DEFAULT_BUDGET, GUI_SCRIPT
+from .topology import PLACEMENT_POLICIES, candidate_cpus, format_cpu_list, physical_cores, read_topology
+
+
+def build_parser():
+    """构建命令行参数解析器"""
+    parser = argparse.ArgumentParser(
+        prog="python -m cpupress",
+        description="CPU压榨机 无界面压力测试"
+    )
+    subparsers = parser.add_subparsers(dest="command")
+    
+    run = subparsers.add_parser("run", help="运行一次压力测试")
+    run.add_argument("-d", "--duration", type=float, default=30, help="测试持续时间 (秒)")
+    run.add_argument("-w", "--workers", type=int, help="工作进程数 (默认为可用核心数与 CPU 配额中较小者，绑核时不超过候选核心数)")
+    run.add_argument("-t", "--target", type=float, default=100, help="最大CPU占用率 (1-100)")
+    run.add_argument("-p", "--profile", help="负载曲线，如 ramp:0:100:5m、step:25,50,75,100:60、square:20:100:30、sine:20:80:10m")
+    run.add_argument("--tolerance", type=float, default=2.0, help="占用率允许误差 (百分点)")
+    run.add_argument("-s", "--speed", type=float, default=100, help="测试速度 (50-200)")
+    run.add_argument("-k", "--kernel", choices=list(KERNELS), default=DEFAULT_KERNEL, help="负载内核")
+    run.add_argument("--working-set", default=DEFAULT_WORKING_SET, help="memory 内核每个进程的工作集大小，如 16K、256M、4G")
+    run.add_argument("--pattern", choices=list(MEMORY_PATTERNS), default="random", help="memory 内核的访问模式")
+    run.add_argument("--stride", default=str(CACHE_LINE), help="stride 模式的跨步 (字节)")
+    run.add_argument("--backing", choices=list(MEMORY_BACKINGS), default="heap", help="memory 内核的内存后端")
+    run.add_argument("--executor", choices=list(EXECUTORS), default=DEFAULT_EXECUTOR,
+                     help="执行方式: process 每单元一个进程 / thread 线程 / hybrid 进程×线程")
+    run.add_argument("--threads-per-process", type=int, default=DEFAULT_THREADS_PER_PROCESS, help="hybrid 模式下每个进程的线程数")
+    run.add_argument("--profile-workers", metavar="DIR", help="每个工作单元在 cProfile 下运行，结束时写入 DIR/worker-<编号>.prof")
+    run.add_argument("--latency", action="store_true", help="同时运行调度延迟探测 (cyclictest 式)，报告唤醒延迟分位数")
+    run.add_argument("--latency-period", type=float, default=DEFAULT_PERIOD_MS, help="延迟探测的唤醒周期 (毫秒)")
+    run.add_argument("--latency-cpu", type=int, help="把延迟探测进程绑定到该逻辑CPU")
+    run.add_argument("--latency-priority", type=int, help="延迟探测进程的 SCHED_FIFO 优先级 (1-99，无权限时退化为 nice)")
+    run.add_argument("--pool", action="store_true", help="使用预热进程池，所有进程同时起跑")
+    run.add_argument("--placement", choices=list(PLACEMENT_POLICIES), default="none", help="绑核策略")
+    run.add_argument("--cpus", help="list 策略使用的核心列表，如 0-15,32")
+    run.add_argument("-f", "--format", choices=["text", "json"], default="text", help="输出格式")
+    run.add_argument("--log-file", help="同时写入 JSON Lines 日志文件 (按大小轮转)")
+    run.add_argument("--sample-interval", type=float, default=1.0, help="遥测采样间隔 (秒)")
+    run.add_argument("--sysfs-root", default="/sys", help="读取频率、温度和降频计数的 sysfs 根目录")
+    run.add_argument("--metrics-port", type=int, help="在该端口提供 OpenMetrics/Prometheus 指标 (/metrics)")
+    run.add_argument("--metrics-bind", default="127.0.0.1", help="指标端点的监听地址")
+    run.add_argument("--no-history", action="store_true", help="不保存到运行历史数据库")
+    run.add_argument("--history-db", help="运行历史数据库路径")
+    run.set_defaults(func=cmd_run)
+    
+    kernels = subparsers.add_parser("kernels", help="列出可用的负载内核")
+    kernels.set_defaults(func=cmd_kernels)
+    
+    topology = subparsers.add_parser("topology", help="显示CPU拓扑")
+    topology.set_defaults(func=cmd_topology)
+    
+    history = subparsers.add_parser("history", help="查看、对比运行历史")
+    history.add_argument("action", choices=["list", "show", "compare", "delete"])
+    history.add_argument("ids", nargs="*", type=int, help="运行编号")
+    history.add_argument("-n", "--limit", type=int, default=20, help="list 显示的条数")
+    history.add_argument("--history-db", help="运行历史数据库路径")
+    history.add_argument("-f", "--format", choices=["text", "json"], default="text", help="输出格式")
+    history.set_defaults(func=cmd_history)
+    
+    bench = subparsers.add_parser("bench", help="运行微基准测试并与基线比较")
+    bench.add_argument("--only", help="只运行部分测试组，逗号分隔: kernels,control,spawn,executors")
+    bench.add_argument("--kernels", help="只测试指定的内核，逗号分隔")
+    bench.add_argument("--window", type=float, default=0.2, help="每次测量的时长 (秒)")
+    bench.add_argument("--repeat", type=int, default=5, help="重复测量次数，取中位数")
+    bench.add_argument("-w", "--workers", type=int, help="进程启动测试使用的进程数 (默认可用核心数)")
+    bench.add_argument("-o", "--output", help="结果写入 JSON 文件")
+    bench.add_argument("--baseline", help="与该 JSON 基线比较")
+    bench.add_argument("--threshold", type=float, default=0.10, help="退化阈值 (相对变化，默认 0.10)")
+    bench.add_argument("-f", "--format", choices=["text", "json"], default="text", help="输出格式")
+    bench.set_defaults(func=cmd_bench)
+    
+    scale = subparsers.add_parser("scale", help="多核扩展性扫描: 加速比、并行效率与 Amdahl/USL 拟合")
+    scale.add_argument("-w", "--max-workers", type=int, help="最大工作进程数 (默认可用核心数)")
+    scale.add_argument("-t", "--targets", default="100", help="目标占用率列表，逗号分隔，如 100,50")
+    scale.add_argument("--smt", choices=["both", "on", "off"], default="both", help="超线程: on 使用全部逻辑CPU / off 每个物理核心一个")
+    scale.add_argument("--window", type=float, default=10.0, help="每个点的运行时长 (秒)")
+    scale.add_argument("-k", "--kernel", choices=list(KERNELS), default=DEFAULT_KERNEL, help="负载内核")
+    scale.add_argument("--executor", choices=list(EXECUTORS), default=DEFAULT_EXECUTOR, help="执行方式")
+    scale.add_argument("-o", "--output", help="JSON 报告写入文件")
+    scale.add_argument("-f", "--format", choices=["text", "json"], default="text", help="输出格式")
+    scale.set_defaults(func=cmd_scale)
+    
+    startup = subparsers.add_parser("startup-check", help="冷启动图形界面并检查可交互时间是否超出预算 (CI 用)")
+    startup.add_argument("--budget", type=float, default=DEFAULT_BUDGET, help="可交互时间预算 (秒)")
+    startup.add_argument("--runs", type=int, default=3, help="启动次数，取最快的一次 (减少偶发抖动)")
+    startup.add_argument("--script", default=GUI_SCRIPT, help="界面脚本路径")
+    startup.add_argument("--timeout", type=float, default=60.0, help="单次启动的超时时间 (秒)")
+    startup.add_argument("-f", "--format", choices=["text", "json"], default="text", help="输出格式")
+    startup.set_defaults(func=cmd_startup_check)
+    
+    memsweep = subparsers.add_parser("memsweep", help="按工作集大小扫描内存访问延迟，找出各级缓存边界")
+    memsweep.add_argument("--min", default="16K", help="最小工作集")
+    memsweep.add_argument("--max", default="256M", help="最大工作集")
+    memsweep.add_argument("--points", type=int, default=1, help="每倍增区间的测量点数")
+    memsweep.add_argument("--pattern", choices=list(MEMORY_PATTERNS), default="random", help="访问模式")
+    memsweep.add_argument("--stride", default=str(CACHE_LINE), help="stride 模式的跨步 (字节)")
+    memsweep.add_argument("--backing", choices=list(MEMORY_BACKINGS), default="heap", help="内存后端")
+    memsweep.add_argument("--window", type=float, default=0.2, help="每次测量的时长 (秒)")
+    memsweep.add_argument("--repeat", type=int, default=3, help="重复测量次数，取最好成绩")
+    memsweep.add_argument("-f", "--format", choices=["text", "json"], default="text", help="输出格式")
+    memsweep.set_defaults(func=cmd_memsweep)
+    
+    agent = subparsers.add_parser("agent", help="作为 agent 运行，接受 coordinator 的命令")
+    agent.add_argument("--bind", default="127.0.0.1", help="监听地址，接受其他机器连接时使用 0.0.0.0")
+    agent.add_argument("--port", type=int, default=7788, help="监听端口")
+    agent.add_argument("--token", help="连接口令")
+    agent.add_argument("--interval", type=float, default=1.0, help="遥测推送间隔 (秒)")
+    agent.add_argument("--sysfs-root", default="/sys", help="读取频率、温度和降频计数的 sysfs 根目录")
+    agent.add_argument("--metrics-port", type=int, help="在该端口提供 OpenMetrics/Prometheus 指标 (/metrics)")
+    agent.add_argument("--metrics-bind", default="127.0.0.1", help="指标端点的监听地址")
+    agent.add_argument("--no-history", action="store_true", help="不保存到运行历史数据库")
+    agent.add_argument("--history-db", help="运行历史数据库路径")
+    agent.set_defaults(func=cmd_agent)
+    
+    cluster = subparsers.add_parser("cluster", help="连接多个 agent 同时起跑并汇总遥测")
+    cluster.add_argument("--agents", required=True, help="agent 地址，逗号分隔，如 10.0.0.1:7788,10.0.0.2:7788")
+    cluster.add_argument("--token", help="连接口令")
+    cluster.add_argument("-d", "--duration", type=float, default=30, help="测试持续时间 (秒)")
+    cluster.add_argument("-w", "--workers", type=int, help="每台机器的工作进程数 (默认各机可用核心数)")
+    cluster.add_argument("-t", "--target", type=float, help="最大CPU占用率 (1-100)")
+    cluster.add_argument("-p", "--profile", help="负载曲线")
+    cluster.add_argument("-s", "--speed", type=float, help="测试速度 (50-200)")
+    cluster.add_argument("-k", "--kernel", choices=list(KERNELS), help="负载内核")
+    cluster.add_argument("--pool", action="store_true", help="各机使用预热进程池")
+    cluster.add_argument("--executor", choices=list(EXECUTORS), help="各机的执行方式")
+    cluster.add_argument("--threads-per-process", type=int, help="hybrid 模式下每个进程的线程数")
+    cluster.add_argument("--latency", action="store_true", help="各机同时运行调度延迟探测")
+    cluster.add_argument("--placement", choices=list(PLACEMENT_POLICIES), help="绑核策略")
+    cluster.add_argument("--delay", type=float, default=2.0, help="起跑时刻距现在的秒数")
+    cluster.add_argument("--interval", type=float, default=1.0, help="汇总显示间隔 (秒)")
+    cluster.add_argument("-f", "--format", choices=["text", "json"], default="text", help="输出格式")
+    cluster.set_defaults(func=cmd_cluster)
+    return parser
+
+
+def cmd_run(args):
+    """执行 run 子命令"""
+    history = None if args.no_history else RunHistory(args.history_db)
+    engine = StressEngine(history=history)
+    text = args.format == "text"
+    try:
+        workers = args.workers
+        if workers is None:
+            cpus = candidate_cpus(args.placement, args.cpus)
+            workers = usable_cpus(engine.cgroup)
+            if cpus:
+                workers = min(len(cpus), workers)
+        config = engine.start(args.duration, workers=workers, max_usage=args.target,
+                              speed=args.speed, tolerance=args.tolerance, kernel=args.kernel,
+                              use_pool=args.pool, placement=args.placement, cpu_list=args.cpus,
+                              profile=args.profile, kernel_options=kernel_options(args),
+                              latency=latency_options(args), executor=args.executor,
+                              threads_per_process=args.threads_per_process, profile_dir=args.profile_workers)
+    except (ValueError, RuntimeError, OSError) as e:
+        print(f"启动压力测试失败: {e}", file=sys.stderr)
+        return 2
+    
+    # 遥测采样线程: 占用率、频率、温度与降频计数，用于降频检测并写入运行历史
+    from .sampler import CpuSampler
+    from .thermal import ThermalProbe, describe_event
+    
+    sampler = CpuSampler(args.sample_interval, thermal=ThermalProbe(args.sysfs_root), cgroup=engine.cgroup)
+    sampler.start()
+    
+    # 文本模式下日志同时输出到终端
+    log = LogPipeline(capacity=1000, log_file=args.log_file, echo=print if text else None)
+    exporter = start_exporter(args, engine, sampler, log)
+    log.emit("🚀 开始压力测试，配置:", event="start", config=config)
+    log.emit(f"• 线程数: {config['cpu_threads']}")
+    log.emit(f"• CPU 限制: {describe_limits(engine.cgroup)}")
+    if config["profile"]:
+        log.emit(f"• 负载曲线: {config['profile']}")
+    else:
+        log.emit(f"• 最大占用: {config['max_cpu_usage']}%")
+    log.emit(f"• 速度: {config['stress_speed']}%")
+    log.emit(f"• 负载内核: {config['kernel']}")
+    if config["executor"] != DEFAULT_EXECUTOR:
+        per_process = f" ({config['threads_per_process']} 线程/进程)" if config["executor"] == "hybrid" else ""
+        log.emit(f"• 执行方式: {config['executor']}{per_process}")
+    warning = executor_warning(config["executor"], config["kernel"])
+    if warning:
+        log.emit(f"⚠️ {warning}", level="warning")
+    if config["profile_dir"]:
+        log.emit(f"• 性能剖析: cProfile，输出到 {config['profile_dir']} (剖析开销会降低吞吐量)")
+    if config["kernel"] == "memory":
+        log.emit(f"• 工作集: {config['working_set']} ({config['memory_pattern']}, {config['memory_backing']})")
+    log.emit(f"• 持续时间: {config['duration']}秒")
+    log.emit(f"• 绑核策略: {config['placement']}")
+    if config["latency_probe"]:
+        where = f"，绑定 CPU {config['latency_cpu']}" if config["latency_cpu"] is not None else ""
+        log.emit(f"• 调度延迟探测: 周期 {config['latency_period']:g}ms{where}")
+    for line in engine.describe_placement():
+        log.emit(f"  - {line}")
+    
+    try:
+        while not engine.wait(timeout=0.5):
+            log.drain()
+            engine.poll_stats()
+            for sample in sampler.drain():
+                for event in engine.record_sample(sample):
+                    log.emit(describe_event(event), level="warning", event=event["type"], detail=event)
+    except KeyboardInterrupt:
+        engine.stop("stopped")
+    finally:
+        # 先停止指标端点，避免抓取读到已关闭的引擎
+        if exporter:
+            exporter.stop()
+        engine.close()
+        sampler.stop()
+    
+    summary = engine.summary()
+    if summary["stop_reason"] == "completed":
+        log.emit("✅ 压力测试完成", event="end", summary=summary)
+    else:
+        log.emit("⏹ 压力测试已停止", event="end", summary=summary)
+    log.emit(f"• 实际用时: {summary['elapsed']:.1f}秒")
+    for line in summary_lines(summary):
+        log.emit(line)
+    if summary["run_id"]:
+        log.emit(f"• 运行记录已保存: #{summary['run_id']}")
+    log.close()
+    if history:
+        history.close()
+    if not text:
+        print(json.dumps(summary, ensure_ascii=False, indent=2))
+    return 0 if summary["stop_reason"] == "completed" else 130
+
+
+def start_exporter(args, engine, sampler, log=None):
+    """按 --metrics-port 启动指标端点，未指定或端口被占用时返回 None"""
+    if args.metrics_port is None:
+        return None
+    from .exporter import MetricsExporter
+    
+    try:
+        exporter = MetricsExporter(engine, sampler, args.metrics_bind, args.metrics_port).start()
+    except OSError as e:
+        if log:
+            log.emit(f"⚠️ 指标端点启动失败: {e}", level="warning")
+        else:
+            print(f"⚠️ 指标端点启动失败: {e}", file=sys.stderr)
+        return None
+    if log:
+        log.emit(f"📈 指标端点: {exporter.url}")
+    else:
+        print(f"📈 指标端点: {exporter.url}")
+    return exporter
+
+
+def kernel_options(args):
+    """run 子命令中传给负载内核的参数"""
+    if args.kernel != "memory":
+        return None
+    return {
+        "working_set": args.working_set,
+        "memory_pattern": args.pattern,
+        "memory_stride": args.stride,
+        "memory_backing": args.backing,
+    }
+
+
+def latency_options(args):
+    """run 子命令中的调度延迟探测参数"""
+    return {
+        "latency_probe": args.latency,
+        "latency_period": args.latency_period,
+        "latency_cpu": args.latency_cpu,
+        "latency_priority": args.latency_priority,
+    }
+
+
+def cmd_kernels(args):
+    """执行 kernels 子命令"""
+    for name, description, available in describe_kernels():
+        mark = "" if available else " (缺少依赖)"
+        print(f"{name:<14}{description}{mark}")
+    return 0
+
+
+def cmd_topology(args):
+    """执行 topology 子命令"""
+    topology = read_topology()
+    cores = physical_cores(topology)
+    packages = sorted({entry["package"] for entry in topology})
+    print(f"逻辑CPU: {len(topology)}  物理核心: {len(cores)}  CPU插槽: {len(packages)}")
+    for core in cores:
+        entry = next(e for e in topology if e["cpu"] == core[0])
+        print(f"插槽 {entry['package']} 核心 {entry['core']:<4} 逻辑CPU {format_cpu_list(core)}")
+    print(describe_limits())
+    return 0
+
+
+def cmd_history(args):
+    """执行 history 子命令"""
+    history = RunHistory(args.history_db)
+    try:
+        if args.action == "list":
+            result = history.list_runs(args.limit)
+        elif args.action == "show":
+            if len(args.ids) != 1:
+                print("show 需要一个运行编号", file=sys.stderr)
+                return 2
+            result = history.load_run(args.ids[0])
+            if result is None:
+                print(f"运行记录 {args.ids[0]} 不存在", file=sys.stderr)
+                return 1
+        elif args.action == "compare":
+            if len(args.ids) < 2:
+                print("compare 至少需要两个运行编号", file=sys.stderr)
+                return 2
+            result = history.compare_runs(args.ids)
+        else:
+            for run_id in args.ids:
+                history.delete_run(run_id)
+            result = {"deleted": args.ids}
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+    finally:
+        history.close()
+    
+    if args.format == "json":
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+    elif args.action == "list":
+        print("\n".join(format_runs(result)))
+    elif args.action == "show":
+        print("\n".join(format_runs([result])))
+        print(f"遥测样本: {len(result['samples'])} 个")
+        for line in summary_lines(result["summary"]) if result["summary"] else []:
+            print(line)
+    elif args.action == "compare":
+        print("\n".join(format_runs(result, compare=True)))
+    else:
+        print(f"已删除: {', '.join(map(str, args.ids))}")
+    return 0
+
+
+def cmd_bench(args):
+    """执行 bench 子命令，有退化时返回 1"""
+    from .bench import BENCH_GROUPS, compare_to_baseline, load_report, run_benchmarks, save_report
+    
+    groups = args.only.split(",") if args.only else BENCH_GROUPS
+    unknown = [g for g in groups if g not in BENCH_GROUPS]
+    if unknown:
+        print(f"未知的测试组: {', '.join(unknown)}", file=sys.stderr)
+        return 2
+    kernels = args.kernels.split(",") if args.kernels else None
+    try:
+        report = run_benchmarks(groups, args.window, args.repeat, args.workers, kernels)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 2
+    if args.output:
+        save_report(report, args.output)
+    
+    comparison = None
+    if args.baseline:
+        comparison = compare_to_baseline(report, load_report(args.baseline), args.threshold)
+        report["comparison"] = comparison
+    
+    if args.format == "json":
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        for name, result in report["results"].items():
+            print(f"{name:<42}{result['value']:>14,.1f} {result['unit']}")
+        if comparison is not None:
+            print(f"\n与基线比较 (阈值 {args.threshold:.0%}):")
+            for row in comparison:
+                mark = "❌ 退化" if row["regressed"] else "✓"
+                print(f"{row['name']:<42}{row['baseline']:>12,.1f} -> {row['current']:>12,.1f} {row['unit']:<3}"
+                      f"{row['change']:>+8.1%}  {mark}")
+    
+    if comparison and any(row["regressed"] for row in comparison):
+        return 1
+    return 0
+
+
+def cmd_scale(args):
+    """执行 scale 子命令"""
+    from .scaling import format_scaling, scaling_sweep
+    
+    text = args.format == "text"
+    try:
+        targets = [float(t) for t in args.targets.split(",")]
+    except ValueError:
+        print(f"无法解析的目标占用率: {args.targets}", file=sys.stderr)
+        return 2
+    
+    def progress(point):
+        if text:
+            print(f"  超线程 {point['smt']} 目标 {point['target']:g}% {point['workers']:>4} 进程: "
+                  f"{point['ops_per_sec']:,.1f} ops/s", file=sys.stderr)
+    
+    try:
+        report = scaling_sweep(StressEngine, args.max_workers, targets,
+                               ("on", "off") if args.smt == "both" else (args.smt,),
+                               args.window, args.kernel, args.executor, progress=progress)
+    except (ValueError, RuntimeError) as e:
+        print(f"扩展性扫描失败: {e}", file=sys.stderr)
+        return 2
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    if text:
+        print("\n".join(format_scaling(report)).rstrip())
+    else:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    return 0
+
+
+def cmd_startup_check(args):
+    """执行 startup-check 子命令"""
+    from .startup import format_startup, startup_check
+    
+    try:
+        ok, report = startup_check(args.script, args.budget, args.timeout, args.runs)
+    except RuntimeError as e:
+        print(e, file=sys.stderr)
+        return 2
+    if args.format == "text":
+        print("\n".join(format_startup(report, args.budget)))
+    else:
+        print(json.dumps(dict(report, budget=args.budget, ok=ok), ensure_ascii=False, indent=2))
+    return 0 if ok else 1
+
+
+def cmd_memsweep(args):
+    """执行 memsweep 子命令"""
+    from .memory import format_size, format_sweep, memory_sweep
+    
+    text = args.format == "text"
+    
+    def progress(point):
+        if text:
+            print(f"  {format_size(point['size']):>6}: {point['ns_per_access']:.2f} ns/访问", file=sys.stderr)
+    
+    try:
+        curve = memory_sweep(args.min, args.max, args.pattern, args.stride, args.backing,
+                             args.points, args.window, args.repeat, progress=progress)
+    except (ValueError, OSError) as e:
+        print(e, file=sys.stderr)
+        return 2
+    if text:
+        print("\n".join(format_sweep(curve)))
+    else:
+        print(json.dumps(curve, ensure_ascii=False, indent=2))
+    return 0
+
+
+def cmd_agent(args):
+    """执行 agent 子命令"""
+    from .cluster import Agent
+    
+    history = None if args.no_history else RunHistory(args.history_db)
+    try:
+        agent = Agent(args.bind, args.port, StressEngine(history=history), args.token,
+                      args.interval, args.sysfs_root)
+    except OSError as e:
+        print(f"无法监听 {args.bind}:{args.port}: {e}", file=sys.stderr)
+        return 2
+    print(f"🛰 agent 已启动: {agent.address[0]}:{agent.address[1]}")
+    exporter = start_exporter(args, agent.engine, agent.sampler)
+    try:
+        agent.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if exporter:
+            exporter.stop()
+        agent.engine.close()
+        if history:
+            history.close()
+    return 0
+
+
+def cmd_cluster(args):
+    """执行 cluster 子命令: 连接 agent、同时起跑并显示汇总遥测
+
+    运行中在标准输入输入 "profile <负载曲线>" 推送新曲线，输入 "stop" 全部停止。
+    """
+    import threading
+    from .cluster import Coordinator, format_telemetry
+    
+    text = args.format == "text"
+    coordinator = Coordinator(args.agents.split(","), args.token)
+    try:
+        for name, info in coordinator.connect().items():
+            if text:
+                print(f"🔗 {name}: {info['cpus']} 核心")
+        coordinator.start(args.duration, delay=args.delay, workers=args.workers, max_usage=args.target,
+                          speed=args.speed, kernel=args.kernel, use_pool=args.pool or None,
+                          placement=args.placement, profile=args.profile,
+                          latency={"latency_probe": True} if args.latency else None, executor=args.executor,
+                          threads_per_process=args.threads_per_process)
+    except (OSError, RuntimeError, ValueError) as e:
+        print(f"启动集群测试失败: {e}", file=sys.stderr)
+        coordinator.close()
+        return 2
+    if text:
+        print(f"🚀 {len(coordinator.links)} 台机器已起跑，起跑时刻偏差 {coordinator.skew * 1000:.1f}ms")
+    
+    def read_commands():
+        for line in sys.stdin:
+            command, _, value = line.strip().partition(" ")
+            try:
+                if command == "profile" and value:
+                    coordinator.set_profile(value)
+                    print(f"负载曲线已切换为: {value}")
+                elif command == "stop":
+                    coordinator.stop()
+            except RuntimeError as e:
+                print(e, file=sys.stderr)
+    
+    threading.Thread(target=read_commands, daemon=True).start()
+    
+    stopped = False
+    try:
+        while not coordinator.wait(args.interval):
+            if text:
+                print("\n".join(format_telemetry(coordinator.telemetry())))
+    except KeyboardInterrupt:
+        stopped = True
+        coordinator.stop()
+        coordinator.wait(5)
+    
+    summaries = coordinator.summaries()
+    coordinator.close()
+    if text:
+        for name, summary in summaries.items():
+            print(f"\n== {name} ==")
+            if summary is None:
+                print("连接已断开")
+                continue
+            for line in summary_lines(summary):
+                print(line)
+    else:
+        print(json.dumps(summaries, ensure_ascii=False, indent=2))
+    return 130 if stopped else 0
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if not getattr(args, "func", None):
+        parser.print_help()
+        return 1
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -0,0 +1,235 @@
+"""微基准测试: 负载内核单次迭代耗时、控制循环与实时记录的开销、进程启动/停止延迟、各执行方式的内存与负载
+
+结果写成 JSON，可以与保存的基线比较，超过阈值的退化会被列出:
+
+    python -m cpupress bench --output bench.json
+    python -m cpupress bench --baseline bench.json --threshold 0.1
+"""
+
+import json
+import multiprocessing
+import platform
+import socket
+import statistics
+import time
+
+from .cgroup import usable_cpus
+from .controller import DutyCycleController
+from .engine import StressEngine
+from .executors import EXECUTORS
+from .kernels import available_kernels, make_kernel
+from .livestats import RUNNING, LiveSlot, LiveStats
+
+# 默认比较阈值: 比基线差 10% 视为退化
+DEFAULT_THRESHOLD = 0.10
+
+BENCH_GROUPS = ("kernels", "control", "spawn", "executors")
+
+
+def _result(value, unit, better="lower"):
+    return {"value": value, "unit": unit, "better": better}
+
+
+def _time_per_call(func, window, repeat):
+    """在 window 秒内反复调用 func，返回 repeat 次测量的单次耗时中位数 (ns)"""
+    func()
+    samples = []
+    for _ in range(repeat):
+        count = 0
+        start = time.perf_counter()
+        deadline = start + window
+        while True:
+            func()
+            count += 1
+            now = time.perf_counter()
+            if now >= deadline:
+                break
+        samples.append((now - start) / count * 1e9)
+    return statistics.median(samples)
+
+
+def bench_kernels(window=0.2, repeat=5, kernels=None):
+    """各负载内核的单次迭代耗时"""
+    results = {}
+    for name in kernels or available_kernels():
+        step = make_kernel(name)
+        ns = _time_per_call(step, window, repeat)
+        results[f"kernel.{name}.ns_per_iter"] = _result(round(ns, 1), "ns")
+    return results
+
+
+def bench_control(window=0.2, repeat=5):
+    """控制循环自身的开销"""
+    results = {}
+    perf_counter = time.perf_counter
+    process_time = time.process_time
+    results["control.perf_counter.ns"] = _result(round(_time_per_call(perf_counter, window, repeat), 1), "ns")
+    results["control.process_time.ns"] = _result(round(_time_per_call(process_time, window, repeat), 1), "ns")
+    
+    controller = DutyCycleController(50)
+    results["control.controller_update.ns"] = _result(
+        round(_time_per_call(lambda: controller.update(0.05, 0.1), window, repeat), 1), "ns"
+    )
+    
+    # 与工作进程相同的忙碌循环，内核为空操作: 每次内核调用附带的循环与计时开销
+    def noop():
+        return None
+    
+    samples = []
+    for _ in range(repeat):
+        iterations = 0
+        start = perf_counter()
+        busy_until = start + window
+        while True:
+            noop()
+            iterations += 1
+            if perf_counter() >= busy_until:
+                break
+        samples.append((perf_counter() - start) / iterations * 1e9)
+    results["control.busy_loop_overhead.ns_per_iter"] = _result(round(statistics.median(samples), 1), "ns")
+    
+    # 一个控制周期的固定开销 (读取共享目标值、两次计时、修正占空比)
+    shared_target = multiprocessing.RawValue("d", 50.0)
+    
+    def period_overhead():
+        if shared_target.value != controller.target:
+            controller.retarget(shared_target.value)
+        wall_start = perf_counter()
+        cpu_start = process_time()
+        controller.update(process_time() - cpu_start, perf_counter() - wall_start + 0.1)
+    
+    results["control.period_overhead.ns"] = _result(round(_time_per_call(period_overhead, window, repeat), 1), "ns")
+    
+    # 每个控制周期写一次共享内存实时记录，以及父进程读取一条记录的开销
+    live = LiveStats(1)
+    slot = LiveSlot(live.name, 0)
+    try:
+        results["control.live_publish.ns"] = _result(
+            round(_time_per_call(lambda: slot.publish(RUNNING, 1, 0.05, 0.05, 0.05, 50.0, 49.5, 1000.0), window, repeat), 1), "ns"
+        )
+        results["control.live_read.ns"] = _result(round(_time_per_call(lambda: live.read(0), window, repeat), 1), "ns")
+    finally:
+        slot.close()
+        live.close()
+    return results
+
+
+def _measure_run(engine, workers, use_pool):
+    """启动一次运行，返回 (起跑延迟, 停止延迟)，单位毫秒"""
+    requested = time.time()
+    engine.start(30, workers=workers, max_usage=100, use_pool=use_pool)
+    deadline = time.time() + 10
+    while len(engine.live_stats()) < workers and time.time() < deadline:
+        time.sleep(0.001)
+    started = [s["started_at"] for s in engine.live_stats().values()]
+    
+    stop_start = time.perf_counter()
+    engine.stop()
+    stop_ms = (time.perf_counter() - stop_start) * 1000
+    start_ms = (max(started) - requested) * 1000 if started else None
+    return start_ms, stop_ms
+
+
+def bench_spawn(workers=None, repeat=3):
+    """冷启动与预热进程池的起跑/停止延迟"""
+    workers = workers or usable_cpus()
+    results = {}
+    for mode, use_pool in (("cold", False), ("pool", True)):
+        engine = StressEngine()
+        if use_pool:
+            engine.warm_up(workers)
+        start_samples, stop_samples = [], []
+        try:
+            for _ in range(repeat):
+                start_ms, stop_ms = _measure_run(engine, workers, use_pool)
+                if start_ms is not None:
+                    start_samples.append(start_ms)
+                stop_samples.append(stop_ms)
+        finally:
+            engine.close()
+        if start_samples:
+            results[f"spawn.{mode}.start_ms"] = _result(round(statistics.median(start_samples), 2), "ms")
+        results[f"spawn.{mode}.stop_ms"] = _result(round(statistics.median(stop_samples), 2), "ms")
+    return results
+
+
+def bench_executors(workers=None, duration=2.0, kernel="hash"):
+    """各执行方式满载运行 duration 秒的起跑延迟、内存占用、实际占用率与吞吐量"""
+    workers = workers or usable_cpus()
+    results = {}
+    for executor in EXECUTORS:
+        engine = StressEngine({"report_interval": 0.2})
+        try:
+            engine.start(duration, workers=workers, max_usage=100, kernel=kernel, executor=executor)
+            while not engine.wait(0.25):
+                engine.update_memory()
+            summary = engine.summary()
+        finally:
+            engine.close()
+        prefix = f"executor.{executor}"
+        if summary["start_latency"]:
+            results[f"{prefix}.start_ms"] = _result(round(summary["start_latency"]["latency"] * 1000, 2), "ms")
+        if summary["memory"]:
+            results[f"{prefix}.memory_mb"] = _result(round(summary["memory"]["peak_bytes"] / 2 ** 20, 2), "MB")
+        if summary["achieved"] is not None:
+            results[f"{prefix}.achieved"] = _result(summary["achieved"], "%", better="higher")
+        results[f"{prefix}.ops_per_sec"] = _result(summary["score"], "ops/s", better="higher")
+    return results
+
+
+def run_benchmarks(groups=BENCH_GROUPS, window=0.2, repeat=5, workers=None, kernels=None):
+    """运行指定的基准测试组，返回可写成 JSON 的报告"""
+    results = {}
+    if "kernels" in groups:
+        results.update(bench_kernels(window, repeat, kernels))
+    if "control" in groups:
+        results.update(bench_control(window, repeat))
+    if "spawn" in groups:
+        results.update(bench_spawn(workers, max(1, repeat // 2)))
+    if "executors" in groups:
+        results.update(bench_executors(workers, kernel=(kernels or ["hash"])[0]))
+    return {
+        "meta": {
+            "host": socket.gethostname(),
+            "time": time.time(),
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "processor": platform.processor(),
+            "cpu_count": multiprocessing.cpu_count(),
+            "usable_cpus": usable_cpus(),
+            "window": window,
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+
+def compare_to_baseline(report, baseline, threshold=DEFAULT_THRESHOLD):
+    """与基线比较，返回 [{name, baseline, current, change, regressed}]，change 为相对变化"""
+    rows = []
+    for name, current in sorted(report["results"].items()):
+        base = baseline.get("results", {}).get(name)
+        if not base or not base["value"]:
+            continue
+        change = (current["value"] - base["value"]) / base["value"]
+        worse = change if current.get("better", "lower") == "lower" else -change
+        rows.append({
+            "name": name,
+            "baseline": base["value"],
+            "current": current["value"],
+            "unit": current["unit"],
+            "change": round(change, 4),
+            "regressed": worse > threshold,
+        })
+    return rows
+
+
+def load_report(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_report(report, path):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
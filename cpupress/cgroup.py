@@ -0,0 +1,265 @@
+"""容器与 cgroup 感知: 可用CPU数、CPU配额与 cgroup 节流统计
+
+multiprocessing.cpu_count() 返回宿主机的核心数，容器内受 cpuset 或 CPU 配额限制时
+按它创建工作进程会严重超额订阅。这里综合 os.sched_getaffinity 与 cgroup 配额
+(v2 的 cpu.max，v1 的 cpu.cfs_quota_us / cpu.cfs_period_us) 得出实际可用的CPU数，
+并读取 cpu.stat 中的节流计数和 cgroup 的CPU用量，用于计算相对配额的占用率。
+
+cgroup_root / proc_root 参数可以指向伪造的目录树；读取失败时按不受限制处理。
+"""
+
+import math
+import os
+import time
+
+from .topology import allowed_cpus
+
+# cgroup v1 中 cpu 与 cpuacct 控制器可能的挂载目录名
+V1_CPU_DIRS = ("cpu,cpuacct", "cpuacct,cpu", "cpu")
+V1_CPUACCT_DIRS = ("cpu,cpuacct", "cpuacct,cpu", "cpuacct")
+
+
+def _read(path):
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def _read_stat(path):
+    """读取 "key value" 格式的 cpu.stat"""
+    text = _read(path)
+    stat = {}
+    for line in (text or "").splitlines():
+        key, _, value = line.partition(" ")
+        if value.strip().lstrip("-").isdigit():
+            stat[key] = int(value)
+    return stat
+
+
+def _proc_cgroups(proc_root):
+    """解析 /proc/self/cgroup，返回 {控制器: 路径}，v2 的统一层级记为空字符串"""
+    text = _read(os.path.join(proc_root, "self", "cgroup"))
+    groups = {}
+    for line in (text or "").splitlines():
+        parts = line.split(":", 2)
+        if len(parts) != 3:
+            continue
+        _, controllers, path = parts
+        for controller in controllers.split(",") if controllers else [""]:
+            groups[controller] = path
+    return groups
+
+
+def _locate(mount, path):
+    """cgroup 目录: 容器内 /proc/self/cgroup 的路径可能不在本命名空间中，此时退回挂载点本身"""
+    candidate = os.path.normpath(os.path.join(mount, path.lstrip("/")))
+    return candidate if os.path.isdir(candidate) else mount
+
+
+def _ancestors(path, mount):
+    """从 path 一直到挂载点的所有目录，配额取其中最严格的一个"""
+    mount = os.path.normpath(mount)
+    path = os.path.normpath(path)
+    dirs = [path]
+    while path != mount and path.startswith(mount + os.sep):
+        path = os.path.dirname(path)
+        dirs.append(path)
+    return dirs
+
+
+class CgroupProbe:
+    """读取本进程所在 cgroup 的CPU限制与统计
+
+        probe = CgroupProbe()
+        probe.quota          # 配额折合的CPU数，不受限时为 None
+        probe.sample()       # {"cgroup_usage": 相对配额的占用率, "cgroup_throttled": 累计节流次数, ...}
+    """
+    
+    def __init__(self, cgroup_root="/sys/fs/cgroup", proc_root="/proc"):
+        self.cgroup_root = cgroup_root
+        self.version = None
+        self.cpu_dir = None
+        self.cpuacct_dir = None
+        self.mount = None
+        groups = _proc_cgroups(proc_root)
+        
+        if "cpu" in groups:
+            for name in V1_CPU_DIRS:
+                mount = os.path.join(cgroup_root, name)
+                if os.path.exists(os.path.join(mount, "cpu.cfs_quota_us")):
+                    self.version, self.mount = 1, mount
+                    self.cpu_dir = _locate(mount, groups["cpu"])
+                    break
+            for name in V1_CPUACCT_DIRS:
+                mount = os.path.join(cgroup_root, name)
+                if os.path.exists(os.path.join(mount, "cpuacct.usage")):
+                    self.cpuacct_dir = _locate(mount, groups.get("cpuacct", groups["cpu"]))
+                    break
+        elif "" in groups and os.path.exists(os.path.join(cgroup_root, "cgroup.controllers")):
+            self.version, self.mount = 2, cgroup_root
+            self.cpu_dir = self.cpuacct_dir = _locate(cgroup_root, groups[""])
+        
+        self.quota = self.read_quota()
+        self._last_usage = None
+    
+    @property
+    def available(self):
+        return self.version is not None
+    
+    def read_quota(self):
+        """配额折合的CPU数 (quota / period)，逐级向上取最严格的限制，不受限时返回 None"""
+        if not self.available:
+            return None
+        limits = []
+        for path in _ancestors(self.cpu_dir, self.mount):
+            if self.version == 2:
+                text = _read(os.path.join(path, "cpu.max"))
+                if text:
+                    quota, _, period = text.partition(" ")
+                    if quota != "max" and period:
+                        limits.append(int(quota) / int(period))
+            else:
+                quota = _read(os.path.join(path, "cpu.cfs_quota_us"))
+                period = _read(os.path.join(path, "cpu.cfs_period_us"))
+                if quota and period and int(quota) > 0:
+                    limits.append(int(quota) / int(period))
+        return round(min(limits), 3) if limits else None
+    
+    def read_stat(self):
+        """累计统计: nr_periods、nr_throttled、throttled_seconds、usage_seconds (缺失的项为 None)"""
+        if not self.available:
+            return {}
+        stat = _read_stat(os.path.join(self.cpu_dir, "cpu.stat"))
+        if self.version == 2:
+            throttled = stat.get("throttled_usec")
+            usage = stat.get("usage_usec")
+            throttled = throttled / 1e6 if throttled is not None else None
+            usage = usage / 1e6 if usage is not None else None
+        else:
+            throttled = stat.get("throttled_time")
+            throttled = throttled / 1e9 if throttled is not None else None
+            usage = _read(os.path.join(self.cpuacct_dir, "cpuacct.usage")) if self.cpuacct_dir else None
+            usage = int(usage) / 1e9 if usage else None
+        return {
+            "nr_periods": stat.get("nr_periods"),
+            "nr_throttled": stat.get("nr_throttled"),
+            "throttled_seconds": throttled,
+            "usage_seconds": usage,
+        }
+    
+    def limit_cpus(self):
+        """可用的CPU份额: 配额与亲和性核心数中较小的一个"""
+        cpus = len(allowed_cpus())
+        return min(self.quota, cpus) if self.quota else cpus
+    
+    def sample(self):
+        """采集一次，返回可直接并入 CPU 样本的字段
+
+        cgroup_usage 为两次采集之间 cgroup 的CPU用量相对于 limit_cpus() 的百分比。
+        """
+        if not self.available:
+            return {}
+        stat = self.read_stat()
+        now = time.monotonic()
+        usage = None
+        if stat["usage_seconds"] is not None:
+            if self._last_usage is not None and now > self._last_usage[0]:
+                spent = stat["usage_seconds"] - self._last_usage[1]
+                usage = round(spent / ((now - self._last_usage[0]) * self.limit_cpus()) * 100, 2)
+            self._last_usage = (now, stat["usage_seconds"])
+        return {
+            "cgroup_usage": usage,
+            "cgroup_throttled": stat["nr_throttled"],
+            "cgroup_throttled_seconds": stat["throttled_seconds"],
+        }
+
+
+class CgroupThrottleDetector:
+    """cgroup 配额节流检测
+
+    样本中的 cgroup_throttled (cpu.stat 的 nr_throttled) 增加时产生 cgroup_throttle_start 事件，
+    之后连续 confirm 个样本不再增加时产生 cgroup_throttle_end 事件。
+    同时统计整个运行期间的节流次数、节流时长与平均配额占用率。
+    """
+    
+    def __init__(self, confirm=3):
+        self.confirm = confirm
+        self.reset()
+    
+    def reset(self):
+        self.first = None
+        self.last = None
+        self.quiet = 0
+        self.throttled = False
+        self.usage = []
+        self.events = []
+    
+    def update(self, sample):
+        """送入一个样本 (需含 time，可含 cgroup_usage、cgroup_throttled、cgroup_throttled_seconds)，返回新事件或 None"""
+        if sample.get("cgroup_usage") is not None:
+            self.usage.append(sample["cgroup_usage"])
+        counts = (sample.get("cgroup_throttled"), sample.get("cgroup_throttled_seconds"))
+        if counts[0] is None:
+            return None
+        previous = self.last
+        self.last = counts
+        if self.first is None:
+            self.first = counts
+        if previous is None:
+            return None
+        
+        periods = counts[0] - previous[0]
+        seconds = counts[1] - previous[1] if None not in (counts[1], previous[1]) else None
+        event = None
+        if periods > 0:
+            self.quiet = 0
+            if not self.throttled:
+                self.throttled = True
+                event = {"time": sample.get("time"), "type": "cgroup_throttle_start", "periods": periods,
+                         "seconds": seconds, "cgroup_usage": sample.get("cgroup_usage")}
+        elif self.throttled:
+            self.quiet += 1
+            if self.quiet >= self.confirm:
+                self.throttled = False
+                event = {"time": sample.get("time"), "type": "cgroup_throttle_end", "periods": 0,
+                         "seconds": 0.0, "cgroup_usage": sample.get("cgroup_usage")}
+        if event:
+            self.events.append(event)
+        return event
+    
+    def totals(self):
+        """运行期间的节流次数、节流时长 (秒) 与平均配额占用率"""
+        if self.first is None:
+            return None
+        seconds = None
+        if None not in (self.first[1], self.last[1]):
+            seconds = round(self.last[1] - self.first[1], 3)
+        return {
+            "throttled": self.last[0] - self.first[0],
+            "throttled_seconds": seconds,
+            "usage": round(sum(self.usage) / len(self.usage), 2) if self.usage else None,
+        }
+
+
+def usable_cpus(probe=None):
+    """适合创建的工作进程数: 亲和性允许的核心数，受 CPU 配额限制时取配额向下取整 (至少 1)"""
+    probe = probe or CgroupProbe()
+    cpus = len(allowed_cpus())
+    if probe.quota:
+        cpus = min(cpus, max(1, math.floor(probe.quota)))
+    return cpus
+
+
+def describe_limits(probe=None):
+    """CPU 限制的说明文字"""
+    probe = probe or CgroupProbe()
+    affinity = len(allowed_cpus())
+    host = os.cpu_count() or affinity
+    parts = [f"可用逻辑CPU {affinity}/{host}"]
+    if probe.available:
+        quota = f"配额 {probe.quota:g} CPU" if probe.quota else "无CPU配额"
+        parts.append(f"cgroup v{probe.version} {quota}")
+    parts.append(f"默认 {usable_cpus(probe)} 个工作进程")
+    return "，".join(parts)
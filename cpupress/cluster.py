@@ -0,0 +1,508 @@
+"""多机协同: agent 与 coordinator
+
+每台机器运行一个 agent，负责本机的压力测试引擎并监听 TCP 端口；coordinator 连接多个 agent，
+让它们在同一个墙钟时刻起跑、运行中推送负载曲线，并把各机遥测汇总到一处:
+
+    python -m cpupress agent --port 7788
+    python -m cpupress cluster --agents 10.0.0.1:7788,10.0.0.2:7788 -d 60 -p ramp:0:100:1m
+
+消息为一行一个 JSON 对象。请求带 id，应答带回同一个 id；agent 主动推送的消息带 event 字段
+(telemetry / throttle / finished)。连接建立后先发送 hello，用于校验口令和估计两端的时钟偏差。
+"""
+
+import json
+import os
+import queue
+import socket
+import socketserver
+import threading
+import time
+
+from .engine import StressEngine
+from .kernels import available_kernels
+from .paths import data_dir
+from .sampler import CpuSampler
+from .thermal import ThermalProbe
+
+DEFAULT_PORT = 7788
+
+# coordinator 默认把起跑时刻定在多少秒之后，留出分发命令与预热进程池的时间
+START_DELAY = 2.0
+
+# 请求超时 (秒)，start 请求额外加上等待起跑的时间
+REQUEST_TIMEOUT = 10.0
+
+# start 命令可以转交给引擎的参数；profile_dir 只能是本机数据目录 profiles/ 下的相对路径
+START_OPTIONS = (
+    "workers", "max_usage", "speed", "tolerance", "kernel", "use_pool",
+    "placement", "cpu_list", "profile", "kernel_options", "latency", "executor",
+    "threads_per_process", "profile_dir",
+)
+
+
+def parse_address(address, default_port=DEFAULT_PORT):
+    """解析 "host:port" 或 "host"，返回 (host, port)"""
+    host, _, port = address.strip().rpartition(":")
+    if not host:
+        return port, default_port
+    return host.strip("[]"), int(port)
+
+
+def remote_profile_dir(name):
+    """把 coordinator 指定的剖析目录限制在本机数据目录的 profiles/ 下，拒绝绝对路径和 .."""
+    name = str(name)
+    if os.path.isabs(name) or os.path.splitdrive(name)[0] or ".." in name.replace("\\", "/").split("/"):
+        raise ValueError(f"剖析目录只能是相对路径且不能包含 ..: {name}")
+    return os.path.join(data_dir(), "profiles", name)
+
+
+def _encode(message):
+    return (json.dumps(message, ensure_ascii=False, default=str) + "\n").encode("utf-8")
+
+
+class _AgentClient:
+    """agent 端的一个 coordinator 连接"""
+    
+    def __init__(self, wfile, address):
+        self.wfile = wfile
+        self.address = address
+        self.authenticated = False
+        self.closed = False
+        self.lock = threading.Lock()
+    
+    def send(self, message):
+        data = _encode(message)
+        with self.lock:
+            if self.closed:
+                raise OSError("连接已关闭")
+            self.wfile.write(data)
+            self.wfile.flush()
+    
+    def close(self):
+        """标记连接已关闭，之后的 send() 不再写入即将关闭的 wfile"""
+        with self.lock:
+            self.closed = True
+
+
+class _AgentHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        agent = self.server.agent
+        client = _AgentClient(self.wfile, self.client_address)
+        agent.subscribe(client)
+        try:
+            for line in self.rfile:
+                try:
+                    message = json.loads(line)
+                except ValueError:
+                    client.send({"ok": False, "error": "无效的消息"})
+                    continue
+                reply = agent.dispatch(message, client)
+                reply["id"] = message.get("id")
+                client.send(reply)
+        except (OSError, ValueError):
+            pass
+        finally:
+            # 在 StreamRequestHandler 关闭 wfile 之前退订，避免推送写入已关闭的流
+            agent.unsubscribe(client)
+            client.close()
+
+
+class _AgentServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class Agent:
+    """在本机运行压力测试引擎并接受 coordinator 的命令
+
+        agent = Agent(port=7788)
+        agent.serve_forever()
+    """
+    
+    def __init__(self, host="127.0.0.1", port=DEFAULT_PORT, engine=None, token=None,
+                 interval=1.0, sysfs_root="/sys"):
+        self.engine = engine or StressEngine()
+        self.token = token
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.clients = []
+        self.clients_lock = threading.Lock()
+        self.run_active = False
+        self.server = _AgentServer((host, port), _AgentHandler)
+        self.server.agent = self
+        self.address = self.server.server_address
+        self.sampler = CpuSampler(interval, thermal=ThermalProbe(sysfs_root), cgroup=self.engine.cgroup)
+        self._stopped = threading.Event()
+        self._telemetry_thread = None
+    
+    def serve_forever(self):
+        """启动遥测线程并处理连接，直到 shutdown()"""
+        self.sampler.start()
+        self._telemetry_thread = threading.Thread(target=self._telemetry_loop, daemon=True)
+        self._telemetry_thread.start()
+        try:
+            self.server.serve_forever()
+        finally:
+            self._stopped.set()
+            self.sampler.stop()
+    
+    def shutdown(self):
+        """停止服务并关闭引擎"""
+        self.server.shutdown()
+        self.server.server_close()
+        with self.lock:
+            self.engine.close()
+    
+    def subscribe(self, client):
+        with self.clients_lock:
+            self.clients.append(client)
+    
+    def unsubscribe(self, client):
+        with self.clients_lock:
+            if client in self.clients:
+                self.clients.remove(client)
+    
+    def broadcast(self, message):
+        """推送给所有已通过校验的连接"""
+        with self.clients_lock:
+            clients = [c for c in self.clients if c.authenticated]
+        for client in clients:
+            try:
+                client.send(message)
+            except (OSError, ValueError):
+                self.unsubscribe(client)
+    
+    def dispatch(self, message, client):
+        """处理一条请求，返回应答"""
+        command = message.get("cmd")
+        if command != "hello" and not client.authenticated:
+            return {"ok": False, "error": "请先发送 hello"}
+        handler = getattr(self, f"cmd_{command}", None)
+        if handler is None:
+            return {"ok": False, "error": f"未知的命令: {command}"}
+        try:
+            return dict(handler(message, client), ok=True)
+        except (ValueError, RuntimeError, TypeError) as e:
+            return {"ok": False, "error": str(e)}
+    
+    def cmd_hello(self, message, client):
+        if self.token and message.get("token") != self.token:
+            raise ValueError("口令错误")
+        client.authenticated = True
+        return {
+            "host": socket.gethostname(),
+            "cpus": self.engine.config["cpu_threads"],
+            "kernels": available_kernels(),
+            "time": time.time(),
+        }
+    
+    def cmd_start(self, message, client):
+        """在 message["at"] (本机墙钟时间) 起跑"""
+        options = {key: message[key] for key in START_OPTIONS if message.get(key) is not None}
+        if options.get("profile_dir"):
+            options["profile_dir"] = remote_profile_dir(options["profile_dir"])
+        with self.lock:
+            if self.engine.is_running():
+                raise RuntimeError("压力测试已在运行中")
+            # 预热进程池放在等待期间完成，起跑时只需放行屏障
+            if options.get("use_pool"):
+                self.engine.warm_up(options.get("workers"))
+        delay = message.get("at", time.time()) - time.time()
+        if delay > 0:
+            time.sleep(delay)
+        with self.lock:
+            config = self.engine.start(float(message["duration"]), **options)
+            self.run_active = True
+            started = self.engine.released_at or time.time()
+        return {"config": config, "started": started}
+    
+    def cmd_profile(self, message, client):
+        with self.lock:
+            self.engine.set_profile(message["spec"], message.get("restart", True))
+            return {"profile": self.engine.profile.spec()}
+    
+    def cmd_stop(self, message, client):
+        with self.lock:
+            stopped = self.engine.stop(message.get("reason", "stopped"))
+        return {"stopped": stopped}
+    
+    def cmd_status(self, message, client):
+        with self.lock:
+            return {"telemetry": self._telemetry(self.sampler.latest)}
+    
+    def cmd_summary(self, message, client):
+        with self.lock:
+            return {"summary": self.engine.summary()}
+    
+    def _telemetry(self, sample):
+        engine = self.engine
+        sample = sample or {}
+        total, per_worker = engine.throughput()
+        return {
+            "time": time.time(),
+            "running": engine.running,
+            "run_id": engine.run_id,
+            "cpu": sample.get("cpu"),
+            "freq_mhz": sample.get("freq_mhz"),
+            "temp_c": sample.get("temp_c"),
+            "cgroup_usage": sample.get("cgroup_usage"),
+            "target": engine.current_target() if engine.running else None,
+            "achieved": engine.achieved_usage(),
+            "ops_per_sec": total if engine.running else 0.0,
+            "workers": len(per_worker),
+        }
+    
+    def _telemetry_loop(self):
+        """定时汇总本机遥测推送给 coordinator，并在运行结束时推送摘要"""
+        while not self._stopped.wait(self.interval):
+            samples = self.sampler.drain()
+            finished = False
+            with self.lock:
+                if self.engine.running:
+                    self.engine.poll_stats()
+                    for sample in samples:
+                        for event in self.engine.record_sample(sample):
+                            self.broadcast({"event": "throttle", "detail": event})
+                    self.engine.poll()
+                if self.run_active and not self.engine.running:
+                    self.run_active = False
+                    finished = True
+                telemetry = self._telemetry(samples[-1] if samples else self.sampler.latest)
+                summary = self.engine.summary() if finished else None
+            self.broadcast(dict(telemetry, event="telemetry"))
+            if finished:
+                self.broadcast({"event": "finished", "summary": summary})
+
+
+class AgentLink:
+    """coordinator 到单个 agent 的连接
+
+    后台线程读取消息: 应答交给等待中的请求，推送消息交给 on_event(link, message)。
+    """
+    
+    def __init__(self, address, token=None, timeout=REQUEST_TIMEOUT, on_event=None):
+        self.address = address
+        self.name = address
+        self.token = token
+        self.timeout = timeout
+        self.on_event = on_event
+        self.info = {}
+        self.clock_offset = 0.0
+        self.connected = False
+        self.telemetry = None
+        self.summary = None
+        self.finished = threading.Event()
+        self._pending = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.sock = None
+    
+    def connect(self):
+        """建立连接并发送 hello，估计对方时钟与本机的偏差"""
+        self.sock = socket.create_connection(parse_address(self.address), self.timeout)
+        self.sock.settimeout(None)
+        self.rfile = self.sock.makefile("rb")
+        self.connected = True
+        threading.Thread(target=self._read, daemon=True).start()
+        sent = time.time()
+        self.info = self.request("hello", token=self.token)
+        received = time.time()
+        # 假设往返对称: 对方回复时刻对应本机往返的中点
+        self.clock_offset = self.info["time"] - (sent + received) / 2
+        self.name = f"{self.info['host']}@{self.address}"
+        return self.info
+    
+    def send(self, command, **fields):
+        """发送请求，返回用于等待应答的队列"""
+        if not self.connected:
+            raise RuntimeError(f"{self.name}: 未连接")
+        with self._lock:
+            self._next_id += 1
+            request_id = self._next_id
+            reply = queue.Queue(maxsize=1)
+            self._pending[request_id] = reply
+            self.sock.sendall(_encode(dict(fields, cmd=command, id=request_id)))
+        return reply
+    
+    def wait_reply(self, reply, timeout=None):
+        """等待应答，失败时抛出 RuntimeError"""
+        try:
+            message = reply.get(timeout=self.timeout if timeout is None else timeout)
+        except queue.Empty:
+            raise RuntimeError(f"{self.name}: 等待应答超时")
+        if not message.get("ok"):
+            raise RuntimeError(f"{self.name}: {message.get('error')}")
+        return message
+    
+    def request(self, command, timeout=None, **fields):
+        """发送请求并等待应答"""
+        return self.wait_reply(self.send(command, **fields), timeout)
+    
+    def _read(self):
+        try:
+            for line in self.rfile:
+                message = json.loads(line)
+                reply = self._pending.pop(message.get("id"), None)
+                if reply is not None:
+                    reply.put(message)
+                    continue
+                if message.get("event") == "telemetry":
+                    self.telemetry = message
+                elif message.get("event") == "finished":
+                    self.summary = message["summary"]
+                    self.finished.set()
+                if self.on_event:
+                    self.on_event(self, message)
+        except (OSError, ValueError):
+            pass
+        self.connected = False
+        for reply in list(self._pending.values()):
+            reply.put({"ok": False, "error": "连接已断开"})
+        self._pending.clear()
+        # 连接断开的 agent 不会再推送结束消息
+        self.finished.set()
+        if self.on_event:
+            self.on_event(self, {"event": "disconnected"})
+    
+    def close(self):
+        self.connected = False
+        if self.sock:
+            try:
+                self.sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            self.sock.close()
+
+
+class Coordinator:
+    """连接多个 agent，统一起跑、切换负载曲线并汇总遥测
+
+        coordinator = Coordinator(["host1:7788", "host2:7788"])
+        coordinator.connect()
+        coordinator.start(60, profile="ramp:0:100:1m")
+        coordinator.wait()
+        coordinator.close()
+    """
+    
+    def __init__(self, addresses, token=None, timeout=REQUEST_TIMEOUT, on_event=None):
+        if not addresses:
+            raise ValueError("至少需要一个 agent 地址")
+        self.links = [AgentLink(address, token, timeout, on_event) for address in addresses]
+        self.start_at = None
+        self.skew = None
+    
+    def connect(self):
+        """连接所有 agent，返回 {名称: hello 应答}"""
+        try:
+            for link in self.links:
+                link.connect()
+        except (OSError, RuntimeError):
+            self.close()
+            raise
+        return {link.name: link.info for link in self.links}
+    
+    def _broadcast(self, command, timeout=None, per_link=None, **fields):
+        """向所有 agent 同时发送请求，返回 {名称: 应答}"""
+        pending = []
+        for link in self.links:
+            extra = per_link(link) if per_link else {}
+            pending.append((link, link.send(command, **fields, **extra)))
+        return {link.name: link.wait_reply(reply, timeout) for link, reply in pending}
+    
+    def start(self, duration, delay=START_DELAY, **options):
+        """让所有 agent 在 delay 秒后的同一墙钟时刻起跑，返回 {名称: 应答}
+
+        起跑时刻按各 agent 的时钟偏差换算成对方的本地时间；应答中的 skew 为实际起跑时刻的最大差值。
+        """
+        options = {key: value for key, value in options.items() if value is not None}
+        unknown = set(options) - set(START_OPTIONS)
+        if unknown:
+            raise ValueError(f"未知的参数: {', '.join(sorted(unknown))}")
+        for link in self.links:
+            link.finished.clear()
+            link.summary = None
+        self.start_at = time.time() + delay
+        replies = self._broadcast(
+            "start", timeout=delay + REQUEST_TIMEOUT,
+            per_link=lambda link: {"at": self.start_at + link.clock_offset},
+            duration=duration, **options
+        )
+        started = [reply["started"] - link.clock_offset for link, reply in zip(self.links, replies.values())]
+        self.skew = max(started) - min(started)
+        return replies
+    
+    def set_profile(self, spec, restart=True):
+        """向所有 agent 推送新的负载曲线"""
+        return self._broadcast("profile", spec=str(spec), restart=restart)
+    
+    def stop(self, reason="stopped"):
+        """停止所有 agent 上的压力测试"""
+        return self._broadcast("stop", reason=reason)
+    
+    def wait(self, timeout=None):
+        """等待所有 agent 推送运行结束消息，超时返回 False"""
+        deadline = None if timeout is None else time.time() + timeout
+        for link in self.links:
+            remaining = None if deadline is None else max(deadline - time.time(), 0)
+            if not link.finished.wait(remaining):
+                return False
+        return True
+    
+    def summaries(self):
+        """各 agent 的运行摘要，推送的摘要缺失时主动查询"""
+        result = {}
+        for link in self.links:
+            if link.summary is None and link.connected:
+                link.summary = link.request("summary")["summary"]
+            result[link.name] = link.summary
+        return result
+    
+    def telemetry(self):
+        """汇总各 agent 最近一次推送的遥测"""
+        agents = {link.name: link.telemetry for link in self.links}
+        latest = [t for t in agents.values() if t]
+        
+        def mean(key):
+            values = [t[key] for t in latest if t.get(key) is not None]
+            return round(sum(values) / len(values), 2) if values else None
+        
+        temps = [t["temp_c"] for t in latest if t.get("temp_c") is not None]
+        return {
+            "time": time.time(),
+            "agents": agents,
+            "connected": sum(1 for link in self.links if link.connected),
+            "running": sum(1 for t in latest if t["running"]),
+            "workers": sum(t["workers"] for t in latest),
+            "ops_per_sec": round(sum(t["ops_per_sec"] or 0.0 for t in latest), 2),
+            "cpu": mean("cpu"),
+            "target": mean("target"),
+            "achieved": mean("achieved"),
+            "freq_mhz": mean("freq_mhz"),
+            "max_temp_c": max(temps) if temps else None,
+        }
+    
+    def close(self):
+        for link in self.links:
+            link.close()
+
+
+def format_telemetry(aggregate):
+    """把汇总遥测格式化为日志文本行"""
+    def fmt(value, spec, unit=""):
+        return "-" if value is None else f"{value:{spec}}{unit}"
+    
+    lines = [
+        f"📡 {aggregate['running']}/{len(aggregate['agents'])} 台运行中  {aggregate['workers']} 进程  "
+        f"{aggregate['ops_per_sec']:,.0f} ops/s  CPU {fmt(aggregate['cpu'], '.1f', '%')}  "
+        f"目标/实际 {fmt(aggregate['target'], '.1f', '%')}/{fmt(aggregate['achieved'], '.1f', '%')}  "
+        f"最高温度 {fmt(aggregate['max_temp_c'], '.0f', '°C')}"
+    ]
+    for name, t in aggregate["agents"].items():
+        if t is None:
+            lines.append(f"  - {name}: 暂无数据")
+            continue
+        lines.append(f"  - {name}: CPU {fmt(t['cpu'], '.1f', '%')}  实际 {fmt(t['achieved'], '.1f', '%')}  "
+                     f"{t['ops_per_sec'] or 0:,.0f} ops/s  {fmt(t['freq_mhz'], '.0f', ' MHz')}  "
+                     f"{fmt(t['temp_c'], '.0f', '°C')}"
+                     + (f"  配额占用 {t['cgroup_usage']:.1f}%" if t.get("cgroup_usage") is not None else ""))
+    return lines
@@ -0,0 +1,77 @@
+"""占空比闭环控制器: 根据实测 CPU 时间 / 墙钟时间调整每个周期的忙碌时长"""
+
+
+class DutyCycleController:
+    """PI 占空比控制器
+
+    每个控制周期 (period 秒) 内先忙碌 duty * period 秒，再休眠剩余时间。
+    周期结束后用本进程消耗的 CPU 时间除以墙钟时间得到实际占用率，
+    与目标值比较后修正下一个周期的占空比，使负载稳定在目标附近。
+    """
+
+    def __init__(self, target, period=0.1, tolerance=2.0, kp=0.6, ki=0.15, smoothing=0.2):
+        self.period = period
+        self.tolerance = tolerance
+        self.kp = kp
+        self.ki = ki
+        self.smoothing = smoothing
+        self.integral = 0.0
+        self.achieved = None
+        self.error = 0.0
+        self.set_target(target)
+    
+    def set_target(self, target):
+        """设置目标占用率 (0-100)，以目标值作为前馈占空比"""
+        self.target = min(max(float(target), 0.0), 100.0)
+        self.duty = self.target / 100
+        self.integral = 0.0
+    
+    def retarget(self, target):
+        """运行中修改目标值: 保留积分项，只按目标变化量平移占空比"""
+        target = min(max(float(target), 0.0), 100.0)
+        self.duty = min(max(self.duty + (target - self.target) / 100, 0.0), 1.0)
+        self.target = target
+    
+    @property
+    def busy_time(self):
+        """本周期应忙碌的秒数"""
+        return self.duty * self.period
+    
+    @property
+    def saturated(self):
+        """目标为满载时不需要休眠"""
+        return self.target >= 100
+    
+    @property
+    def within_tolerance(self):
+        """实际占用率是否在容差范围内"""
+        return self.achieved is not None and abs(self.error) <= self.tolerance
+    
+    def update(self, cpu_time, wall_time):
+        """根据一个周期的 CPU 时间和墙钟时间修正占空比，返回新的占空比"""
+        if wall_time <= 0:
+            return self.duty
+        
+        measured = min(cpu_time / wall_time * 100, 100.0)
+        if self.achieved is None:
+            self.achieved = measured
+        else:
+            self.achieved += self.smoothing * (measured - self.achieved)
+        
+        # 误差以百分点计，积分项做限幅防止饱和
+        self.error = self.target - self.achieved
+        error = self.target - measured
+        self.integral = min(max(self.integral + error, -100.0), 100.0)
+        duty = (self.target + self.kp * error + self.ki * self.integral) / 100
+        self.duty = min(max(duty, 0.0), 1.0)
+        return self.duty
+    
+    def stats(self):
+        """返回控制器状态"""
+        return {
+            "target": self.target,
+            "achieved": round(self.achieved or 0.0, 2),
+            "error": round(self.error, 2),
+            "duty": round(self.duty, 4),
+            "within_tolerance": self.within_tolerance,
+        }
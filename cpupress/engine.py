@@ -0,0 +1,931 @@
+"""压力测试引擎: 工作进程函数与进程启停管理 (不依赖任何GUI模块)"""
+
+import multiprocessing
+import multiprocessing.connection
+import os
+import signal
+import threading
+import time
+
+from .cgroup import CgroupProbe, CgroupThrottleDetector, usable_cpus
+from .controller import DutyCycleController
+from .executors import (DEFAULT_EXECUTOR, DEFAULT_THREADS_PER_PROCESS, footprint_pids, gil_enabled,
+                        memory_footprint, spawn_workers, validate_executor)
+from .history import TelemetryRecorder
+from .kernels import DEFAULT_KERNEL, KERNEL_OPTIONS, make_kernel, validate_kernel
+from .latency import DEFAULT_PERIOD_MS, LATENCY_OPTIONS, LatencyProbe, describe_latency
+from .livestats import FINISHED, RUNNING, LiveSlot, LiveStats
+from .memory import format_size
+from .profiles import ProfileScheduler, parse_profile
+from .thermal import ThrottleDetector
+from .topology import describe_placement, pin_to_cpu, plan_placement
+from .watcher import CompletionWatcher, sentinel_waitables
+
+
+# 每个工作进程上报状态的间隔 (秒)
+REPORT_INTERVAL = 1.0
+
+# 工作单元超过该时间 (秒) 没有更新共享内存中的心跳时视为卡住
+STALL_TIMEOUT = 5.0
+
+# 停止时等待工作进程自行退出的时间，以及 terminate/kill 之后各自的等待时间 (秒)
+STOP_TIMEOUT = 2.0
+KILL_TIMEOUT = 1.0
+
+
+def _context_switches(process, threaded):
+    """(自愿, 非自愿) 上下文切换次数，线程执行方式下只统计当前线程，取不到时返回 None"""
+    if threaded:
+        try:
+            import resource
+            usage = resource.getrusage(resource.RUSAGE_THREAD)
+            return usage.ru_nvcsw, usage.ru_nivcsw
+        except (ImportError, AttributeError, OSError):
+            return None
+    if process is None:
+        return None
+    try:
+        switches = process.num_ctx_switches()
+        return switches.voluntary, switches.involuntary
+    except Exception:
+        return None
+
+
+def _start_profiler(params, worker_id):
+    """按 profile_dir 参数为本工作单元启动 cProfile，返回 (profiler, 输出文件) 或 (None, None)"""
+    directory = params.get("profile_dir")
+    if not directory:
+        return None, None
+    import cProfile
+    
+    profiler = cProfile.Profile()
+    try:
+        # Python 3.12+ 同一进程内只能有一个 cProfile 处于启用状态，线程模式下其余线程跳过
+        profiler.enable()
+    except ValueError:
+        return None, None
+    return profiler, os.path.join(directory, f"worker-{worker_id}.prof")
+
+
+# CPU 压力测试工作函数
+def cpu_stress_worker(worker_id, params, stop_event, report_queue=None, shared_target=None):
+    """按目标占用率产生负载
+
+    每个控制周期内先执行计算直到达到忙碌时长，再休眠剩余时间；
+    周期结束后用本进程 (线程模式下为本线程) 的CPU时间与墙钟时间之比修正占空比。
+    shared_target 为父进程负载曲线写入的共享目标值，每个周期读取一次。
+    stop_event 被设置后在当前周期内退出，休眠阶段可被立即唤醒。
+
+    params["live_stats"] 为共享内存块名称时，每个控制周期把迭代次数、时间、目标与实际占用率写入
+    本工作单元的记录 (见 livestats)，父进程的实时显示都读取这块内存；report_queue 只承载按
+    report_interval 发送的详细状态与结束时的最终报告。
+    
+    上报中的 time_breakdown 把运行时间分为计算 (CPU时间)、调度等待 (计算阶段中未占用CPU的墙钟时间)、
+    休眠与循环开销，并附带上下文切换次数。params["profile_dir"] 不为空时在 cProfile 下运行，
+    结束时把剖析结果写入该目录的 worker-<编号>.prof。
+    """
+    # Ctrl+C 由父进程处理，工作进程通过 stop_event 退出 (线程不能设置信号处理)
+    if multiprocessing.current_process().name != "MainProcess" and threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+    
+    # 按绑核方案固定到指定逻辑CPU
+    placement = params.get("placement")
+    cpu = placement[worker_id] if placement else None
+    if cpu is not None and not pin_to_cpu(cpu):
+        cpu = None
+    
+    end_time = time.time() + params["duration"]
+    # 速度越高控制周期越短，100% 速度对应 100ms 周期
+    period = 0.1 * (100 / params["stress_speed"])
+    controller = DutyCycleController(
+        params["max_cpu_usage"],
+        period=period,
+        tolerance=params.get("tolerance", 2.0)
+    )
+    step = make_kernel(params.get("kernel", DEFAULT_KERNEL), params)
+    # 内存内核每次迭代的访问次数与字节数
+    accesses = getattr(step, "accesses", None)
+    step_bytes = getattr(step, "bytes", None)
+    report_interval = params.get("report_interval", REPORT_INTERVAL)
+    # 同一进程内有多个工作线程时，process_time() 会包含其他线程的CPU时间
+    threaded = params.get("executor", DEFAULT_EXECUTOR) != "process"
+    cpu_clock = time.thread_time if threaded else time.process_time
+    try:
+        import psutil
+        process = None if threaded else psutil.Process()
+    except ImportError:
+        process = None
+    profiler, profile_file = _start_profiler(params, worker_id)
+    
+    # 吞吐量计数: 已完成的内核迭代次数，ops_per_sec 为最近一个上报周期的吞吐量
+    iterations = 0
+    busy_seconds = 0.0
+    ops_per_sec = 0.0
+    # 时间分解: 计算阶段的CPU时间与休眠时间 (秒)
+    busy_cpu = 0.0
+    sleep_seconds = 0.0
+    switches_start = _context_switches(process, threaded)
+    started_at = time.time()
+    run_start = last_report = time.perf_counter()
+    last_iterations = 0
+    
+    # 共享内存中的实时记录
+    live = LiveSlot(params["live_stats"], worker_id, started_at) if params.get("live_stats") else None
+    if live is not None:
+        live.publish(RUNNING, target=controller.target)
+    
+    def report(final):
+        now = time.perf_counter()
+        memory_stats = {}
+        if accesses and iterations and busy_seconds > 0:
+            memory_stats = {
+                "ns_per_access": round(busy_seconds / (iterations * accesses) * 1e9, 2),
+                "gb_per_sec": round(iterations * step_bytes / busy_seconds / 1e9, 3),
+            }
+        elapsed = now - run_start
+        breakdown = {
+            "busy": round(busy_cpu, 4),
+            "involuntary_wait": round(max(busy_seconds - busy_cpu, 0.0), 4),
+            "sleep": round(sleep_seconds, 4),
+            "overhead": round(max(elapsed - busy_seconds - sleep_seconds, 0.0), 4),
+        }
+        switches = _context_switches(process, threaded)
+        if switches and switches_start:
+            breakdown["voluntary_switches"] = switches[0] - switches_start[0]
+            breakdown["involuntary_switches"] = switches[1] - switches_start[1]
+        report_queue.put(dict(
+            controller.stats(),
+            **memory_stats,
+            worker=worker_id,
+            iterations=iterations,
+            ops_per_sec=round(ops_per_sec, 2),
+            mean_ops_per_sec=round(iterations / (now - run_start), 2) if now > run_start else 0.0,
+            elapsed=round(elapsed, 3),
+            started_at=started_at,
+            cpu=cpu,
+            time_breakdown=breakdown,
+            profile_file=profile_file if final else None,
+            final=final
+        ))
+    
+    while time.time() < end_time and not stop_event.is_set():
+        if shared_target is not None and shared_target.value != controller.target:
+            controller.retarget(shared_target.value)
+        wall_start = time.perf_counter()
+        cpu_start = cpu_clock()
+        busy_until = wall_start + controller.busy_time
+        
+        # 计算直到本周期忙碌时长用完
+        while True:
+            step()
+            iterations += 1
+            if time.perf_counter() >= busy_until:
+                break
+        busy_end = time.perf_counter()
+        busy_seconds += busy_end - wall_start
+        busy_cpu += cpu_clock() - cpu_start
+        
+        # 休眠剩余时间，停止信号到来时立即醒来
+        if not controller.saturated:
+            remaining = wall_start + period - time.perf_counter()
+            if remaining > 0:
+                stopped = stop_event.wait(remaining)
+                sleep_seconds += time.perf_counter() - busy_end
+                if stopped:
+                    break
+        
+        controller.update(cpu_clock() - cpu_start, time.perf_counter() - wall_start)
+        
+        now = time.perf_counter()
+        if now - last_report >= report_interval:
+            ops_per_sec = (iterations - last_iterations) / (now - last_report)
+            last_report, last_iterations = now, iterations
+            if report_queue is not None:
+                report(False)
+        elif not last_iterations:
+            # 第一个上报周期内用开始以来的平均吞吐量
+            ops_per_sec = iterations / (now - run_start)
+        if live is not None:
+            live.publish(RUNNING, iterations, busy_seconds, busy_cpu, sleep_seconds,
+                         controller.target, controller.achieved, ops_per_sec)
+    
+    # 最后不足一个上报周期的部分
+    now = time.perf_counter()
+    if now > last_report:
+        ops_per_sec = (iterations - last_iterations) / (now - last_report)
+    if profiler is not None:
+        profiler.disable()
+        try:
+            profiler.dump_stats(profile_file)
+        except OSError:
+            profile_file = None
+    if live is not None:
+        live.publish(FINISHED, iterations, busy_seconds, busy_cpu, sleep_seconds,
+                     controller.target, controller.achieved, ops_per_sec)
+        live.close()
+    if report_queue is not None:
+        report(True)
+
+
+def _checked_options(options, allowed, kind):
+    """只接受 allowed 中的键，防止调用方 (包括远程 coordinator) 借参数字典覆盖其他配置"""
+    unknown = set(options) - set(allowed)
+    if unknown:
+        raise ValueError(f"未知的{kind}: {', '.join(sorted(map(str, unknown)))}")
+    return options
+
+
+class StressEngine:
+    """压力测试引擎
+
+    负责创建、监控和停止压力测试进程。GUI 与命令行共用同一套接口:
+
+        engine = StressEngine()
+        engine.start(duration=30, workers=4, max_usage=100)
+        engine.wait()
+
+    传入 history (RunHistory) 时每次运行的配置、结果和遥测时间序列都会保存下来。
+    """
+
+    def __init__(self, config=None, history=None):
+        # 容器内按 cpuset 与 CPU 配额确定默认工作进程数，而不是宿主机的核心数
+        self.cgroup = CgroupProbe()
+        
+        # 默认配置
+        self.config = {
+            "cpu_threads": usable_cpus(self.cgroup),
+            "stress_speed": 100,
+            "max_cpu_usage": 100,
+            "tolerance": 2.0,
+            "kernel": DEFAULT_KERNEL,
+            "use_pool": False,
+            "placement": "none",
+            "cpu_list": None,
+            "executor": DEFAULT_EXECUTOR,
+            "threads_per_process": DEFAULT_THREADS_PER_PROCESS,
+            "profile_dir": None,
+            "latency_probe": False,
+            "latency_period": DEFAULT_PERIOD_MS,
+            "latency_cpu": None,
+            "latency_priority": None
+        }
+        if config:
+            self.config.update(config)
+        
+        # 压力测试进程列表 (冷启动模式) 与预热进程池
+        self.processes = []
+        self.pool = None
+        self.running = False
+        self.stop_event = multiprocessing.Event()
+        self.report_queue = None
+        
+        # 负载曲线写入、所有工作进程读取的共享目标占用率
+        self.shared_target = multiprocessing.RawValue("d", 100.0)
+        self.profile = None
+        self.scheduler = None
+        
+        # 与工作进程同时运行的调度延迟探测进程
+        self.latency_probe = None
+        
+        # 工作单元的内存占用 (当前值与峰值，字节) 及线程模式下主进程的基线
+        self.memory = {"current": None, "peak": None, "process_peak": None}
+        self.memory_baseline = 0
+        
+        # 运行完成监视线程与各进程的停止耗时
+        self.watcher = None
+        self.stop_latency = {}
+        
+        # 运行历史
+        self.history = history
+        self.run_id = None
+        self.recorder = None
+        
+        # 降频检测与 cgroup 配额节流检测
+        self.throttle_detector = ThrottleDetector()
+        self.cgroup_detector = CgroupThrottleDetector()
+        
+        # 各工作进程最新上报的详细状态 (上报队列) 与实时记录 (共享内存，按需创建)；
+        # 共享内存释放后 live_final 保留最后一次读到的记录
+        self.worker_stats = {}
+        self.live = None
+        self.live_final = {}
+        # 停止时没有退出的工作线程 (线程无法强制结束)，它们仍可能写入原来的共享内存块
+        self.lingering = []
+        
+        # 运行信息
+        self.duration = 0
+        self.start_time = None
+        self.end_time = None
+        self.stop_reason = None
+        self.start_requested = None
+        self.released_at = None
+        self.placement = None
+    
+    def start(self, duration, workers=None, max_usage=None, speed=None, tolerance=None, kernel=None,
+              use_pool=None, placement=None, cpu_list=None, profile=None, kernel_options=None,
+              latency=None, executor=None, threads_per_process=None, profile_dir=None):
+        """启动压力测试，返回本次运行使用的配置
+
+        profile 为负载曲线 (LoadProfile 或 "ramp:0:100:5m" 格式的文本)，
+        指定后目标占用率随时间变化，max_usage 只作为起始值。
+        kernel_options 为内核参数，如 memory 内核的 working_set、memory_pattern。
+        latency 为调度延迟探测参数 {"latency_probe", "latency_period", "latency_cpu", "latency_priority"}。
+        executor 为执行方式 (process/thread/hybrid)，hybrid 时每个进程运行 threads_per_process 个线程。
+        profile_dir 不为空时每个工作单元在 cProfile 下运行，结束时写入该目录的 worker-<编号>.prof。
+        """
+        if self.is_running():
+            raise RuntimeError("压力测试已在运行中")
+        if duration <= 0:
+            raise ValueError("持续时间必须大于0")
+        
+        if workers is not None:
+            self.config["cpu_threads"] = int(workers)
+        if max_usage is not None:
+            self.config["max_cpu_usage"] = max_usage
+        if speed is not None:
+            self.config["stress_speed"] = speed
+        if tolerance is not None:
+            self.config["tolerance"] = tolerance
+        if kernel is not None:
+            self.config["kernel"] = kernel
+        if use_pool is not None:
+            self.config["use_pool"] = bool(use_pool)
+        if placement is not None:
+            self.config["placement"] = placement
+        if cpu_list is not None:
+            self.config["cpu_list"] = cpu_list
+        if kernel_options:
+            self.config.update(_checked_options(kernel_options, KERNEL_OPTIONS, "内核参数"))
+        if latency:
+            self.config.update(_checked_options(latency, LATENCY_OPTIONS, "调度延迟探测参数"))
+        if executor is not None:
+            self.config["executor"] = executor
+        if threads_per_process is not None:
+            self.config["threads_per_process"] = int(threads_per_process)
+        if profile_dir is not None:
+            self.config["profile_dir"] = profile_dir or None
+        if self.config["profile_dir"]:
+            os.makedirs(self.config["profile_dir"], exist_ok=True)
+        validate_executor(self.config["executor"], self.config["threads_per_process"], self.config["use_pool"])
+        validate_kernel(self.config["kernel"], self.config)
+        if self.config["cpu_threads"] <= 0:
+            raise ValueError("线程数必须大于0")
+        if not 0 < self.config["max_cpu_usage"] <= 100:
+            raise ValueError("最大CPU占用必须在1-100之间")
+        if self.config["latency_probe"] and self.config["latency_period"] <= 0:
+            raise ValueError("延迟探测周期必须大于0")
+        self.profile = parse_profile(profile) if profile else None
+        self.placement = plan_placement(
+            self.config["cpu_threads"], self.config["placement"], self.config["cpu_list"]
+        )
+        
+        # 上次停止时没有退出的线程仍在使用原来的 stop_event 和共享内存块: 保持旧事件为已设置
+        # 让它们尽快退出，本次运行换用新的事件和新的内存块 (进程池绑定了旧事件，一并重建)
+        self.lingering = [t for t in self.lingering if t.is_alive()]
+        if self.lingering:
+            self.stop_event = multiprocessing.Event()
+            if self.pool:
+                self.pool.close()
+                self.pool = None
+        else:
+            self.stop_event.clear()
+        self.duration = duration
+        self.start_time = self.start_requested = time.time()
+        self.end_time = None
+        self.stop_reason = None
+        if self.report_queue is None:
+            self.report_queue = multiprocessing.SimpleQueue()
+        self.poll_stats()
+        self.worker_stats = {}
+        self.stop_latency = {}
+        self.memory = {"current": None, "peak": None, "process_peak": None}
+        if self.live is None or self.live.capacity < self.config["cpu_threads"] or self.lingering:
+            if self.live:
+                self.live.close()
+            self.live = LiveStats(self.config["cpu_threads"])
+        else:
+            self.live.reset()
+        self.live_final = {}
+        params = dict(self.config, duration=duration, placement=self.placement, live_stats=self.live.name)
+        self.shared_target.value = (
+            self.profile.target(0) if self.profile else self.config["max_cpu_usage"]
+        )
+        params["max_cpu_usage"] = self.shared_target.value
+        
+        try:
+            if self.config["use_pool"]:
+                self._start_pool(params)
+            else:
+                self._start_processes(params)
+        except Exception:
+            self.stop()
+            raise
+        self.running = True
+        self.latency_probe = None
+        if self.config["latency_probe"]:
+            self.latency_probe = LatencyProbe(
+                self.config["latency_period"], self.config["latency_cpu"], self.config["latency_priority"]
+            ).start()
+        if self.profile:
+            self.scheduler = ProfileScheduler(self.profile, self.shared_target)
+            self.scheduler.start()
+        run_config = dict(self.config, duration=duration, profile=self.profile.spec() if self.profile else None)
+        
+        self.throttle_detector.reset()
+        self.cgroup_detector.reset()
+        self.run_id = self.recorder = None
+        if self.history:
+            self.run_id = self.history.begin_run(run_config, started=self.start_time)
+            self.recorder = TelemetryRecorder(self.history, self.run_id)
+        return run_config
+    
+    def _start_processes(self, params):
+        """冷启动: 按执行方式为本次运行创建新的进程或线程"""
+        executor = self.config["executor"]
+        # 线程模式统计的是整个主进程: 紧挨着启动线程之前取基线，之后报告增量和整个进程的占用
+        self.memory_baseline = (memory_footprint([os.getpid()]) or 0) if executor == "thread" else 0
+        self.processes = spawn_workers(
+            cpu_stress_worker, executor, self.config["cpu_threads"], params,
+            self.stop_event, self.report_queue, self.shared_target, self.config["threads_per_process"]
+        )
+        self.released_at = time.time()
+    
+    def _start_pool(self, params):
+        """预热模式: 复用进程池，所有进程在起跑屏障上同时开始"""
+        from .pool import WorkerPool
+        
+        size = self.config["cpu_threads"]
+        if self.pool and (self.pool.size != size or not self.pool.healthy()):
+            self.pool.close()
+            self.pool = None
+        if self.pool is None:
+            self.pool = WorkerPool(size, self.stop_event, self.report_queue, self.shared_target)
+        self.released_at = self.pool.run(params)
+    
+    def warm_up(self, workers=None):
+        """预先创建进程池，返回创建耗时 (秒)"""
+        if workers is not None:
+            self.config["cpu_threads"] = int(workers)
+        size = self.config["cpu_threads"]
+        if self.report_queue is None:
+            self.report_queue = multiprocessing.SimpleQueue()
+        if self.pool and self.pool.size == size and self.pool.healthy():
+            return 0.0
+        from .pool import WorkerPool
+        
+        if self.pool:
+            self.pool.close()
+        self.pool = WorkerPool(size, self.stop_event, self.report_queue, self.shared_target)
+        return self.pool.spawn_time
+    
+    def watch(self, callback):
+        """启动监视线程，所有工作进程结束时在该线程中调用 callback()
+
+        监视线程阻塞在进程 sentinel (进程池模式下为完成管道) 上，进程结束后立即通知，
+        调用方收到通知后再调用 wait() 完成收尾。stop() 会取消监视。
+        """
+        if not self.running:
+            raise RuntimeError("压力测试未在运行")
+        if self.watcher:
+            self.watcher.cancel()
+        if self.config["use_pool"] and self.pool:
+            waitables = self.pool.waitables
+        else:
+            waitables = sentinel_waitables(self.processes)
+        self.watcher = CompletionWatcher(waitables, callback)
+        self.watcher.start()
+        return self.watcher
+    
+    def set_profile(self, profile, restart=True):
+        """运行中切换负载曲线，不重启工作进程"""
+        if not self.running:
+            raise RuntimeError("压力测试未在运行")
+        self.profile = parse_profile(profile)
+        if self.scheduler:
+            self.scheduler.set_profile(self.profile, restart)
+        else:
+            self.scheduler = ProfileScheduler(self.profile, self.shared_target)
+            self.scheduler.start()
+    
+    def set_target(self, target):
+        """运行中把目标占用率改为固定值"""
+        self.set_profile(f"constant:{target}")
+    
+    def current_target(self):
+        """当前目标占用率"""
+        return self.shared_target.value
+    
+    def record_sample(self, sample=None):
+        """把采样线程的样本与当前吞吐量合成同一时间点的遥测记录
+
+        记录送入降频检测与 cgroup 节流检测并写入运行历史 (如已启用)，返回本次产生的事件列表。
+        """
+        if not self.running:
+            return []
+        sample = sample or {}
+        total, per_worker = self.throughput()
+        row = {
+            "time": sample.get("time", time.time()),
+            "cpu": sample.get("cpu"),
+            "target": self.current_target(),
+            "achieved": self.achieved_usage(),
+            "ops_per_sec": total if per_worker else None,
+            "worker_ops": list(per_worker.values()) if per_worker else None,
+            "freq_mhz": sample.get("freq_mhz"),
+            "temp_c": sample.get("temp_c"),
+            "throttle_core": sample.get("throttle_core"),
+            "throttle_package": sample.get("throttle_package"),
+            "worker_memory": self.update_memory(),
+            "cgroup_usage": sample.get("cgroup_usage"),
+            "cgroup_throttled": sample.get("cgroup_throttled"),
+            "cgroup_throttled_seconds": sample.get("cgroup_throttled_seconds"),
+        }
+        events = [self.throttle_detector.update(row), self.cgroup_detector.update(row)]
+        if self.recorder:
+            self.recorder.add(row)
+        return [event for event in events if event]
+    
+    def update_memory(self):
+        """重新统计工作单元的内存占用 (字节)，同时更新峰值；预热进程池模式下统计池中进程
+
+        线程模式下 current 为相对启动前基线的增量，process_peak 记录整个进程的峰值。
+        """
+        if not self.running:
+            return self.memory["current"]
+        if self.config["use_pool"] and self.pool:
+            pids = [p.pid for p, _ in self.pool.workers]
+        else:
+            pids = footprint_pids(self.config["executor"], self.processes)
+        total = memory_footprint(pids)
+        if total is None:
+            return None
+        current = max(total - self.memory_baseline, 0)
+        self.memory["current"] = current
+        self.memory["peak"] = max(self.memory["peak"] or 0, current)
+        self.memory["process_peak"] = max(self.memory["process_peak"] or 0, total)
+        return current
+    
+    def list_runs(self, limit=50):
+        """最近的运行记录"""
+        return self.history.list_runs(limit) if self.history else []
+    
+    def load_run(self, run_id):
+        """读取一次运行的完整记录和时间序列"""
+        return self.history.load_run(run_id) if self.history else None
+    
+    def compare_runs(self, run_ids):
+        """对比多次运行的得分与占用率"""
+        if not self.history:
+            raise RuntimeError("未启用运行历史")
+        return self.history.compare_runs(run_ids)
+    
+    def describe_placement(self):
+        """本次运行的绑核说明"""
+        return describe_placement(self.placement)
+    
+    def close(self):
+        """停止运行，关闭进程池并释放实时记录的共享内存"""
+        if self.running:
+            self.stop()
+        if self.pool:
+            self.pool.close()
+            self.pool = None
+        if self.live:
+            # 未退出的工作线程各自映射着这块内存，close() 只解除本端映射并删除名称，
+            # 它们之后的写入落在自己的映射里，不会影响 live_final
+            self.live_final = self.live_stats()
+            self.live.close()
+            self.live = None
+    
+    def is_running(self):
+        """是否还有工作进程在运行"""
+        if not self.running:
+            return False
+        if self.config["use_pool"] and self.pool:
+            return self.pool.poll() > 0
+        return any(p.is_alive() for p in self.processes)
+    
+    def live_stats(self):
+        """本次运行各工作单元在共享内存中的实时记录 {worker_id: record}，读取不经过队列和 pickle
+
+        运行结束后 (包括 close() 之后) 保留最后写入的记录，直到下一次运行开始。
+        """
+        if self.live is None:
+            return dict(self.live_final)
+        return self.live.snapshot(self.config["cpu_threads"])
+    
+    def stalled_workers(self, timeout=STALL_TIMEOUT):
+        """仍处于运行状态但超过 timeout 秒没有更新心跳的工作单元编号"""
+        now = time.time()
+        return [worker_id for worker_id, record in self.live_stats().items()
+                if record["state"] == "running" and now - record["heartbeat"] > timeout]
+    
+    def poll_stats(self):
+        """读取工作进程上报的状态，返回 {worker_id: stats}"""
+        if self.report_queue is None:
+            return self.worker_stats
+        # SimpleQueue 没有后台写线程，进程发出 done 之前上报数据已写入管道
+        try:
+            while not self.report_queue.empty():
+                stats = self.report_queue.get()
+                self.worker_stats[stats["worker"]] = stats
+        except (OSError, EOFError):
+            pass
+        return self.worker_stats
+    
+    def poll(self):
+        """检查运行状态，所有进程结束时返回 True"""
+        self.poll_stats()
+        if self.running and not self.is_running():
+            self._finish("completed")
+            return True
+        return not self.running
+    
+    def wait(self, timeout=None):
+        """等待所有工作进程结束，超时返回 False"""
+        deadline = None if timeout is None else time.time() + timeout
+        while self.running:
+            # 持续读取上报队列，避免队列写满导致工作进程无法退出
+            if self.poll():
+                return True
+            if deadline is not None and time.time() >= deadline:
+                return False
+            if self.pool and self.config["use_pool"]:
+                self.pool.wait_idle(0.1)
+            else:
+                multiprocessing.connection.wait([p.sentinel for p in self.processes], 0.1)
+        return True
+    
+    def stop(self, reason="stopped", timeout=STOP_TIMEOUT):
+        """停止压力测试，返回被停止的进程数
+
+        先设置 stop_event 让工作进程自行退出，超过 timeout 仍未退出的进程
+        依次 terminate、kill。每个进程的停止耗时与方式记录在 stop_latency 中。
+        """
+        self._cancel_watch()
+        # 先记下仍在运行的进程再通知退出，收到通知后立即退出的进程也计入停止数与 stop_latency
+        use_pool = self.pool and self.config["use_pool"]
+        if use_pool:
+            with self.pool.lock:
+                self.pool.poll()
+                pending = set(self.pool.busy)
+        else:
+            pending = {p.sentinel: (p.worker_ids, p) for p in self.processes if p.is_alive()}
+        stopped = len(pending)
+        requested = time.perf_counter()
+        self.stop_event.set()
+        if use_pool:
+            self._stop_pool(pending, requested, timeout)
+        else:
+            self._stop_processes(pending, requested, timeout)
+        self._finish(reason)
+        return stopped
+    
+    def _stop_processes(self, pending, requested, timeout):
+        """冷启动模式: 等待 pending 中的进程退出，超时后逐级强制结束"""
+        self._reap(pending, requested, requested + timeout, "graceful")
+        for method in ("terminate", "kill"):
+            if not pending:
+                break
+            for worker_ids, p in pending.values():
+                getattr(p, method)()
+            self._reap(pending, requested, time.perf_counter() + KILL_TIMEOUT, method)
+    
+    def _reap(self, pending, requested, deadline, method):
+        """等待 pending 中的进程结束并记录停止耗时"""
+        while pending:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                return
+            # 等待期间持续读取上报队列，避免最后一次上报写满管道阻塞进程退出
+            for sentinel in multiprocessing.connection.wait(list(pending), min(remaining, 0.05)):
+                worker_ids, p = pending.pop(sentinel)
+                p.join()
+                for worker_id in worker_ids:
+                    self.stop_latency[worker_id] = {
+                        "latency": round(time.perf_counter() - requested, 4), "method": method
+                    }
+            self.poll_stats()
+    
+    def _stop_pool(self, busy, requested, timeout):
+        """进程池模式: 等待 busy 中的进程回到空闲状态，超时未回来的整池关闭重建"""
+        deadline = requested + timeout
+        while not self.pool.wait_idle(min(0.05, max(deadline - time.perf_counter(), 0))):
+            self.poll_stats()
+            if time.perf_counter() >= deadline:
+                break
+        for worker_id in sorted(busy):
+            if worker_id in self.pool.finished_at:
+                self.stop_latency[worker_id] = {
+                    "latency": round(max(self.pool.finished_at[worker_id] - requested, 0.0), 4),
+                    "method": "graceful"
+                }
+        if self.pool.busy:
+            stragglers = set(self.pool.busy)
+            self.pool.close(KILL_TIMEOUT)
+            self.pool = None
+            for worker_id in stragglers:
+                self.stop_latency[worker_id] = {
+                    "latency": round(time.perf_counter() - requested, 4), "method": "terminate"
+                }
+    
+    def _cancel_watch(self):
+        if self.watcher:
+            self.watcher.cancel()
+            self.watcher = None
+    
+    def _finish(self, reason):
+        """记录运行结束信息"""
+        self.poll_stats()
+        first = self.end_time is None and self.start_time is not None
+        if first:
+            self.end_time = time.time()
+            self.stop_reason = reason
+        self.lingering += [p for p in self.processes if isinstance(p, threading.Thread) and p.is_alive()]
+        self.processes = []
+        self.running = False
+        self.watcher = None
+        if self.scheduler:
+            self.scheduler.stop()
+            self.scheduler = None
+        if self.latency_probe:
+            self.latency_probe.stop()
+        if first:
+            self._save_history()
+    
+    def _save_history(self):
+        """写入剩余的遥测样本和运行结果"""
+        if not self.recorder:
+            return
+        try:
+            self.recorder.flush()
+            self.history.end_run(self.run_id, self.summary())
+        finally:
+            self.recorder = None
+    
+    def summary(self):
+        """返回最近一次运行的摘要"""
+        elapsed = 0.0
+        if self.start_time is not None:
+            elapsed = (self.end_time or time.time()) - self.start_time
+        return {
+            "run_id": self.run_id,
+            "workers": self.config["cpu_threads"],
+            "max_cpu_usage": self.config["max_cpu_usage"],
+            "stress_speed": self.config["stress_speed"],
+            "kernel": self.config["kernel"],
+            "duration": self.duration,
+            "elapsed": round(elapsed, 3),
+            "start_time": self.start_time,
+            "end_time": self.end_time,
+            "stop_reason": self.stop_reason,
+            "tolerance": self.config["tolerance"],
+            "achieved": self.achieved_usage(),
+            "total_iterations": sum(s["iterations"] for s in self.live_stats().values()),
+            "score": self.score(),
+            "use_pool": self.config["use_pool"],
+            "executor": self.config["executor"],
+            "threads_per_process": self.config["threads_per_process"] if self.config["executor"] == "hybrid" else None,
+            "gil": gil_enabled(),
+            "memory": self.memory_summary(),
+            "profile": self.profile.spec() if self.profile else None,
+            "placement_policy": self.config["placement"],
+            "placement": self.placement,
+            "start_latency": self.start_latency(),
+            "throttle_events": list(self.throttle_detector.events),
+            "cgroup": self.cgroup_summary(),
+            "latency": self.latency_probe.summary() if self.latency_probe else None,
+            "stop_latency": [dict(worker=k, **v) for k, v in sorted(self.stop_latency.items())],
+            "workers_detail": [self.worker_stats[k] for k in sorted(self.worker_stats)],
+            "profile_files": [s["profile_file"] for _, s in sorted(self.worker_stats.items()) if s.get("profile_file")],
+        }
+    
+    def memory_summary(self):
+        """工作单元内存占用的峰值与平均每个工作单元的占用 (字节)
+
+        线程模式下两者是相对启动前基线的增量，process_bytes 为整个进程的峰值，其他模式为 None。
+        """
+        if self.memory["peak"] is None:
+            return None
+        workers = max(self.config["cpu_threads"], 1)
+        return {
+            "peak_bytes": self.memory["peak"],
+            "per_worker_bytes": self.memory["peak"] // workers,
+            "process_bytes": self.memory["process_peak"] if self.config["executor"] == "thread" else None,
+        }
+    
+    def cgroup_summary(self):
+        """cgroup 限制与运行期间的配额占用和节流统计，不在 cgroup 中时返回 None"""
+        if not self.cgroup.available:
+            return None
+        info = {"version": self.cgroup.version, "quota": self.cgroup.quota, "usable_cpus": usable_cpus(self.cgroup)}
+        info.update(self.cgroup_detector.totals() or {})
+        return info
+    
+    def start_latency(self):
+        """从请求启动到最后一个进程开始加压的时间，以及各进程起跑时间差 (秒)"""
+        started = [s["started_at"] for s in self.live_stats().values()]
+        if not started or self.start_requested is None:
+            return None
+        return {
+            "latency": round(max(started) - self.start_requested, 4),
+            "skew": round(max(started) - min(started), 4),
+        }
+    
+    def throughput(self):
+        """最近一个上报周期的吞吐量，返回 (总 ops/s, {worker_id: ops/s})"""
+        per_worker = {k: s["ops_per_sec"] for k, s in sorted(self.live_stats().items())}
+        return round(sum(per_worker.values()), 2), per_worker
+    
+    def score(self):
+        """基准得分: 各工作进程整个运行期间平均 ops/s 之和"""
+        return round(sum(s["mean_ops_per_sec"] for s in self.live_stats().values()), 2)
+    
+    def achieved_usage(self):
+        """所有工作进程实际占用率的平均值，还没有测量值的工作单元不计入"""
+        values = [s["achieved"] for s in self.live_stats().values() if s["achieved"] is not None]
+        if not values:
+            return None
+        return round(sum(values) / len(values), 2)
+
+
+def summary_lines(summary):
+    """把运行摘要格式化为日志文本行"""
+    if summary["achieved"] is None:
+        return []
+    target = summary["profile"] or f"{summary['max_cpu_usage']}%"
+    lines = [
+        f"• 平均实际占用: {summary['achieved']:.1f}% (目标 {target})",
+        f"• 吞吐量得分: {summary['score']:.1f} ops/s (共 {summary['total_iterations']} 次迭代)",
+    ]
+    if summary.get("throttle_events"):
+        starts = sum(1 for e in summary["throttle_events"] if e["type"] == "throttle_start")
+        lines.append(f"• 降频事件: {starts} 次")
+    cgroup = summary.get("cgroup")
+    if cgroup and (cgroup["quota"] or cgroup.get("throttled")):
+        quota = f"{cgroup['quota']:g} CPU" if cgroup["quota"] else "不限"
+        usage = f"，配额占用 {cgroup['usage']:.1f}%" if cgroup.get("usage") is not None else ""
+        throttled = ""
+        if cgroup.get("throttled"):
+            throttled = f"，被节流 {cgroup['throttled']} 次"
+            if cgroup.get("throttled_seconds") is not None:
+                throttled += f" ({cgroup['throttled_seconds']:.2f} 秒)"
+        lines.append(f"• cgroup 配额: {quota}{usage}{throttled}")
+    executor = summary.get("executor") or DEFAULT_EXECUTOR
+    if executor != DEFAULT_EXECUTOR or summary.get("memory"):
+        mode = executor + (f" ({summary['threads_per_process']} 线程/进程)" if summary.get("threads_per_process") else "")
+        memory = ""
+        if summary.get("memory"):
+            usage = summary["memory"]
+            if usage.get("process_bytes") is not None:
+                memory = (f"，内存增量峰值 {format_size(usage['peak_bytes'])}"
+                          f" (每单元 {format_size(usage['per_worker_bytes'])})，整个进程 {format_size(usage['process_bytes'])}")
+            else:
+                memory = (f"，内存峰值 {format_size(usage['peak_bytes'])}"
+                          f" (每单元 {format_size(usage['per_worker_bytes'])})")
+        lines.append(f"• 执行方式: {mode}{memory}")
+    if summary.get("latency"):
+        lines.append(f"• {describe_latency(summary['latency'])}")
+    if summary["start_latency"]:
+        lines.append(f"• 起跑延迟: {summary['start_latency']['latency'] * 1000:.1f}ms"
+                     f" (进程间偏差 {summary['start_latency']['skew'] * 1000:.1f}ms)")
+    stop_latency = {s["worker"]: s for s in summary.get("stop_latency") or []}
+    if stop_latency:
+        forced = sum(1 for s in stop_latency.values() if s["method"] != "graceful")
+        slowest = max(s["latency"] for s in stop_latency.values())
+        lines.append(f"• 停止耗时: 最长 {slowest * 1000:.1f}ms" + (f" (强制结束 {forced} 个进程)" if forced else ""))
+    if summary.get("profile_files"):
+        directory = os.path.dirname(summary["profile_files"][0])
+        lines.append(f"• 性能剖析: {len(summary['profile_files'])} 个文件写入 {directory} (python -m pstats 查看)")
+    for stats in summary["workers_detail"]:
+        mark = "✓" if stats["within_tolerance"] else "✗"
+        cpu = f" [CPU {stats['cpu']}]" if stats.get("cpu") is not None else ""
+        memory = ""
+        if "ns_per_access" in stats:
+            memory = f"  {stats['gb_per_sec']:.2f} GB/s  {stats['ns_per_access']:.1f} ns/访问"
+        stop = ""
+        if stats["worker"] in stop_latency:
+            latency = stop_latency[stats["worker"]]
+            stop = f"  停止 {latency['latency'] * 1000:.1f}ms"
+            if latency["method"] != "graceful":
+                stop += f" ({latency['method']})"
+        lines.append(f"  - 进程 {stats['worker']}{cpu}: 实际 {stats['achieved']:.1f}%  误差 {stats['error']:+.1f}  {mark}"
+                     f"  {stats['mean_ops_per_sec']:.1f} ops/s{memory}{stop}")
+        if stats.get("time_breakdown"):
+            lines.append(f"      {describe_breakdown(stats['time_breakdown'], stats['elapsed'])}")
+    return lines
+
+
+def describe_breakdown(breakdown, elapsed):
+    """工作单元时间分解的说明文字 (各部分占运行时长的百分比)"""
+    if not elapsed:
+        return ""
+    parts = [
+        f"计算 {breakdown['busy'] / elapsed * 100:.1f}%",
+        f"调度等待 {breakdown['involuntary_wait'] / elapsed * 100:.1f}%",
+        f"休眠 {breakdown['sleep'] / elapsed * 100:.1f}%",
+        f"开销 {breakdown['overhead'] / elapsed * 100:.1f}%",
+    ]
+    if "voluntary_switches" in breakdown:
+        parts.append(f"上下文切换 自愿 {breakdown['voluntary_switches']} / 非自愿 {breakdown['involuntary_switches']}")
+    return "  ".join(parts)
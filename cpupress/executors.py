@@ -0,0 +1,163 @@
+"""工作单元的执行方式: 进程、线程或 进程×线程 混合
+
+- process: 每个工作单元一个进程 (默认)，纯 Python 内核也能跑满所有核心;
+- thread: 所有工作单元都是主进程中的线程，几乎不占额外内存、启动接近瞬时，
+  适合释放 GIL 的内核 (hash、zlib、numpy_matmul) 和自由线程 (free-threaded) 版本的 CPython;
+- hybrid: 若干进程，每个进程内运行 threads_per_process 个线程。
+
+三种方式共用 stop_event、上报队列与共享目标值。线程句柄提供与 multiprocessing.Process
+相同的 is_alive()/join()/sentinel 接口，引擎按同一套流程等待和停止。
+线程无法被强制结束，terminate()/kill() 对线程句柄不起作用，只能等它在下一个控制周期检查 stop_event 后退出。
+"""
+
+import multiprocessing
+import multiprocessing.connection
+import os
+import signal
+import sys
+import threading
+
+EXECUTORS = {
+    "process": "每个工作单元一个进程",
+    "thread": "主进程内的线程 (适合释放GIL的内核与自由线程版 Python)",
+    "hybrid": "多个进程 × 每进程多个线程",
+}
+
+DEFAULT_EXECUTOR = "process"
+DEFAULT_THREADS_PER_PROCESS = 4
+
+
+def gil_enabled():
+    """当前解释器是否带有 GIL (自由线程版 CPython 3.13+ 返回 False)"""
+    check = getattr(sys, "_is_gil_enabled", None)
+    return True if check is None else check()
+
+
+class WorkerThread(threading.Thread):
+    """以线程运行的工作单元，接口与 multiprocessing.Process 一致
+
+    sentinel 是一个管道读端，线程退出时关闭写端使其可读，
+    因此可以和进程 sentinel 一起交给 multiprocessing.connection.wait()。
+    """
+    
+    def __init__(self, target, args, name=None):
+        super().__init__(name=name, daemon=True)
+        self._work = target
+        self._work_args = args
+        self.sentinel, self._done = multiprocessing.Pipe(duplex=False)
+        self.exitcode = None
+    
+    def run(self):
+        try:
+            self._work(*self._work_args)
+            self.exitcode = 0
+        except BaseException:
+            self.exitcode = 1
+            raise
+        finally:
+            self._done.close()
+    
+    def terminate(self):
+        # 线程无法从外部结束
+        pass
+    
+    kill = terminate
+
+
+def hybrid_worker(target, worker_ids, params, stop_event, report_queue, shared_target):
+    """混合模式的子进程: 为每个工作单元启动一个线程并等待全部结束"""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    threads = [
+        threading.Thread(target=target, args=(worker_id, params, stop_event, report_queue, shared_target), daemon=True)
+        for worker_id in worker_ids
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def executor_warning(executor, kernel):
+    """线程执行方式下内核会被 GIL 串行化时返回提示文字，否则返回 None"""
+    from .kernels import GIL_RELEASING
+    
+    if executor == "process" or kernel in GIL_RELEASING or not gil_enabled():
+        return None
+    return f"{kernel} 内核计算期间持有 GIL，{executor} 执行方式下同一进程内的线程只能轮流运行，无法跑满多个核心"
+
+
+def validate_executor(executor, threads_per_process=DEFAULT_THREADS_PER_PROCESS, use_pool=False):
+    """检查执行方式参数，不合法时抛出 ValueError"""
+    if executor not in EXECUTORS:
+        raise ValueError(f"未知的执行方式: {executor} (可选: {', '.join(EXECUTORS)})")
+    if executor == "hybrid" and int(threads_per_process) < 1:
+        raise ValueError("每进程线程数必须大于0")
+    if executor != "process" and use_pool:
+        raise ValueError("预热进程池只支持 process 执行方式")
+
+
+def spawn_workers(target, executor, count, params, stop_event, report_queue, shared_target,
+                  threads_per_process=DEFAULT_THREADS_PER_PROCESS):
+    """按执行方式启动 count 个工作单元，返回句柄列表
+
+    每个句柄带有 worker_ids 属性，记录其中运行的工作单元编号 (混合模式下一个进程对应多个)。
+    """
+    handles = []
+    if executor == "thread":
+        for worker_id in range(count):
+            handle = WorkerThread(target, (worker_id, params, stop_event, report_queue, shared_target),
+                                  name=f"stress-worker-{worker_id}")
+            handle.worker_ids = [worker_id]
+            handles.append(handle)
+    elif executor == "hybrid":
+        size = int(threads_per_process)
+        for first in range(0, count, size):
+            worker_ids = list(range(first, min(first + size, count)))
+            handle = multiprocessing.Process(
+                target=hybrid_worker,
+                args=(target, worker_ids, params, stop_event, report_queue, shared_target),
+                daemon=True
+            )
+            handle.worker_ids = worker_ids
+            handles.append(handle)
+    else:
+        for worker_id in range(count):
+            handle = multiprocessing.Process(
+                target=target,
+                args=(worker_id, params, stop_event, report_queue, shared_target),
+                daemon=True
+            )
+            handle.worker_ids = [worker_id]
+            handles.append(handle)
+    for handle in handles:
+        handle.start()
+    return handles
+
+
+def memory_footprint(pids):
+    """进程的独占内存 (USS，取不到时用 RSS) 之和，单位字节；缺少 psutil 时返回 None
+
+    线程模式下统计的是整个主进程，调用方用线程启动前的基线求出工作线程带来的增量。
+    """
+    try:
+        import psutil
+    except ImportError:
+        return None
+    total = 0
+    for pid in pids:
+        try:
+            process = psutil.Process(pid)
+            try:
+                total += process.memory_full_info().uss
+            except (psutil.AccessDenied, AttributeError):
+                total += process.memory_info().rss
+        except psutil.Error:
+            continue
+    return total
+
+
+def footprint_pids(executor, handles):
+    """计算内存占用时需要统计的进程"""
+    if executor == "thread":
+        return [os.getpid()]
+    return [handle.pid for handle in handles if handle.pid is not None]
@@ -0,0 +1,202 @@
+"""OpenMetrics / Prometheus 指标端点
+
+指标全部取自采样线程最近一次的样本 (sampler.latest) 和引擎已收到的工作进程上报，
+抓取时不调用 psutil，也不读取上报队列，1 秒一次的抓取几乎没有开销:
+
+    exporter = MetricsExporter(engine, sampler, port=9464)
+    exporter.start()
+    ...
+    exporter.stop()
+"""
+
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .latency import COUNT, TOTAL
+
+DEFAULT_METRICS_PORT = 9464
+
+OPENMETRICS_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+PROMETHEUS_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+class _Family:
+    """一个指标族: HELP/TYPE 与其样本"""
+    
+    def __init__(self, name, kind, help_text):
+        self.name = name
+        self.kind = kind
+        self.help_text = help_text
+        self.samples = []
+    
+    def add(self, value, labels=None, suffix=""):
+        if value is not None:
+            self.samples.append((suffix, labels, value))
+        return self
+    
+    def render(self, openmetrics):
+        # Prometheus 文本格式没有 info 类型，退化为 gauge，HELP/TYPE 使用样本的完整名称 (带 _info)；
+        # counter 的 TYPE 名称需要带 _total
+        kind = self.kind if openmetrics or self.kind != "info" else "gauge"
+        name = self.name
+        if not openmetrics and kind == "counter":
+            name += "_total"
+        elif not openmetrics and self.kind == "info" and self.samples:
+            name += self.samples[0][0]
+        lines = [f"# HELP {name} {self.help_text}", f"# TYPE {name} {kind}"]
+        for suffix, labels, value in self.samples:
+            lines.append(f"{self.name}{suffix}{_labels(labels)} {float(value)!r}")
+        return lines
+
+
+def collect_metrics(engine, sampler=None):
+    """根据引擎状态与最近一次采样生成指标族列表"""
+    sample = sampler.latest if sampler is not None else None
+    stats = engine.live_stats() if engine.running else {}
+    families = []
+    
+    running = _Family("cpupress_running", "gauge", "压力测试是否正在运行")
+    families.append(running.add(1 if engine.running else 0))
+    families.append(_Family("cpupress_workers", "gauge", "正在上报的工作进程数").add(len(stats)))
+    if engine.running:
+        families.append(_Family("cpupress_target_percent", "gauge", "目标CPU占用率").add(engine.current_target()))
+        families.append(_Family("cpupress_achieved_percent", "gauge", "工作进程实际占用率的平均值").add(engine.achieved_usage()))
+        info = _Family("cpupress_run", "info", "当前运行的配置")
+        families.append(info.add(1, {
+            "run_id": engine.run_id or "",
+            "kernel": engine.config["kernel"],
+            "profile": engine.profile.spec() if engine.profile else f"constant:{engine.config['max_cpu_usage']}",
+        }, "_info"))
+    
+    if sample:
+        families.append(_Family("cpupress_cpu_usage_percent", "gauge", "全部逻辑CPU的平均占用率").add(sample["cpu"]))
+        per_core = _Family("cpupress_core_usage_percent", "gauge", "各逻辑CPU的占用率")
+        for cpu, value in enumerate(sample["percpu"]):
+            per_core.add(value, {"cpu": cpu})
+        families.append(per_core)
+        families.append(_Family("cpupress_sample_timestamp_seconds", "gauge", "最近一次采样的时间").add(sample["time"]))
+        if sample.get("freq_mhz") is not None:
+            families.append(_Family("cpupress_cpu_frequency_mhz", "gauge", "平均CPU频率").add(sample["freq_mhz"]))
+        if sample.get("temp_c") is not None:
+            families.append(_Family("cpupress_cpu_temperature_celsius", "gauge", "CPU温度").add(sample["temp_c"]))
+        if sample.get("cgroup_usage") is not None:
+            families.append(_Family("cpupress_cgroup_usage_percent", "gauge", "cgroup 相对CPU配额的占用率").add(sample["cgroup_usage"]))
+        if sample.get("cgroup_throttled") is not None:
+            throttled = _Family("cpupress_cgroup_throttled_periods", "counter", "cgroup 被配额节流的调度周期数")
+            families.append(throttled.add(sample["cgroup_throttled"], suffix="_total"))
+    
+    probe = engine.latency_probe
+    if probe is not None and probe.running:
+        histogram = probe.histogram
+        count, total = histogram.totals[COUNT], histogram.totals[TOTAL]
+        if count:
+            wakeup = _Family("cpupress_wakeup_latency_seconds", "summary", "调度延迟探测的唤醒延迟")
+            for percentile, value in histogram.percentiles((50.0, 99.0, 99.9)).items():
+                wakeup.add(value / 1e9, {"quantile": f"{percentile / 100:g}"})
+            wakeup.add(total / 1e9, suffix="_sum")
+            families.append(wakeup.add(count, suffix="_count"))
+    
+    if stats:
+        ops = _Family("cpupress_worker_ops_per_second", "gauge", "各工作进程最近一个上报周期的吞吐量")
+        achieved = _Family("cpupress_worker_achieved_percent", "gauge", "各工作进程的实际占用率")
+        iterations = _Family("cpupress_worker_iterations", "counter", "各工作进程本次运行完成的内核迭代次数")
+        heartbeat = _Family("cpupress_worker_heartbeat_age_seconds", "gauge", "各工作进程距上一次更新实时记录的时间")
+        now = time.time()
+        for worker_id in sorted(stats):
+            worker = stats[worker_id]
+            labels = {"worker": worker_id}
+            # 实际绑定的CPU只在上报队列的详细状态中
+            cpu = engine.worker_stats.get(worker_id, {}).get("cpu")
+            if cpu is not None:
+                labels["cpu"] = cpu
+            ops.add(worker["ops_per_sec"], labels)
+            achieved.add(worker["achieved"], labels)
+            iterations.add(worker["iterations"], labels, "_total")
+            heartbeat.add(round(max(now - worker["heartbeat"], 0.0), 3), labels)
+        families += [ops, achieved, iterations, heartbeat]
+        families.append(_Family("cpupress_workers_stalled", "gauge", "超过一定时间没有更新心跳的工作进程数").add(
+            len(engine.stalled_workers())
+        ))
+    return families
+
+
+def render_metrics(engine, sampler=None, openmetrics=True):
+    """生成指标文本"""
+    lines = []
+    for family in collect_metrics(engine, sampler):
+        lines += family.render(openmetrics)
+    if openmetrics:
+        lines.append("# EOF")
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        exporter = self.server.exporter
+        openmetrics = "application/openmetrics-text" in self.headers.get("Accept", "")
+        # 生成指标期间持有锁，stop() 释放引擎引用前会等待正在进行的抓取
+        with exporter.lock:
+            if exporter.engine is None:
+                self.send_error(503)
+                return
+            body = render_metrics(exporter.engine, exporter.sampler, openmetrics).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", OPENMETRICS_TYPE if openmetrics else PROMETHEUS_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, format, *args):
+        # 抓取请求不写入日志
+        pass
+
+
+class MetricsExporter:
+    """在后台线程中提供 /metrics 端点"""
+    
+    def __init__(self, engine, sampler=None, host="127.0.0.1", port=DEFAULT_METRICS_PORT):
+        self.engine = engine
+        self.sampler = sampler
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), _MetricsHandler)
+        self.server.daemon_threads = True
+        self.server.exporter = self
+        self.address = self.server.server_address
+        self._thread = None
+    
+    @property
+    def url(self):
+        return f"http://{self.address[0]}:{self.address[1]}/metrics"
+    
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, name="metrics-exporter", daemon=True)
+        self._thread.start()
+        return self
+    
+    def stop(self):
+        """停止端点: 先停止接受新的抓取，等正在生成的指标完成后再释放引擎引用
+
+        应在关闭引擎与采样线程之前调用。
+        """
+        if self._thread:
+            self.server.shutdown()
+            self._thread.join(1.0)
+            self._thread = None
+        self.server.server_close()
+        with self.lock:
+            self.engine = None
+            self.sampler = None
@@ -0,0 +1,253 @@
+"""运行历史: 把每次运行的配置、结果和遥测时间序列保存到本地 SQLite 数据库"""
+
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+
+from .paths import data_dir
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    host TEXT,
+    started REAL NOT NULL,
+    ended REAL,
+    stop_reason TEXT,
+    kernel TEXT,
+    workers INTEGER,
+    profile TEXT,
+    score REAL,
+    achieved REAL,
+    config TEXT,
+    summary TEXT
+);
+CREATE TABLE IF NOT EXISTS samples (
+    run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    time REAL NOT NULL,
+    cpu REAL,
+    target REAL,
+    achieved REAL,
+    ops_per_sec REAL,
+    freq_mhz REAL,
+    temp_c REAL,
+    throttle_core INTEGER,
+    throttle_package INTEGER,
+    worker_ops TEXT,
+    cgroup_usage REAL,
+    cgroup_throttled INTEGER
+);
+CREATE INDEX IF NOT EXISTS samples_run ON samples(run_id, time);
+"""
+
+# 遥测样本的列 (worker_ops 为各工作进程 ops/s 的 JSON 数组)
+SAMPLE_COLUMNS = (
+    "time", "cpu", "target", "achieved", "ops_per_sec",
+    "freq_mhz", "temp_c", "throttle_core", "throttle_package", "worker_ops",
+    "cgroup_usage", "cgroup_throttled",
+)
+
+# 旧版本数据库缺少的列: 列名 -> 类型
+ADDED_COLUMNS = {
+    "freq_mhz": "REAL",
+    "temp_c": "REAL",
+    "throttle_core": "INTEGER",
+    "throttle_package": "INTEGER",
+    "worker_ops": "TEXT",
+    "cgroup_usage": "REAL",
+    "cgroup_throttled": "INTEGER",
+}
+
+
+def default_history_file():
+    return os.path.join(data_dir(), "history.sqlite3")
+
+
+class RunHistory:
+    """运行历史数据库
+
+        history = RunHistory()
+        run_id = history.begin_run(config)
+        history.append_samples(run_id, [{"time": ..., "cpu": ...}, ...])
+        history.end_run(run_id, summary)
+        history.list_runs()
+    """
+
+    def __init__(self, path=None):
+        self.path = path or default_history_file()
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        with self._lock, self.conn:
+            self.conn.execute("PRAGMA foreign_keys = ON")
+            self.conn.execute("PRAGMA journal_mode = WAL")
+            self.conn.executescript(SCHEMA)
+            self._migrate()
+    
+    def _migrate(self):
+        """为旧版本数据库补充新增的列"""
+        existing = {row["name"] for row in self.conn.execute("PRAGMA table_info(samples)")}
+        for name, kind in ADDED_COLUMNS.items():
+            if name not in existing:
+                self.conn.execute(f"ALTER TABLE samples ADD COLUMN {name} {kind}")
+    
+    def begin_run(self, config, started=None):
+        """登记一次新运行，返回 run_id"""
+        with self._lock, self.conn:
+            cursor = self.conn.execute(
+                "INSERT INTO runs (host, started, kernel, workers, profile, config) VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    socket.gethostname(),
+                    started or time.time(),
+                    config.get("kernel"),
+                    config.get("cpu_threads"),
+                    config.get("profile"),
+                    json.dumps(config, ensure_ascii=False, default=str),
+                )
+            )
+            return cursor.lastrowid
+    
+    def append_samples(self, run_id, samples):
+        """批量写入遥测样本 (一次事务)"""
+        if not samples:
+            return
+        rows = []
+        for sample in samples:
+            row = [run_id]
+            for column in SAMPLE_COLUMNS:
+                value = sample.get(column)
+                if column == "worker_ops" and value is not None:
+                    value = json.dumps(value)
+                row.append(value)
+            rows.append(row)
+        placeholders = ", ".join("?" * (len(SAMPLE_COLUMNS) + 1))
+        with self._lock, self.conn:
+            self.conn.executemany(
+                f"INSERT INTO samples (run_id, {', '.join(SAMPLE_COLUMNS)}) VALUES ({placeholders})", rows
+            )
+    
+    def end_run(self, run_id, summary):
+        """记录运行结果"""
+        with self._lock, self.conn:
+            self.conn.execute(
+                "UPDATE runs SET ended = ?, stop_reason = ?, score = ?, achieved = ?, summary = ? WHERE id = ?",
+                (
+                    summary.get("end_time") or time.time(),
+                    summary.get("stop_reason"),
+                    summary.get("score"),
+                    summary.get("achieved"),
+                    json.dumps(summary, ensure_ascii=False, default=str),
+                    run_id,
+                )
+            )
+    
+    def list_runs(self, limit=50):
+        """最近的运行，新的在前"""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT id, host, started, ended, stop_reason, kernel, workers, profile, score, achieved,"
+                " (SELECT COUNT(*) FROM samples WHERE run_id = runs.id) AS sample_count"
+                " FROM runs ORDER BY id DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [dict(row) for row in rows]
+    
+    def load_run(self, run_id):
+        """读取一次运行的完整记录和时间序列，不存在时返回 None"""
+        with self._lock:
+            row = self.conn.execute("SELECT * FROM runs WHERE id = ?", (run_id,)).fetchone()
+            if row is None:
+                return None
+            samples = self.conn.execute(
+                f"SELECT {', '.join(SAMPLE_COLUMNS)} FROM samples WHERE run_id = ? ORDER BY time", (run_id,)
+            ).fetchall()
+        run = dict(row)
+        run["config"] = json.loads(run["config"]) if run["config"] else {}
+        run["summary"] = json.loads(run["summary"]) if run["summary"] else {}
+        run["samples"] = [dict(sample) for sample in samples]
+        for sample in run["samples"]:
+            if sample["worker_ops"]:
+                sample["worker_ops"] = json.loads(sample["worker_ops"])
+        return run
+    
+    def delete_run(self, run_id):
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM runs WHERE id = ?", (run_id,))
+    
+    def compare_runs(self, run_ids):
+        """对比多次运行，以第一个为基准计算得分变化"""
+        runs = []
+        for run_id in run_ids:
+            run = self.load_run(run_id)
+            if run is None:
+                raise ValueError(f"运行记录 {run_id} 不存在")
+            runs.append(run)
+        
+        base_score = runs[0]["score"] if runs else None
+        result = []
+        for run in runs:
+            cpu = [s["cpu"] for s in run["samples"] if s["cpu"] is not None]
+            ops = [s["ops_per_sec"] for s in run["samples"] if s["ops_per_sec"] is not None]
+            change = None
+            if base_score and run["score"] is not None:
+                change = round((run["score"] - base_score) / base_score * 100, 2)
+            result.append({
+                "id": run["id"],
+                "host": run["host"],
+                "started": run["started"],
+                "kernel": run["kernel"],
+                "workers": run["workers"],
+                "profile": run["profile"],
+                "stop_reason": run["stop_reason"],
+                "score": run["score"],
+                "score_change": change,
+                "achieved": run["achieved"],
+                "mean_cpu": round(sum(cpu) / len(cpu), 2) if cpu else None,
+                "peak_ops_per_sec": max(ops) if ops else None,
+            })
+        return result
+    
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+
+def format_runs(runs, compare=False):
+    """把运行记录格式化为表格文本行"""
+    lines = [f"{'编号':>5}  {'开始时间':<19}  {'内核':<12}{'进程':>4}  {'结果':<10}{'得分(ops/s)':>14}{'实际占用':>9}"
+             + (f"{'得分变化':>9}" if compare else "")]
+    for run in runs:
+        started = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(run["started"]))
+        score = f"{run['score']:.1f}" if run["score"] is not None else "-"
+        achieved = f"{run['achieved']:.1f}%" if run["achieved"] is not None else "-"
+        line = (f"{run['id']:>5}  {started:<19}  {run['kernel'] or '-':<12}{run['workers'] or 0:>4}  "
+                f"{run['stop_reason'] or '运行中':<10}{score:>14}{achieved:>9}")
+        if compare:
+            change = run["score_change"]
+            line += f"{change:>+8.1f}%" if change is not None else f"{'-':>9}"
+        lines.append(line)
+    return lines
+
+
+class TelemetryRecorder:
+    """遥测样本缓冲: 攒够 batch_size 个或超过 flush_interval 秒后一次性写入数据库"""
+
+    def __init__(self, history, run_id, batch_size=50, flush_interval=5.0):
+        self.history = history
+        self.run_id = run_id
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.buffer = []
+        self.last_flush = time.monotonic()
+    
+    def add(self, sample):
+        self.buffer.append(sample)
+        if len(self.buffer) >= self.batch_size or time.monotonic() - self.last_flush >= self.flush_interval:
+            self.flush()
+    
+    def flush(self):
+        if self.buffer:
+            self.history.append_samples(self.run_id, self.buffer)
+            self.buffer = []
+        self.last_flush = time.monotonic()
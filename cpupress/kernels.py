@@ -0,0 +1,198 @@
+"""负载内核注册表
+
+每个内核是一个工厂函数 factory(params)，返回无参数的 step() 可调用对象，
+step() 执行一次迭代 (约 0.1-1ms 的计算量)。工作进程在忙碌时段内反复调用 step()。
+step 带有 accesses 与 bytes 属性时 (memory 内核)，工作进程额外上报每次访问耗时与带宽。
+"""
+
+import importlib.util
+import math
+import os
+import random
+
+from . import memory
+
+# 名称 -> (工厂函数, 说明, 依赖模块)
+KERNELS = {}
+
+# 名称 -> 参数检查函数，在父进程启动工作进程之前调用
+VALIDATORS = {}
+
+# 计算期间释放 GIL 的内核，线程执行方式下也能并行
+GIL_RELEASING = set()
+
+DEFAULT_KERNEL = "python"
+
+# start(kernel_options=...) 可以设置的内核参数，其他键不允许覆盖引擎配置
+KERNEL_OPTIONS = ("matrix_size", "buffer_size", "working_set", "memory_pattern", "memory_stride", "memory_backing")
+
+
+def register_kernel(name, description, requires=None, validate=None, releases_gil=False):
+    """注册负载内核的装饰器
+
+    validate(params) 检查内核参数，不合法时抛出 ValueError。
+    releases_gil 表示内核的主要计算在释放 GIL 的 C 代码中完成。
+    """
+    def decorator(factory):
+        KERNELS[name] = (factory, description, requires)
+        if validate:
+            VALIDATORS[name] = validate
+        if releases_gil:
+            GIL_RELEASING.add(name)
+        return factory
+    return decorator
+
+
+def kernel_available(name):
+    """内核是否存在且依赖已安装"""
+    if name not in KERNELS:
+        return False
+    requires = KERNELS[name][2]
+    return requires is None or importlib.util.find_spec(requires) is not None
+
+
+def available_kernels():
+    """返回当前环境可用的内核名称列表"""
+    return [name for name in KERNELS if kernel_available(name)]
+
+
+def describe_kernels():
+    """返回 [(名称, 说明, 是否可用)]"""
+    return [(name, KERNELS[name][1], kernel_available(name)) for name in KERNELS]
+
+
+def validate_kernel(name, params=None):
+    """检查内核名称 (以及传入的内核参数)，不可用时抛出 ValueError"""
+    if name not in KERNELS:
+        raise ValueError(f"未知的负载内核: {name} (可选: {', '.join(KERNELS)})")
+    if not kernel_available(name):
+        raise ValueError(f"负载内核 {name} 需要安装 {KERNELS[name][2]}")
+    if params is not None and name in VALIDATORS:
+        VALIDATORS[name](params)
+
+
+def make_kernel(name, params=None):
+    """创建内核的 step() 函数"""
+    validate_kernel(name)
+    return KERNELS[name][0](params or {})
+
+
+@register_kernel("python", "生成器表达式求和 (解释器调度开销)")
+def python_kernel(params):
+    def step():
+        return sum(i * i for i in range(100))
+    return step
+
+
+@register_kernel("int", "整数 ALU: 乘加、移位、异或")
+def int_kernel(params):
+    mask = (1 << 64) - 1
+    state = [random.getrandbits(64) | 1]
+    
+    def step():
+        x = state[0]
+        for _ in range(500):
+            x ^= (x << 13) & mask
+            x ^= x >> 7
+            x ^= (x << 17) & mask
+            x = (x * 0x9E3779B97F4A7C15 + 1) & mask
+        state[0] = x
+        return x
+    return step
+
+
+@register_kernel("float", "浮点: 乘加与超越函数")
+def float_kernel(params):
+    sqrt = math.sqrt
+    sin = math.sin
+    
+    def step():
+        acc = 0.0
+        x = 1.000001
+        for i in range(500):
+            x = x * 1.0000001 + 0.5
+            acc += sqrt(x) * sin(acc + i)
+        return acc
+    return step
+
+
+@register_kernel("numpy_matmul", "NumPy 矩阵乘法 (SIMD/FMA，释放GIL)", requires="numpy", releases_gil=True)
+def numpy_matmul_kernel(params):
+    # 每个工作进程只用一个 BLAS 线程，由进程数决定并行度
+    for var in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS"):
+        os.environ.setdefault(var, "1")
+    import numpy as np
+    
+    size = int(params.get("matrix_size", 128))
+    rng = np.random.default_rng()
+    a = rng.random((size, size))
+    b = rng.random((size, size))
+    out = np.empty((size, size))
+    
+    def step():
+        np.matmul(a, b, out=out)
+        return out[0, 0]
+    return step
+
+
+@register_kernel("hash", "hashlib SHA-256 (C实现，释放GIL)", releases_gil=True)
+def hash_kernel(params):
+    import hashlib
+    
+    data = os.urandom(int(params.get("buffer_size", 64 * 1024)))
+    
+    def step():
+        return hashlib.sha256(data).digest()
+    return step
+
+
+@register_kernel("zlib", "zlib 压缩 (C实现，释放GIL)", releases_gil=True)
+def zlib_kernel(params):
+    import zlib
+    
+    # 一半随机一半重复，使压缩器走完整的匹配查找路径
+    size = int(params.get("buffer_size", 64 * 1024))
+    half = size // 2
+    data = os.urandom(half) + bytes(range(256)) * ((size - half) // 256)
+    
+    def step():
+        return len(zlib.compress(data, 6))
+    return step
+
+
+@register_kernel("branch", "分支密集: 随机数据上的不可预测分支")
+def branch_kernel(params):
+    values = [random.randrange(256) for _ in range(1024)]
+    
+    def step():
+        count = 0
+        for v in values:
+            if v & 1:
+                count += 3
+            elif v & 2:
+                count -= 1
+            elif v > 128:
+                count ^= v
+            else:
+                count += v >> 4
+        return count
+    return step
+
+
+@register_kernel("memory", "内存层级: 按工作集大小顺序/跨步/随机指针追逐访问", validate=memory.validate_params)
+def memory_kernel(params):
+    working_set = memory.WorkingSet(
+        params.get("working_set", memory.DEFAULT_WORKING_SET),
+        params.get("memory_pattern", "random"),
+        params.get("memory_stride", memory.CACHE_LINE),
+        params.get("memory_backing", "heap")
+    )
+    walk = working_set.step
+    
+    def step():
+        return walk()
+    # 工作进程据此换算每次访问耗时与带宽
+    step.accesses = working_set.accesses
+    step.bytes = working_set.bytes
+    step.working_set = working_set
+    return step
@@ -0,0 +1,239 @@
+"""调度延迟探测: 与压力测试进程同时运行的 cyclictest 式唤醒延迟测量
+
+探测进程按固定周期睡眠到下一个绝对时刻，醒来后记录实际时刻与预定时刻之差，
+即该周期的唤醒延迟。延迟写入对数分桶直方图 (HDR 风格): 每个 2 的幂区间再线性分为
+SUB_BUCKETS/2 个子桶，相对误差不超过 1/(SUB_BUCKETS/2)，占用内存固定，与运行时长无关。
+
+直方图放在共享内存 (RawArray) 中，探测进程写入，主进程随时读取当前分位数。
+
+延迟包含解释器本身的唤醒开销 (通常 10-50µs)，空载时的结果可作为基线。
+"""
+
+import multiprocessing
+import os
+import signal
+import time
+
+from .topology import pin_to_cpu
+
+# 每个 2 的幂区间的子桶数的两倍 (2^6)，子桶宽度不超过值的 1/32
+SUB_BUCKET_BITS = 6
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+HALF_BUCKETS = SUB_BUCKETS // 2
+
+# 可记录的最大延迟 2^40 ns (约 18 分钟)，超过的计入最后一个桶
+MAX_MAGNITUDE = 40 - SUB_BUCKET_BITS
+BUCKET_COUNT = SUB_BUCKETS + MAX_MAGNITUDE * HALF_BUCKETS
+
+# totals 数组: 次数、总和、最小值、最大值 (ns)
+COUNT, TOTAL, MIN, MAX = range(4)
+
+DEFAULT_PERIOD_MS = 1.0
+DEFAULT_PERCENTILES = (50.0, 99.0, 99.9)
+
+# StressEngine.start(latency=...) 可以设置的探测参数
+LATENCY_OPTIONS = ("latency_probe", "latency_period", "latency_cpu", "latency_priority")
+
+
+def bucket_index(value):
+    """延迟值 (ns) 对应的桶下标"""
+    if value < SUB_BUCKETS:
+        return max(int(value), 0)
+    magnitude = min(value.bit_length() - SUB_BUCKET_BITS, MAX_MAGNITUDE)
+    sub = min(value >> magnitude, SUB_BUCKETS - 1)
+    return SUB_BUCKETS + (magnitude - 1) * HALF_BUCKETS + sub - HALF_BUCKETS
+
+
+def bucket_range(index):
+    """桶下标对应的取值区间 [low, high] (ns)"""
+    if index < SUB_BUCKETS:
+        return index, index
+    magnitude, sub = divmod(index - SUB_BUCKETS, HALF_BUCKETS)
+    magnitude += 1
+    low = (sub + HALF_BUCKETS) << magnitude
+    return low, low + (1 << magnitude) - 1
+
+
+class LatencyHistogram:
+    """固定内存的对数分桶直方图
+
+        histogram = LatencyHistogram()
+        histogram.record(12345)           # ns
+        histogram.percentile(99.9)
+
+    counts/totals 可以传入共享内存数组 (RawArray("q", BUCKET_COUNT) / RawArray("q", 4))，
+    写入方和读取方各自用同一组数组构造即可。
+    """
+    
+    def __init__(self, counts=None, totals=None):
+        self.counts = counts if counts is not None else [0] * BUCKET_COUNT
+        self.totals = totals if totals is not None else [0] * 4
+    
+    def record(self, value):
+        """记录一个延迟值 (ns)"""
+        value = max(int(value), 0)
+        self.counts[bucket_index(value)] += 1
+        totals = self.totals
+        if totals[COUNT] == 0 or value < totals[MIN]:
+            totals[MIN] = value
+        if value > totals[MAX]:
+            totals[MAX] = value
+        totals[TOTAL] += value
+        totals[COUNT] += 1
+    
+    def reset(self):
+        for i in range(BUCKET_COUNT):
+            self.counts[i] = 0
+        for i in range(4):
+            self.totals[i] = 0
+    
+    @property
+    def count(self):
+        return self.totals[COUNT]
+    
+    def percentiles(self, percentiles=DEFAULT_PERCENTILES):
+        """多个分位数 (ns)，取所在桶的上界且不超过最大值；没有数据时返回 None"""
+        counts = list(self.counts)
+        total = sum(counts)
+        if not total:
+            return {p: None for p in percentiles}
+        result = {}
+        targets = sorted(percentiles)
+        seen = 0
+        index = 0
+        for p in targets:
+            rank = max(1, -(-total * p // 100))
+            while seen + counts[index] < rank:
+                seen += counts[index]
+                index += 1
+            result[p] = min(bucket_range(index)[1], self.totals[MAX])
+        return result
+    
+    def percentile(self, p):
+        return self.percentiles((p,))[p]
+    
+    def summary(self, percentiles=DEFAULT_PERCENTILES):
+        """统计摘要，单位为微秒"""
+        count = self.count
+        if not count:
+            return {"count": 0}
+        values = self.percentiles(percentiles)
+        result = {
+            "count": count,
+            "min_us": round(self.totals[MIN] / 1000, 1),
+            "mean_us": round(self.totals[TOTAL] / count / 1000, 1),
+            "max_us": round(self.totals[MAX] / 1000, 1),
+        }
+        for p in percentiles:
+            result[f"p{p:g}_us"] = round(values[p] / 1000, 1)
+        return result
+
+
+def set_priority(priority):
+    """提高当前进程的调度优先级，返回实际生效的方式
+
+    priority 为 1-99 时尝试 SCHED_FIFO 实时优先级，没有权限时退化为 nice -10 (仍可能失败)。
+    """
+    if hasattr(os, "sched_setscheduler") and hasattr(os, "SCHED_FIFO"):
+        try:
+            os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(int(priority)))
+            return f"fifo:{int(priority)}"
+        except (OSError, ValueError):
+            pass
+    try:
+        os.nice(-10)
+        return "nice:-10"
+    except (OSError, AttributeError):
+        return "normal"
+
+
+def latency_probe_worker(period_ns, cpu, priority, stop_event, counts, totals, status):
+    """探测进程: 每 period_ns 醒来一次并记录唤醒延迟"""
+    # Ctrl+C 只由主进程处理
+    if multiprocessing.current_process().name != "MainProcess":
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+    pinned = cpu is not None and pin_to_cpu(cpu)
+    applied = set_priority(priority) if priority else "normal"
+    status.value = (f"{applied},cpu{cpu}" if pinned else applied).encode()
+    
+    histogram = LatencyHistogram(counts, totals)
+    clock = time.monotonic_ns
+    deadline = clock() + period_ns
+    while not stop_event.is_set():
+        remaining = deadline - clock()
+        if remaining > 0:
+            time.sleep(remaining / 1e9)
+        woke = clock()
+        histogram.record(woke - deadline)
+        deadline += period_ns
+        if deadline <= woke:
+            # 错过了若干个周期 (延迟超过一个周期)，从下一个未来的周期继续
+            deadline += (woke - deadline) // period_ns * period_ns + period_ns
+
+
+class LatencyProbe:
+    """在独立进程中运行的唤醒延迟探测
+
+        probe = LatencyProbe(period_ms=1.0, cpu=3, priority=50)
+        probe.start()
+        ...
+        probe.stop()
+        probe.summary()   # {"count", "p50_us", "p99_us", "p99.9_us", "max_us", ...}
+    """
+    
+    def __init__(self, period_ms=DEFAULT_PERIOD_MS, cpu=None, priority=None):
+        if period_ms <= 0:
+            raise ValueError("探测周期必须大于0")
+        self.period_ms = float(period_ms)
+        self.cpu = cpu
+        self.priority = priority
+        self.counts = multiprocessing.RawArray("q", BUCKET_COUNT)
+        self.totals = multiprocessing.RawArray("q", 4)
+        self.status = multiprocessing.RawArray("c", 32)
+        self.histogram = LatencyHistogram(self.counts, self.totals)
+        self.stop_event = multiprocessing.Event()
+        self.process = None
+    
+    def start(self):
+        self.stop_event.clear()
+        self.histogram.reset()
+        self.process = multiprocessing.Process(
+            target=latency_probe_worker,
+            args=(int(self.period_ms * 1e6), self.cpu, self.priority, self.stop_event,
+                  self.counts, self.totals, self.status),
+            name="latency-probe",
+            daemon=True
+        )
+        self.process.start()
+        return self
+    
+    @property
+    def running(self):
+        return self.process is not None and self.process.is_alive()
+    
+    def stop(self, timeout=1.0):
+        """停止探测进程，直方图保留到下一次 start()"""
+        if self.process is None:
+            return
+        self.stop_event.set()
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.process = None
+    
+    def summary(self):
+        """当前统计 (运行中也可调用)"""
+        result = self.histogram.summary()
+        result["period_ms"] = self.period_ms
+        result["scheduling"] = self.status.value.decode() or None
+        return result
+
+
+def describe_latency(summary):
+    """延迟摘要的说明文字"""
+    if not summary or not summary.get("count"):
+        return "调度延迟: 无数据"
+    return (f"调度延迟: p50 {summary['p50_us']:.1f}µs  p99 {summary['p99_us']:.1f}µs  "
+            f"p99.9 {summary['p99.9_us']:.1f}µs  最大 {summary['max_us']:.1f}µs  "
+            f"({summary['count']} 次唤醒，周期 {summary['period_ms']:g}ms)")
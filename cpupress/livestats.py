@@ -0,0 +1,160 @@
+"""工作单元实时状态: 每个工作单元一条定长记录的共享内存块
+
+父进程创建一块 multiprocessing.shared_memory，每个工作单元 (进程或线程) 按编号占用一条记录，
+每个控制周期写入一次迭代次数、计算/休眠时间、心跳时刻、当前目标与实际占用率和运行状态；
+父进程直接从同一块内存读取，不经过管道、不做 pickle，也不需要锁。
+
+每条记录只有一个写入者，用序号实现无锁一致读取 (seqlock): 写入前序号加 1 (奇数表示正在写)，
+写完再加 1；读取方前后两次读到相同的偶数序号才采用本次读到的内容，否则重试。
+这里没有显式的内存屏障 (纯 Python 无法发出)，正确性依赖 x86 的存储顺序 (TSO): 其他核心看到
+的写入顺序与写入方一致。ARM 等弱内存序平台上读取方偶尔可能拿到不一致的记录，实时统计可以容忍。
+记录按 128 字节 (两个缓存行) 对齐，相邻工作单元的写入不会互相使对方的缓存行失效。
+
+    stats = LiveStats(8)                       # 父进程
+    slot = LiveSlot(stats.name, worker_id)     # 工作单元 (按名称打开同一块内存)
+    slot.publish(RUNNING, iterations, busy, cpu, sleep, target, achieved, ops_per_sec)
+    stats.snapshot()                           # {worker_id: {...}}
+"""
+
+import math
+import struct
+import threading
+import time
+from multiprocessing import resource_tracker, shared_memory
+
+# 记录状态
+IDLE = 0
+RUNNING = 1
+FINISHED = 2
+STATES = {IDLE: "idle", RUNNING: "running", FINISHED: "finished"}
+
+# 序号之后的记录内容: 状态、迭代次数、计算墙钟/CPU时间与休眠时间 (ns)、开始与心跳时刻 (ns)、
+# 目标与实际占用率、最近一个上报周期的吞吐量
+SEQ = struct.Struct("<q")
+BODY = struct.Struct("<qqqqqqqddd")
+RECORD_SIZE = 128
+
+# 读取时遇到正在写入的记录最多重试的次数
+READ_RETRIES = 100
+
+_attach_lock = threading.Lock()
+
+
+def _attach(name):
+    """按名称打开已有的共享内存块，不在本进程的 resource_tracker 登记
+
+    只有创建方负责删除内存块。Python 3.13 之前按名称打开也会登记，独立进程退出时
+    它的 tracker 会把仍在使用的内存块当作泄漏删除并打印警告，因此打开期间让登记成为空操作。
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        pass
+    with _attach_lock:
+        register = resource_tracker.register
+        resource_tracker.register = lambda name, rtype: None
+        try:
+            return shared_memory.SharedMemory(name=name)
+        finally:
+            resource_tracker.register = register
+
+
+class LiveStats:
+    """父进程持有的共享内存块，capacity 为最多容纳的工作单元数
+
+    close() 释放并删除共享内存；工作单元按 name 打开同一块内存写入自己的记录。
+    """
+    
+    def __init__(self, capacity):
+        if capacity <= 0:
+            raise ValueError("工作单元数必须大于0")
+        self.capacity = capacity
+        self.shm = shared_memory.SharedMemory(create=True, size=capacity * RECORD_SIZE)
+        self.reset()
+    
+    @property
+    def name(self):
+        return self.shm.name
+    
+    def reset(self):
+        """清空所有记录 (每次运行开始前调用)"""
+        self.shm.buf[:self.capacity * RECORD_SIZE] = bytes(self.capacity * RECORD_SIZE)
+    
+    def read(self, worker_id):
+        """一条记录的一致快照，尚未写入时返回 None"""
+        buf = self.shm.buf
+        offset = worker_id * RECORD_SIZE
+        for _ in range(READ_RETRIES):
+            seq = SEQ.unpack_from(buf, offset)[0]
+            if seq & 1:
+                continue
+            values = BODY.unpack_from(buf, offset + SEQ.size)
+            if SEQ.unpack_from(buf, offset)[0] == seq:
+                break
+        else:
+            return None
+        if seq == 0:
+            return None
+        state, iterations, busy_ns, cpu_ns, sleep_ns, started_ns, heartbeat_ns, target, achieved, ops = values
+        elapsed = (heartbeat_ns - started_ns) / 1e9
+        return {
+            "worker": worker_id,
+            "state": STATES.get(state, "idle"),
+            "iterations": iterations,
+            "busy": busy_ns / 1e9,
+            "cpu_time": cpu_ns / 1e9,
+            "sleep": sleep_ns / 1e9,
+            "started_at": started_ns / 1e9,
+            "heartbeat": heartbeat_ns / 1e9,
+            "elapsed": elapsed,
+            "target": target,
+            "achieved": None if math.isnan(achieved) else round(achieved, 2),
+            "ops_per_sec": round(ops, 2),
+            "mean_ops_per_sec": round(iterations / elapsed, 2) if elapsed > 0 else 0.0,
+        }
+    
+    def snapshot(self, count=None):
+        """前 count 条 (默认全部) 中已写入的记录 {worker_id: record}"""
+        records = {}
+        for worker_id in range(min(count or self.capacity, self.capacity)):
+            record = self.read(worker_id)
+            if record is not None:
+                records[worker_id] = record
+        return records
+    
+    def close(self):
+        self.shm.close()
+        try:
+            self.shm.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class LiveSlot:
+    """工作单元一侧: 打开共享内存块并写入自己的记录"""
+    
+    def __init__(self, name, worker_id, started=None):
+        self.shm = _attach(name)
+        self.offset = worker_id * RECORD_SIZE
+        if self.offset + RECORD_SIZE > self.shm.size:
+            self.shm.close()
+            raise ValueError(f"工作单元编号 {worker_id} 超出共享内存容量")
+        self.started_ns = time.time_ns() if started is None else int(started * 1e9)
+        self.seq = SEQ.unpack_from(self.shm.buf, self.offset)[0]
+    
+    def publish(self, state, iterations=0, busy=0.0, cpu_time=0.0, sleep=0.0, target=0.0, achieved=None,
+                ops_per_sec=0.0):
+        """写入一条记录，时间参数单位为秒，achieved 为 None 表示还没有测量值"""
+        buf = self.shm.buf
+        seq = self.seq + 1
+        SEQ.pack_into(buf, self.offset, seq)
+        BODY.pack_into(
+            buf, self.offset + SEQ.size, state, iterations, int(busy * 1e9), int(cpu_time * 1e9),
+            int(sleep * 1e9), self.started_ns, time.time_ns(), target,
+            math.nan if achieved is None else achieved, ops_per_sec
+        )
+        self.seq = seq + 1
+        SEQ.pack_into(buf, self.offset, self.seq)
+    
+    def close(self):
+        self.shm.close()
@@ -0,0 +1,117 @@
+"""有界日志管道
+
+日志记录先进入定长的内存环形队列，界面按固定帧率批量取出显示；同时可写入
+按大小轮转的 JSON Lines 文件，长时间运行既不会拖慢界面也能保留完整历史。
+"""
+
+import json
+import logging
+import logging.handlers
+import os
+import threading
+import time
+from collections import deque
+
+from .paths import data_dir
+
+# 默认日志文件大小与保留份数
+LOG_MAX_BYTES = 10 * 1024 * 1024
+LOG_BACKUP_COUNT = 5
+
+
+class JsonLineFormatter(logging.Formatter):
+    """每条记录输出为一行 JSON"""
+
+    def format(self, record):
+        entry = {
+            "time": round(record.created, 3),
+            "level": record.levelname.lower(),
+            "message": record.getMessage(),
+        }
+        entry.update(getattr(record, "fields", {}))
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def default_log_file():
+    return os.path.join(data_dir(), "logs", "cpupress.jsonl")
+
+
+class LogPipeline:
+    """日志管道
+
+        log = LogPipeline(capacity=5000, log_file=default_log_file())
+        log.emit("开始压力测试", workers=8)
+        for record in log.drain():   # 界面定时批量取出
+            ...
+
+    records 保留最近 capacity 条记录 (不因 drain 而减少)，日志面板创建时用 recent() 回填。
+    """
+
+    def __init__(self, capacity=5000, log_file=None, max_bytes=LOG_MAX_BYTES,
+                 backup_count=LOG_BACKUP_COUNT, echo=None):
+        self.records = deque(maxlen=capacity)
+        self.pending = deque(maxlen=capacity)
+        self.dropped = 0
+        self.echo = echo
+        self._lock = threading.Lock()
+        
+        # 文件输出使用独立的 logger，不影响调用方的 logging 配置
+        self.logger = None
+        self.log_file = log_file
+        if log_file:
+            os.makedirs(os.path.dirname(os.path.abspath(log_file)), exist_ok=True)
+            handler = logging.handlers.RotatingFileHandler(
+                log_file, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8"
+            )
+            handler.setFormatter(JsonLineFormatter())
+            self.logger = logging.getLogger(f"cpupress.log.{id(self)}")
+            self.logger.propagate = False
+            self.logger.setLevel(logging.DEBUG)
+            self.logger.addHandler(handler)
+    
+    def emit(self, message, level="info", **fields):
+        """写入一条日志，可附带结构化字段 (只写入文件)"""
+        record = {"time": time.time(), "level": level, "message": message}
+        with self._lock:
+            if len(self.pending) == self.pending.maxlen:
+                self.dropped += 1
+            self.records.append(record)
+            self.pending.append(record)
+        if self.logger:
+            self.logger.log(getattr(logging, level.upper(), logging.INFO), message, extra={"fields": fields})
+        if self.echo:
+            self.echo(message)
+        return record
+    
+    def drain(self, limit=None):
+        """取出尚未显示的记录，返回列表"""
+        with self._lock:
+            count = len(self.pending) if limit is None else min(limit, len(self.pending))
+            return [self.pending.popleft() for _ in range(count)]
+    
+    def recent(self, limit=None, consume=False):
+        """最近的 limit 条记录 (默认全部)，consume 为 True 时同时清空待显示队列和丢弃计数"""
+        with self._lock:
+            records = list(self.records)
+            if consume:
+                self.pending.clear()
+                self.dropped = 0
+        return records if limit is None else records[max(len(records) - limit, 0):]
+    
+    def take_dropped(self):
+        """返回并清零界面来不及显示而被丢弃的记录数"""
+        with self._lock:
+            dropped, self.dropped = self.dropped, 0
+        return dropped
+    
+    def clear(self):
+        with self._lock:
+            self.records.clear()
+            self.pending.clear()
+    
+    def close(self):
+        if self.logger:
+            for handler in list(self.logger.handlers):
+                handler.close()
+                self.logger.removeHandler(handler)
+            self.logger = None
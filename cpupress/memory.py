@@ -0,0 +1,298 @@
+"""内存层级压力: 可配置工作集大小的顺序、跨步与随机指针追逐访问
+
+每次"访问"对应一个缓存行 (64 字节):
+- sequential: 按块顺序扫描整个工作集 (C 层 memchr)，测得读带宽;
+- stride: 每隔 stride 字节读取一个 8 字节字 (C 层跨步拷贝);
+- random: 所有缓存行串成一个随机环，每次读出下一个缓存行的位置 (指针追逐)，
+  后一次访问依赖前一次的结果，硬件预取无法提前加载，测得访问延迟。
+
+指针追逐由解释器逐次执行，每次访问附带约 20-40ns 的固定开销，L1 与 L2 的差别会被掩盖，
+但 L3 与内存之间的跳变仍清晰可见。memory_sweep() 的 extra_ns 扣除了最小工作集的延迟。
+"""
+
+import mmap
+import random
+import sys
+import time
+
+from .topology import read_cache_sizes
+
+CACHE_LINE = 64
+WORD = 8
+
+MEMORY_PATTERNS = {
+    "sequential": "顺序扫描 (带宽)",
+    "stride": "按固定跨步读取",
+    "random": "随机指针追逐 (延迟)",
+}
+
+MEMORY_BACKINGS = {
+    "heap": "普通堆内存 (bytearray)",
+    "mmap": "匿名 mmap",
+    "hugepages": "大页 (MAP_HUGETLB，失败时退化为透明大页)",
+}
+
+DEFAULT_WORKING_SET = "64M"
+
+# 每次 step() 的访问次数 (随机模式) 与扫描块大小 (顺序/跨步模式)
+CHASE_STEPS = 4096
+CHUNK_BYTES = 256 * 1024
+
+# Linux 的 MAP_HUGETLB，Python 的 mmap 模块没有导出该常量
+MAP_HUGETLB = 0x40000
+
+SIZE_UNITS = {"": 1, "B": 1, "K": 1 << 10, "M": 1 << 20, "G": 1 << 30, "T": 1 << 40}
+
+
+def parse_size(text):
+    """解析 "16K"、"64MB"、"1.5G"、"4GiB" 或字节数"""
+    if isinstance(text, (int, float)):
+        size = int(text)
+    else:
+        value = str(text).strip().upper().replace("IB", "").rstrip("B") or "0"
+        unit = value[-1] if value[-1] in SIZE_UNITS else ""
+        number = value[:-1] if unit else value
+        try:
+            size = int(float(number) * SIZE_UNITS[unit])
+        except ValueError:
+            raise ValueError(f"无法解析的大小: {text}")
+    if size <= 0:
+        raise ValueError(f"大小必须大于0: {text}")
+    return size
+
+
+def format_size(size):
+    """把字节数格式化为 16K、64M 等"""
+    for unit in ("T", "G", "M", "K"):
+        if size >= SIZE_UNITS[unit]:
+            if size % SIZE_UNITS[unit] == 0:
+                return f"{size // SIZE_UNITS[unit]}{unit}"
+            return f"{size / SIZE_UNITS[unit]:.1f}{unit}"
+    return f"{size}B"
+
+
+def allocate(size, backing="heap"):
+    """分配工作集缓冲区，返回 (缓冲区, 实际使用的后端)"""
+    if backing not in MEMORY_BACKINGS:
+        raise ValueError(f"未知的内存后端: {backing} (可选: {', '.join(MEMORY_BACKINGS)})")
+    if backing == "heap":
+        return bytearray(size), "heap"
+    if sys.platform == "win32":
+        return mmap.mmap(-1, size), "mmap"
+
+    flags = mmap.MAP_PRIVATE | mmap.MAP_ANONYMOUS
+    if backing == "hugepages" and sys.platform.startswith("linux"):
+        # 需要预留大页 (vm.nr_hugepages)，否则退化为透明大页
+        try:
+            return mmap.mmap(-1, size, flags | MAP_HUGETLB), "hugepages"
+        except OSError:
+            pass
+    buf = mmap.mmap(-1, size, flags)
+    if backing == "hugepages" and hasattr(mmap, "MADV_HUGEPAGE"):
+        try:
+            buf.madvise(mmap.MADV_HUGEPAGE)
+            return buf, "thp"
+        except OSError:
+            pass
+    return buf, "mmap"
+
+
+def _fill(buf, size):
+    """写满整个缓冲区，确保每一页都真正分配而不是映射到共享零页"""
+    view = memoryview(buf)
+    chunk = b"\x02" * min(size, 1 << 20)
+    for start in range(0, size, len(chunk)):
+        end = min(start + len(chunk), size)
+        view[start:end] = chunk[:end - start]
+    view.release()
+
+
+def _build_chain(words, lines):
+    """把所有缓存行串成一个随机环: 每行第一个字保存下一行的字下标"""
+    try:
+        import numpy as np
+    except ImportError:
+        np = None
+    if np is not None and lines > 1 << 16:
+        order = np.random.default_rng().permutation(lines).astype(np.uint64)
+        array = np.frombuffer(words, dtype=np.uint64)
+        step = CACHE_LINE // WORD
+        array[order * step] = np.roll(order, -1) * step
+        return int(order[0]) * step
+    order = list(range(lines))
+    random.shuffle(order)
+    step = CACHE_LINE // WORD
+    for current, following in zip(order, order[1:] + order[:1]):
+        words[current * step] = following * step
+    return order[0] * step
+
+
+class WorkingSet:
+    """一个工作进程的工作集
+
+        ws = WorkingSet("64M", "random")
+        step = ws.step        # 每次调用访问 ws.accesses 个缓存行
+    """
+
+    def __init__(self, size=DEFAULT_WORKING_SET, pattern="random", stride=CACHE_LINE, backing="heap"):
+        if pattern not in MEMORY_PATTERNS:
+            raise ValueError(f"未知的访问模式: {pattern} (可选: {', '.join(MEMORY_PATTERNS)})")
+        stride = parse_size(stride)
+        if stride < WORD or stride % WORD:
+            raise ValueError(f"跨步必须是 {WORD} 字节的整数倍")
+        # 对齐到缓存行，至少两行
+        self.size = max(parse_size(size) // CACHE_LINE, 2) * CACHE_LINE
+        self.pattern = pattern
+        self.stride = stride
+        self.buffer, self.backing = allocate(self.size, backing)
+        _fill(self.buffer, self.size)
+        self.words = memoryview(self.buffer).cast("Q")
+        self.position = 0
+
+        if pattern == "random":
+            self.position = _build_chain(self.words, self.size // CACHE_LINE)
+            self.accesses = CHASE_STEPS
+            self.bytes = CHASE_STEPS * CACHE_LINE
+            self.step = self._chase
+        elif pattern == "sequential":
+            self.chunk = min(CHUNK_BYTES, self.size)
+            self.accesses = self.chunk // CACHE_LINE
+            self.bytes = self.chunk
+            self.step = self._scan
+        else:
+            self.chunk = min(CHUNK_BYTES, self.size)
+            self.accesses = max(self.chunk // stride, 1)
+            # 跨步小于缓存行时多个访问落在同一行，带宽按实际触及的缓存行计算
+            self.bytes = self.accesses * min(stride, CACHE_LINE)
+            self.step = self._stride
+
+    def _chase(self):
+        words = self.words
+        i = self.position
+        for _ in range(CHASE_STEPS):
+            i = words[i]
+        self.position = i
+        return i
+
+    def _scan(self):
+        start = self.position
+        end = start + self.chunk
+        # 缓冲区中没有 0x01，find 会用 memchr 读完整个区间
+        found = self.buffer.find(b"\x01", start, end)
+        self.position = 0 if end >= self.size else end
+        return found
+
+    def _stride(self):
+        start = self.position // WORD
+        end = start + self.chunk // WORD
+        data = self.words[start:end:self.stride // WORD].tobytes()
+        self.position = 0 if end * WORD >= self.size else end * WORD
+        return len(data)
+
+    def warm_up(self):
+        """完整访问一遍工作集，让页表和缓存进入稳定状态"""
+        passes = max(self.size // CACHE_LINE // self.accesses, 1)
+        for _ in range(passes):
+            self.step()
+
+    def close(self):
+        """释放工作集"""
+        self.words.release()
+        if isinstance(self.buffer, mmap.mmap):
+            self.buffer.close()
+
+
+def validate_params(params):
+    """检查 memory 内核参数，不合法时抛出 ValueError"""
+    size = parse_size(params.get("working_set", DEFAULT_WORKING_SET))
+    pattern = params.get("memory_pattern", "random")
+    if pattern not in MEMORY_PATTERNS:
+        raise ValueError(f"未知的访问模式: {pattern} (可选: {', '.join(MEMORY_PATTERNS)})")
+    stride = parse_size(params.get("memory_stride", CACHE_LINE))
+    if stride < WORD or stride % WORD:
+        raise ValueError(f"跨步必须是 {WORD} 字节的整数倍")
+    if params.get("memory_backing", "heap") not in MEMORY_BACKINGS:
+        raise ValueError(f"未知的内存后端: {params['memory_backing']} (可选: {', '.join(MEMORY_BACKINGS)})")
+    try:
+        import psutil
+    except ImportError:
+        return
+    total = size * int(params.get("cpu_threads", 1))
+    available = psutil.virtual_memory().available
+    if total > available:
+        raise ValueError(f"工作集总计 {format_size(total)} 超过可用内存 {format_size(available)}")
+
+
+def measure(working_set, window=0.2, repeat=3):
+    """测量工作集的平均访问延迟 (ns) 与带宽 (GB/s)，取 repeat 次的最好成绩"""
+    working_set.warm_up()
+    best = None
+    for _ in range(repeat):
+        calls = 0
+        start = time.perf_counter()
+        deadline = start + window
+        while True:
+            working_set.step()
+            calls += 1
+            now = time.perf_counter()
+            if now >= deadline:
+                break
+        elapsed = now - start
+        if best is None or elapsed / calls < best:
+            best = elapsed / calls
+    return {
+        "ns_per_access": round(best / working_set.accesses * 1e9, 2),
+        "gb_per_sec": round(working_set.bytes / best / 1e9, 3),
+    }
+
+
+def sweep_sizes(min_size="16K", max_size="256M", points_per_octave=1):
+    """工作集扫描的大小序列: 从 min_size 到 max_size 按 2 的幂等比增长"""
+    low, high = parse_size(min_size), parse_size(max_size)
+    if low > high:
+        raise ValueError("最小工作集不能大于最大工作集")
+    sizes = []
+    index = 0
+    while True:
+        size = int(low * 2 ** (index / points_per_octave)) // CACHE_LINE * CACHE_LINE
+        if size > high:
+            break
+        if not sizes or size != sizes[-1]:
+            sizes.append(size)
+        index += 1
+    return sizes
+
+
+def memory_sweep(min_size="16K", max_size="256M", pattern="random", stride=CACHE_LINE, backing="heap",
+                 points_per_octave=1, window=0.2, repeat=3, sysfs_root="/sys", progress=None):
+    """按工作集大小扫描访问延迟，返回 [{size, ns_per_access, gb_per_sec, extra_ns, level, jump}]
+
+    level 是按 sysfs 报告的缓存大小推断的所在层级 (L1/L2/L3/DRAM)，
+    jump 表示延迟比上一个点增加 30% 以上，通常对应一个缓存层级的边界。
+    progress(point) 在每个点测完后调用。
+    """
+    caches = read_cache_sizes(sysfs_root)
+    curve = []
+    for size in sweep_sizes(min_size, max_size, points_per_octave):
+        working_set = WorkingSet(size, pattern, stride, backing)
+        try:
+            point = dict(size=working_set.size, backing=working_set.backing, **measure(working_set, window, repeat))
+        finally:
+            working_set.close()
+        point["level"] = next((f"L{level}" for level, cache in caches if size <= cache), "DRAM")
+        point["extra_ns"] = round(point["ns_per_access"] - curve[0]["ns_per_access"], 2) if curve else 0.0
+        point["jump"] = bool(curve) and point["ns_per_access"] > curve[-1]["ns_per_access"] * 1.3
+        curve.append(point)
+        if progress:
+            progress(point)
+    return curve
+
+
+def format_sweep(curve):
+    """把扫描结果格式化为表格文本行"""
+    lines = [f"{'工作集':<10}{'层级':<7}{'ns/访问':>10}{'增量ns':>10}{'GB/s':>10}"]
+    for point in curve:
+        mark = "  ◀ 跳变" if point["jump"] else ""
+        lines.append(f"{format_size(point['size']):<10}{point['level']:<7}{point['ns_per_access']:>10.2f}"
+                     f"{point['extra_ns']:>+10.2f}{point['gb_per_sec']:>10.2f}{mark}")
+    return lines
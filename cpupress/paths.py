@@ -0,0 +1,13 @@
+"""本地数据目录"""
+
+import os
+
+
+def data_dir():
+    """日志、运行历史等本地数据的存放目录，可用环境变量 CPUPRESS_HOME 覆盖"""
+    path = os.environ.get("CPUPRESS_HOME")
+    if not path:
+        base = os.environ.get("APPDATA") or os.path.join(os.path.expanduser("~"), ".local", "share")
+        path = os.path.join(base, "cpupress")
+    os.makedirs(path, exist_ok=True)
+    return path
@@ -0,0 +1,195 @@
+"""常驻预热进程池
+
+工作进程只创建一次，空闲时阻塞在各自的命令管道上。每次运行时父进程向所有
+进程发送 run 命令，所有进程与父进程在同一个 Barrier 上汇合后同时开始加压；
+运行结束或 stop_event 被设置后进程回到空闲状态，而不是被终止。
+"""
+
+import multiprocessing
+import multiprocessing.connection
+import os
+import signal
+import threading
+import time
+
+from .engine import cpu_stress_worker
+from .topology import set_affinity
+
+# 等待所有进程到达起跑屏障的最长时间 (秒)
+BARRIER_TIMEOUT = 30
+
+
+def pool_worker(worker_id, conn, stop_event, start_barrier, report_queue, shared_target):
+    """进程池工作进程主循环"""
+    # Ctrl+C 由父进程处理，工作进程通过 stop_event 退出
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    # 每次运行结束后恢复创建时的CPU亲和性，避免上一次的绑核方案残留
+    original_affinity = os.sched_getaffinity(0) if hasattr(os, "sched_getaffinity") else None
+    while True:
+        try:
+            command, params = conn.recv()
+        except (EOFError, OSError):
+            break
+        if command == "exit":
+            break
+        if command == "run":
+            try:
+                start_barrier.wait(BARRIER_TIMEOUT)
+            except threading.BrokenBarrierError:
+                conn.send(("aborted", worker_id))
+                continue
+            cpu_stress_worker(worker_id, params, stop_event, report_queue, shared_target)
+            if original_affinity is not None and params.get("placement"):
+                set_affinity(original_affinity)
+            conn.send(("done", worker_id))
+
+
+class WorkerPool:
+    """预热进程池
+
+        pool = WorkerPool(8, stop_event, report_queue, shared_target)
+        released = pool.run(params)   # 所有进程同时开始
+        pool.wait_idle()
+        pool.close()
+    """
+
+    def __init__(self, size, stop_event, report_queue, shared_target=None):
+        if size <= 0:
+            raise ValueError("进程池大小必须大于0")
+        self.size = size
+        self.stop_event = stop_event
+        self.report_queue = report_queue
+        self.shared_target = shared_target
+        self.start_barrier = multiprocessing.Barrier(size + 1)
+        self.workers = []
+        self.busy = set()
+        # 起跑屏障失败过的进程池不再复用: 屏障已损坏，管道中可能残留 aborted 消息
+        self.broken = False
+        # 各进程最近一次回到空闲状态的时间 (perf_counter)
+        self.finished_at = {}
+        # poll() 可能同时在主线程和监视线程中调用
+        self.lock = threading.RLock()
+        # 有进程回到空闲时写入一个字节，唤醒阻塞等待的监视线程
+        self._changed_r, self._changed_w = multiprocessing.Pipe(duplex=False)
+        
+        started = time.perf_counter()
+        try:
+            for worker_id in range(size):
+                parent_conn, child_conn = multiprocessing.Pipe()
+                p = multiprocessing.Process(
+                    target=pool_worker,
+                    args=(worker_id, child_conn, stop_event, self.start_barrier, report_queue, shared_target),
+                    daemon=True
+                )
+                p.start()
+                child_conn.close()
+                self.workers.append((p, parent_conn))
+        except Exception:
+            self.close()
+            raise
+        self.spawn_time = time.perf_counter() - started
+    
+    def healthy(self):
+        """所有进程都还活着且起跑屏障可用"""
+        return not self.broken and bool(self.workers) and all(p.is_alive() for p, _ in self.workers)
+    
+    def run(self, params):
+        """让所有进程开始一次运行，返回屏障放行的时间戳"""
+        if self.busy:
+            raise RuntimeError("进程池正忙")
+        self._drain_changed()
+        self.finished_at = {}
+        for p, conn in self.workers:
+            conn.send(("run", params))
+        self.busy = set(range(self.size))
+        try:
+            self.start_barrier.wait(BARRIER_TIMEOUT)
+        except threading.BrokenBarrierError:
+            self.busy.clear()
+            self.broken = True
+            raise RuntimeError("进程池中有进程未能到达起跑屏障")
+        return time.time()
+    
+    def poll(self):
+        """处理已完成的进程，返回仍在运行的进程数"""
+        with self.lock:
+            for worker_id in list(self.busy):
+                p, conn = self.workers[worker_id]
+                try:
+                    while conn.poll():
+                        conn.recv()
+                        self._mark_idle(worker_id)
+                except (EOFError, OSError):
+                    self._mark_idle(worker_id)
+                if worker_id in self.busy and not p.is_alive():
+                    self._mark_idle(worker_id)
+            return len(self.busy)
+    
+    def _mark_idle(self, worker_id):
+        if worker_id not in self.busy:
+            return
+        self.busy.discard(worker_id)
+        self.finished_at[worker_id] = time.perf_counter()
+        try:
+            self._changed_w.send_bytes(b"1")
+        except (OSError, ValueError):
+            pass
+    
+    def _drain_changed(self):
+        try:
+            while self._changed_r.poll():
+                self._changed_r.recv_bytes()
+        except (EOFError, OSError):
+            pass
+    
+    def waitables(self):
+        """仍在运行的进程的完成管道与 sentinel，全部空闲时返回空列表 (供监视线程阻塞等待)
+
+        其他线程处理掉完成消息时会通过 _changed_r 唤醒等待方，避免等待一个已被读走的管道。
+        """
+        with self.lock:
+            self._drain_changed()
+            if not self.poll():
+                return []
+            return [self._changed_r] + self._busy_waitables()
+    
+    def _busy_waitables(self):
+        """运行中进程的完成管道与 sentinel，busy 可能被其他线程修改，在锁内读取"""
+        with self.lock:
+            waitables = []
+            for worker_id in self.busy:
+                p, conn = self.workers[worker_id]
+                waitables += [conn, p.sentinel]
+            return waitables
+    
+    def wait_idle(self, timeout=None):
+        """等待所有进程回到空闲状态，超时返回 False"""
+        deadline = None if timeout is None else time.time() + timeout
+        while self.poll():
+            remaining = None if deadline is None else deadline - time.time()
+            if remaining is not None and remaining <= 0:
+                return False
+            # 不读取 _changed_r (留给监视线程)；完成消息可能被监视线程先读走，因此最多等待 0.1 秒再重新检查
+            multiprocessing.connection.wait(self._busy_waitables(), 0.1 if remaining is None else min(remaining, 0.1))
+        return True
+    
+    def close(self, timeout=1.0):
+        """关闭进程池，未能按时退出的进程依次 terminate、kill"""
+        for p, conn in self.workers:
+            try:
+                conn.send(("exit", None))
+            except (OSError, ValueError):
+                pass
+        for p, conn in self.workers:
+            p.join(timeout)
+            if p.is_alive():
+                p.terminate()
+                p.join(timeout)
+            if p.is_alive():
+                p.kill()
+                p.join(timeout)
+            conn.close()
+        self.workers = []
+        self.busy.clear()
+        self._changed_r.close()
+        self._changed_w.close()
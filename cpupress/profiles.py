@@ -0,0 +1,190 @@
+"""随时间变化的负载曲线与调度线程
+
+负载曲线把运行开始后的秒数映射为目标占用率 (0-100)。文本格式:
+
+    constant:80              恒定 80%
+    ramp:0:100:5m            5 分钟内从 0% 线性升到 100%
+    step:25,50,75,100:60s    每 60 秒切换一档
+    square:20:100:30         周期 30 秒的方波 (低 20% / 高 100%)，可追加占空比 square:20:100:30:0.25
+    sine:20:80:10m           周期 10 分钟的正弦波，在 20% 与 80% 之间变化
+
+时间可以带 s / m / h 后缀，默认单位为秒。
+"""
+
+import math
+import threading
+import time
+
+
+def parse_seconds(text):
+    """解析带单位的时间长度"""
+    text = str(text).strip().lower()
+    units = {"s": 1, "m": 60, "h": 3600}
+    if text and text[-1] in units:
+        value = float(text[:-1]) * units[text[-1]]
+    else:
+        value = float(text)
+    if value <= 0:
+        raise ValueError("时间长度必须大于0")
+    return value
+
+
+def _clamp(value):
+    return min(max(float(value), 0.0), 100.0)
+
+
+class LoadProfile:
+    """负载曲线基类"""
+    kind = "constant"
+    
+    def __init__(self, level=100):
+        self.level = _clamp(level)
+    
+    def target(self, elapsed):
+        """运行 elapsed 秒时的目标占用率"""
+        return self.level
+    
+    def spec(self):
+        return f"constant:{self.level:g}"
+    
+    def __repr__(self):
+        return f"<{type(self).__name__} {self.spec()}>"
+
+
+class RampProfile(LoadProfile):
+    """线性爬坡，结束后保持终点"""
+    kind = "ramp"
+    
+    def __init__(self, start, end, duration):
+        self.start = _clamp(start)
+        self.end = _clamp(end)
+        self.duration = duration
+    
+    def target(self, elapsed):
+        ratio = min(max(elapsed / self.duration, 0.0), 1.0)
+        return self.start + (self.end - self.start) * ratio
+    
+    def spec(self):
+        return f"ramp:{self.start:g}:{self.end:g}:{self.duration:g}"
+
+
+class StepProfile(LoadProfile):
+    """阶梯，最后一档保持到运行结束"""
+    kind = "step"
+    
+    def __init__(self, levels, step_duration):
+        if not levels:
+            raise ValueError("阶梯曲线至少需要一档")
+        self.levels = [_clamp(v) for v in levels]
+        self.step_duration = step_duration
+    
+    def target(self, elapsed):
+        index = min(int(max(elapsed, 0.0) // self.step_duration), len(self.levels) - 1)
+        return self.levels[index]
+    
+    def spec(self):
+        return f"step:{','.join(f'{v:g}' for v in self.levels)}:{self.step_duration:g}"
+
+
+class SquareProfile(LoadProfile):
+    """方波，每个周期先高后低"""
+    kind = "square"
+    
+    def __init__(self, low, high, period, duty=0.5):
+        self.low = _clamp(low)
+        self.high = _clamp(high)
+        self.period = period
+        self.duty = min(max(float(duty), 0.0), 1.0)
+    
+    def target(self, elapsed):
+        phase = (max(elapsed, 0.0) % self.period) / self.period
+        return self.high if phase < self.duty else self.low
+    
+    def spec(self):
+        return f"square:{self.low:g}:{self.high:g}:{self.period:g}:{self.duty:g}"
+
+
+class SineProfile(LoadProfile):
+    """正弦波，从最低点开始，可用来压缩模拟一天的负载起伏"""
+    kind = "sine"
+    
+    def __init__(self, low, high, period):
+        self.low = _clamp(low)
+        self.high = _clamp(high)
+        self.period = period
+    
+    def target(self, elapsed):
+        phase = 2 * math.pi * max(elapsed, 0.0) / self.period
+        return self.low + (self.high - self.low) * (1 - math.cos(phase)) / 2
+    
+    def spec(self):
+        return f"sine:{self.low:g}:{self.high:g}:{self.period:g}"
+
+
+def parse_profile(spec):
+    """把文本描述解析为 LoadProfile，已是 LoadProfile 时原样返回"""
+    if isinstance(spec, LoadProfile):
+        return spec
+    parts = str(spec).strip().split(":")
+    kind, args = parts[0].lower(), parts[1:]
+    try:
+        if kind == "constant" and len(args) == 1:
+            return LoadProfile(float(args[0]))
+        if kind == "ramp" and len(args) == 3:
+            return RampProfile(float(args[0]), float(args[1]), parse_seconds(args[2]))
+        if kind == "step" and len(args) == 2:
+            return StepProfile([float(v) for v in args[0].split(",") if v], parse_seconds(args[1]))
+        if kind == "square" and len(args) in (3, 4):
+            return SquareProfile(float(args[0]), float(args[1]), parse_seconds(args[2]),
+                                 float(args[3]) if len(args) == 4 else 0.5)
+        if kind == "sine" and len(args) == 3:
+            return SineProfile(float(args[0]), float(args[1]), parse_seconds(args[2]))
+    except ValueError as e:
+        raise ValueError(f"无效的负载曲线 {spec!r}: {e}")
+    raise ValueError(f"无效的负载曲线 {spec!r}，示例: ramp:0:100:5m、step:25,50,75,100:60、square:20:100:30、sine:20:80:10m")
+
+
+class ProfileScheduler(threading.Thread):
+    """按负载曲线更新共享目标值的线程
+
+    所有工作进程在每个控制周期读取 shared_target.value，因此修改曲线不需要重启进程。
+    """
+
+    def __init__(self, profile, shared_target, interval=0.1):
+        super().__init__(name="profile-scheduler", daemon=True)
+        self.profile = parse_profile(profile)
+        self.shared_target = shared_target
+        self.interval = interval
+        self.start_time = None
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+    
+    def set_profile(self, profile, restart=True):
+        """运行中切换负载曲线，restart 为 True 时新曲线从 0 秒开始"""
+        profile = parse_profile(profile)
+        with self._lock:
+            self.profile = profile
+            if restart:
+                self.start_time = time.monotonic()
+        self.apply()
+    
+    def elapsed(self):
+        return 0.0 if self.start_time is None else time.monotonic() - self.start_time
+    
+    def apply(self):
+        """按当前时间写入目标值，返回该值"""
+        with self._lock:
+            target = self.profile.target(self.elapsed())
+        self.shared_target.value = target
+        return target
+    
+    def run(self):
+        if self.start_time is None:
+            self.start_time = time.monotonic()
+        while not self._stop_event.wait(self.interval):
+            self.apply()
+    
+    def stop(self, timeout=1.0):
+        self._stop_event.set()
+        if self.is_alive():
+            self.join(timeout)
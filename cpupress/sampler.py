@@ -0,0 +1,129 @@
+"""后台 CPU 采样线程
+
+psutil.cpu_percent(interval=None) 不阻塞，返回与上次调用之间的平均占用率。
+采样线程按固定间隔调用它，把结果放入线程安全队列，由界面线程定时取出。
+"""
+
+import queue
+import threading
+import time
+
+import psutil
+
+from .telemetry import RingBuffer
+
+# 采样间隔的允许范围 (秒)
+MIN_INTERVAL = 0.1
+MAX_INTERVAL = 5.0
+
+
+class CpuSampler(threading.Thread):
+    """CPU 占用率采样线程
+
+        sampler = CpuSampler(interval=0.5)
+        sampler.start()
+        for sample in sampler.drain():
+            print(sample["time"], sample["cpu"], sample["percpu"])
+        sampler.stop()
+
+    每个核心的历史数据保存在 history (核心数 × history_size 的环形缓冲区) 中。
+    传入 thermal (ThermalProbe) 时每 thermal_interval 秒读取一次频率、温度和降频计数，
+    并入同一时间轴的样本中；两次读取之间沿用上一次的值。
+    传入 cgroup (CgroupProbe) 时每个样本附带相对 CPU 配额的占用率与 cgroup 节流计数。
+    """
+
+    def __init__(self, interval=1.0, maxsize=256, history_size=600, thermal=None, thermal_interval=1.0,
+                 cgroup=None):
+        super().__init__(name="cpu-sampler", daemon=True)
+        self.samples = queue.Queue(maxsize=maxsize)
+        self.latest = None
+        self.core_count = psutil.cpu_count(logical=True) or 1
+        self.history = RingBuffer(self.core_count, history_size)
+        self.thermal = thermal
+        self.thermal_interval = thermal_interval
+        self.thermal_latest = {}
+        self.cgroup = cgroup
+        self._next_thermal = 0.0
+        self._interval = self._clamp(interval)
+        self._stop_event = threading.Event()
+        self._wakeup = threading.Event()
+    
+    @staticmethod
+    def _clamp(interval):
+        return min(max(float(interval), MIN_INTERVAL), MAX_INTERVAL)
+    
+    @property
+    def interval(self):
+        return self._interval
+    
+    def set_interval(self, interval):
+        """修改采样间隔 (0.1-5 秒)，立即生效"""
+        self._interval = self._clamp(interval)
+        self._wakeup.set()
+    
+    def run(self):
+        # 第一次调用只建立基准值
+        psutil.cpu_percent(interval=None, percpu=True)
+        next_time = time.monotonic() + self._interval
+        while not self._stop_event.is_set():
+            self._wakeup.wait(max(0.0, next_time - time.monotonic()))
+            if self._wakeup.is_set():
+                # 间隔被修改，从现在重新计时
+                self._wakeup.clear()
+                if self._stop_event.is_set():
+                    break
+                next_time = time.monotonic() + self._interval
+                continue
+            next_time += self._interval
+            if next_time < time.monotonic():
+                next_time = time.monotonic() + self._interval
+            self._publish(self.collect())
+    
+    def collect(self):
+        """采集一次数据，总占用率取各核心的平均值"""
+        now = time.time()
+        percpu = psutil.cpu_percent(interval=None, percpu=True)
+        self.history.append(now, percpu)
+        sample = {"time": now, "cpu": sum(percpu) / len(percpu), "percpu": percpu}
+        if self.thermal is not None:
+            if now >= self._next_thermal:
+                self._next_thermal = now + self.thermal_interval
+                try:
+                    self.thermal_latest = self.thermal.sample()
+                except Exception:
+                    self.thermal_latest = {}
+            sample.update(self.thermal_latest)
+        if self.cgroup is not None:
+            try:
+                sample.update(self.cgroup.sample())
+            except (OSError, ValueError):
+                pass
+        return sample
+    
+    def _publish(self, sample):
+        self.latest = sample
+        try:
+            self.samples.put_nowait(sample)
+        except queue.Full:
+            # 界面来不及取时丢弃最旧的样本
+            try:
+                self.samples.get_nowait()
+            except queue.Empty:
+                pass
+            self.samples.put_nowait(sample)
+    
+    def drain(self):
+        """取出所有待处理样本 (非阻塞)"""
+        items = []
+        while True:
+            try:
+                items.append(self.samples.get_nowait())
+            except queue.Empty:
+                return items
+    
+    def stop(self, timeout=1.0):
+        """停止采样线程"""
+        self._stop_event.set()
+        self._wakeup.set()
+        if self.is_alive():
+            self.join(timeout)
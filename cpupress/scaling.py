@@ -0,0 +1,186 @@
+"""多核扩展性扫描: 按工作进程数 × 超线程开关 × 目标占用率逐点运行，计算加速比、并行效率，
+并拟合 Amdahl 定律与通用扩展定律 (USL)
+
+    X(N) = X(1) · N / (1 + σ(N-1) + κN(N-1))
+
+σ 为串行/争用比例 (κ=0 即 Amdahl 定律)，κ 为一致性开销 (共享缓存、锁、跨核通信)。
+κ > 0 时吞吐量在 N* = sqrt((1-σ)/κ) 处达到峰值，再增加进程反而下降。
+
+超线程 on 使用 spread 绑核 (先占满每个物理核心的第一个线程，再使用超线程)，
+off 使用 physical 绑核 (每个物理核心只用一个逻辑CPU)。
+"""
+
+import math
+import time
+
+from .cgroup import usable_cpus
+from .kernels import DEFAULT_KERNEL
+from .topology import candidate_cpus
+
+SMT_MODES = {
+    "on": "spread",
+    "off": "physical",
+}
+
+
+def worker_counts(limit):
+    """1、2、4 … 直到 limit (包含 limit 本身)"""
+    counts = []
+    n = 1
+    while n < limit:
+        counts.append(n)
+        n *= 2
+    counts.append(limit)
+    return counts
+
+
+def fit_scaling(points):
+    """按 [(N, 相对吞吐量 C(N))] 拟合 Amdahl 与 USL 参数
+
+    线性化: N/C(N) - 1 = σ(N-1) + κN(N-1)，用无截距最小二乘求解；参数不小于 0。
+    返回 {"amdahl": {"sigma", "max_speedup", "r2"}, "usl": {"sigma", "kappa", "peak_workers", "r2"}}，
+    没有多于 1 个进程的点时返回 None。
+    """
+    data = [(n, c) for n, c in points if n > 1 and c > 0]
+    if not data:
+        return None
+    xs = [n - 1 for n, _ in data]
+    zs = [n * (n - 1) for n, _ in data]
+    ys = [n / c - 1 for n, c in data]
+    
+    sxx = sum(x * x for x in xs)
+    sigma_amdahl = max(sum(x * y for x, y in zip(xs, ys)) / sxx, 0.0)
+    
+    szz = sum(z * z for z in zs)
+    sxz = sum(x * z for x, z in zip(xs, zs))
+    sxy = sum(x * y for x, y in zip(xs, ys))
+    szy = sum(z * y for z, y in zip(zs, ys))
+    det = sxx * szz - sxz * sxz
+    if len(data) >= 2 and det > 0:
+        sigma = (sxy * szz - szy * sxz) / det
+        kappa = (szy * sxx - sxy * sxz) / det
+        if kappa < 0:
+            sigma, kappa = sigma_amdahl, 0.0
+        elif sigma < 0:
+            sigma, kappa = 0.0, max(szy / szz, 0.0)
+    else:
+        sigma, kappa = sigma_amdahl, 0.0
+    
+    def usl(n, s, k):
+        return n / (1 + s * (n - 1) + k * n * (n - 1))
+    
+    def r2(model):
+        all_points = [(n, c) for n, c in points if c > 0]
+        mean = sum(c for _, c in all_points) / len(all_points)
+        total = sum((c - mean) ** 2 for _, c in all_points)
+        residual = sum((c - model(n)) ** 2 for n, c in all_points)
+        return round(1 - residual / total, 4) if total > 0 else None
+    
+    peak = math.sqrt((1 - sigma) / kappa) if kappa > 0 and sigma < 1 else None
+    return {
+        "amdahl": {
+            "sigma": round(sigma_amdahl, 5),
+            "max_speedup": round(1 / sigma_amdahl, 2) if sigma_amdahl > 0 else None,
+            "r2": r2(lambda n: usl(n, sigma_amdahl, 0.0)),
+        },
+        "usl": {
+            "sigma": round(sigma, 5),
+            "kappa": round(kappa, 6),
+            "peak_workers": round(peak, 1) if peak else None,
+            "r2": r2(lambda n: usl(n, sigma, kappa)),
+        },
+    }
+
+
+def _stop_scaling(series, drop=0.9):
+    """第一个并行效率低于 drop 的工作进程数 (扩展开始明显变差的位置)，一直保持良好时返回 None"""
+    for point in series:
+        if point["workers"] > 1 and point["efficiency"] is not None and point["efficiency"] < drop:
+            return point["workers"]
+    return None
+
+
+def scaling_sweep(engine_factory, max_workers=None, targets=(100,), smt=("on", "off"), window=10.0,
+                  kernel=DEFAULT_KERNEL, executor="process", progress=None):
+    """运行扩展性扫描，返回 JSON 报告
+
+    engine_factory() 返回新的 StressEngine；每个点运行 window 秒，吞吐量取各工作进程平均 ops/s 之和。
+    超线程 off 的进程数上限为物理核心数；没有超线程的主机上 off 与 on 相同，只运行 on。
+    progress(point) 在每个点测完后调用。
+    """
+    limit = max_workers or usable_cpus()
+    candidates = {mode: candidate_cpus(SMT_MODES[mode]) for mode in smt}
+    if "on" in candidates and "off" in candidates and len(candidates["on"]) == len(candidates["off"]):
+        # 没有超线程
+        candidates.pop("off")
+    
+    series = []
+    for mode, cpus in candidates.items():
+        counts = worker_counts(min(limit, len(cpus)))
+        for target in targets:
+            points = []
+            for workers in counts:
+                engine = engine_factory()
+                started = time.time()
+                try:
+                    engine.start(window, workers=workers, max_usage=target, kernel=kernel,
+                                 placement=SMT_MODES[mode], executor=executor)
+                    engine.wait()
+                    summary = engine.summary()
+                finally:
+                    engine.close()
+                point = {
+                    "smt": mode,
+                    "target": target,
+                    "workers": workers,
+                    "cpus": sorted({c for c in engine.placement or []}),
+                    "ops_per_sec": summary["score"],
+                    "achieved": summary["achieved"],
+                    "elapsed": round(time.time() - started, 2),
+                }
+                base = points[0]["ops_per_sec"] if points else point["ops_per_sec"]
+                point["speedup"] = round(point["ops_per_sec"] / base, 3) if base else None
+                point["efficiency"] = round(point["speedup"] / workers, 3) if point["speedup"] else None
+                points.append(point)
+                if progress:
+                    progress(point)
+            fit = fit_scaling([(p["workers"], p["speedup"]) for p in points if p["speedup"]])
+            series.append({
+                "smt": mode,
+                "target": target,
+                "points": points,
+                "fit": fit,
+                "stops_scaling_at": _stop_scaling(points),
+            })
+    return {
+        "time": time.time(),
+        "kernel": kernel,
+        "executor": executor,
+        "window": window,
+        "max_workers": limit,
+        "series": series,
+    }
+
+
+def format_scaling(report):
+    """把扫描报告格式化为表格文本行"""
+    lines = []
+    for item in report["series"]:
+        lines.append(f"超线程 {item['smt']}  目标 {item['target']:g}%  内核 {report['kernel']}")
+        lines.append(f"{'进程数':>6}{'吞吐量 ops/s':>16}{'实际占用':>10}{'加速比':>9}{'效率':>8}")
+        for point in item["points"]:
+            achieved = f"{point['achieved']:.1f}%" if point["achieved"] is not None else "-"
+            speedup = f"{point['speedup']:.2f}x" if point["speedup"] is not None else "-"
+            efficiency = f"{point['efficiency'] * 100:.0f}%" if point["efficiency"] is not None else "-"
+            lines.append(f"{point['workers']:>6}{point['ops_per_sec']:>16,.1f}{achieved:>10}{speedup:>9}{efficiency:>8}")
+        fit = item["fit"]
+        if fit:
+            amdahl, usl = fit["amdahl"], fit["usl"]
+            limit = f"，加速比上限 {amdahl['max_speedup']:.1f}x" if amdahl["max_speedup"] else ""
+            lines.append(f"  Amdahl: 串行比例 σ={amdahl['sigma']:.4f}{limit} (R²={amdahl['r2']})")
+            peak = f"，峰值约在 {usl['peak_workers']:.1f} 个进程" if usl["peak_workers"] else ""
+            lines.append(f"  USL: σ={usl['sigma']:.4f} κ={usl['kappa']:.6f}{peak} (R²={usl['r2']})")
+        if item["stops_scaling_at"]:
+            lines.append(f"  ⚠️ 从 {item['stops_scaling_at']} 个进程开始并行效率低于 90%")
+        lines.append("")
+    return lines
@@ -0,0 +1,119 @@
+"""界面冷启动计时: 按阶段记录启动耗时，并检查可交互时间是否超出预算
+
+界面脚本在各阶段结束时调用 mark()，阶段耗时为相邻两次标记的间隔。界面记录的阶段依次为
+imports、window、services (cgroup 探测与日志管道)、widgets、interactive (首次进入空闲事件循环，
+窗口已绘制、可以响应操作) 和 first_sample (第一个采样显示到仪表盘)；预算检查的对象是 interactive 的累计耗时。
+压力测试引擎在第一次使用时才创建，不计入启动耗时。
+
+累计耗时从计时器创建 (脚本第一行) 算起，不含解释器自身和 PyInstaller 解包的时间。
+
+    python 代码小梓cpu压榨机.py --startup-timing          # 打印各阶段耗时
+    python -m cpupress startup-check --budget 3           # CI: 启动界面，可交互时间超出预算时返回非 0
+"""
+
+import json
+import os
+import subprocess
+import sys
+import time
+
+# 可交互时间的默认预算 (秒)
+DEFAULT_BUDGET = 3.0
+
+# 计时报告在输出中的前缀，便于从界面进程的输出中找到它
+REPORT_PREFIX = "CPUPRESS_STARTUP "
+
+# 界面脚本与 cpupress 包位于同一目录
+GUI_SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "代码小梓cpu压榨机.py")
+
+
+class StartupTimer:
+    """启动阶段计时器
+
+        timer = StartupTimer()             # 或传入更早记录的 started = time.perf_counter()
+        ...
+        timer.mark("imports")
+        timer.mark("window")
+        timer.report()     # {"phases": {"imports": 0.21, "window": 0.05}, "total": 0.26}
+    """
+    
+    def __init__(self, started=None, clock=time.perf_counter):
+        self.clock = clock
+        self.started = clock() if started is None else started
+        self.marks = []
+    
+    def mark(self, phase):
+        """记录一个阶段结束，同名阶段只记录第一次"""
+        if phase in self.phases():
+            return
+        self.marks.append((phase, self.clock()))
+    
+    def phases(self):
+        return [phase for phase, _ in self.marks]
+    
+    def elapsed(self, phase=None):
+        """从开始到 phase 结束 (不指定时为最后一个阶段) 的累计秒数，阶段未记录时返回 None"""
+        for name, at in reversed(self.marks):
+            if phase is None or name == phase:
+                return at - self.started
+        return None
+    
+    def report(self):
+        """各阶段耗时与累计耗时 (秒)"""
+        phases = {}
+        previous = self.started
+        for phase, at in self.marks:
+            phases[phase] = round(at - previous, 4)
+            previous = at
+        return {
+            "phases": phases,
+            "total": round(previous - self.started, 4),
+            "interactive": round(self.elapsed("interactive"), 4) if "interactive" in phases else None,
+        }
+
+
+def format_startup(report, budget=None):
+    """把计时报告格式化为文本行"""
+    lines = ["启动耗时:"]
+    cumulative = 0.0
+    for phase, seconds in report["phases"].items():
+        cumulative += seconds
+        lines.append(f"  {phase:<14}{seconds * 1000:>8.1f} ms   累计 {cumulative * 1000:>8.1f} ms")
+    interactive = report.get("interactive")
+    if budget is not None and interactive is not None:
+        verdict = "✅ 未超出" if interactive <= budget else "❌ 超出"
+        lines.append(f"  可交互时间 {interactive:.3f}s，预算 {budget:g}s，{verdict}")
+    return lines
+
+
+def parse_report(output):
+    """从界面进程的输出中取出计时报告，找不到时返回 None"""
+    for line in reversed(output.splitlines()):
+        if line.startswith(REPORT_PREFIX):
+            return json.loads(line[len(REPORT_PREFIX):])
+    return None
+
+
+def startup_check(script=GUI_SCRIPT, budget=DEFAULT_BUDGET, timeout=60.0, runs=1):
+    """在子进程中冷启动界面 runs 次，返回 (是否满足预算, 可交互时间最短的一次报告)
+
+    界面进程带 --startup-budget 参数运行，首个样本显示后自动退出。
+    无法启动 (缺少依赖、没有显示器) 时抛出 RuntimeError。
+    """
+    best = None
+    for _ in range(max(int(runs), 1)):
+        try:
+            result = subprocess.run(
+                [sys.executable, script, "--startup-budget", str(budget)],
+                capture_output=True, text=True, encoding="utf-8", errors="replace",
+                timeout=timeout, env=dict(os.environ, PYTHONIOENCODING="utf-8")
+            )
+        except subprocess.TimeoutExpired:
+            raise RuntimeError(f"界面在 {timeout:g} 秒内没有完成启动")
+        report = parse_report(result.stdout)
+        if report is None or report.get("interactive") is None:
+            detail = (result.stderr or result.stdout).strip().splitlines()
+            raise RuntimeError(f"界面启动失败 (退出码 {result.returncode}): {detail[-1] if detail else '无输出'}")
+        if best is None or report["interactive"] < best["interactive"]:
+            best = report
+    return best["interactive"] <= budget, best
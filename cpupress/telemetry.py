@@ -0,0 +1,164 @@
+"""遥测数据存储: 预分配的定长环形缓冲区与长时间序列的降采样"""
+
+from array import array
+
+
+class RingBuffer:
+    """多通道定长环形缓冲区
+
+    channels × capacity 个 double 在创建时一次性分配，append() 为 O(1)，
+    写满后覆盖最旧的数据，内存占用固定。每行附带一个时间戳。
+    """
+
+    def __init__(self, channels, capacity):
+        if channels <= 0 or capacity <= 0:
+            raise ValueError("通道数和容量必须大于0")
+        self.channels = channels
+        self.capacity = capacity
+        self.data = array("d", bytes(8 * channels * capacity))
+        self.times = array("d", bytes(8 * capacity))
+        self.head = 0
+        self.count = 0
+    
+    def __len__(self):
+        return self.count
+    
+    def append(self, timestamp, values):
+        """追加一行数据，values 的长度必须等于通道数"""
+        base = self.head * self.channels
+        self.data[base:base + self.channels] = array("d", values)
+        self.times[self.head] = timestamp
+        self.head = (self.head + 1) % self.capacity
+        if self.count < self.capacity:
+            self.count += 1
+    
+    def _index(self, i):
+        """第 i 行 (0 为最旧) 在缓冲区中的位置"""
+        if not -self.count <= i < self.count:
+            raise IndexError("环形缓冲区下标越界")
+        if i < 0:
+            i += self.count
+        return (self.head - self.count + i) % self.capacity
+    
+    def row(self, i):
+        """返回第 i 行 (时间戳, 数值列表)，支持负下标"""
+        pos = self._index(i)
+        base = pos * self.channels
+        return self.times[pos], self.data[base:base + self.channels].tolist()
+    
+    def latest(self):
+        """最新一行，缓冲区为空时返回 None"""
+        return self.row(-1) if self.count else None
+    
+    def channel(self, c, last=None):
+        """按时间顺序返回某个通道的数据，last 限制只取最近的若干个"""
+        n = self.count if last is None else min(last, self.count)
+        return [self.data[self._index(i) * self.channels + c] for i in range(self.count - n, self.count)]
+    
+    def timestamps(self, last=None):
+        """按时间顺序返回时间戳"""
+        n = self.count if last is None else min(last, self.count)
+        return [self.times[self._index(i)] for i in range(self.count - n, self.count)]
+    
+    def clear(self):
+        self.head = 0
+        self.count = 0
+
+
+def lttb(times, values, threshold):
+    """Largest-Triangle-Three-Buckets 降采样，返回 (时间列表, 数值列表)
+
+    保留首尾两点，中间每个桶选出与前一个选中点、下一个桶平均点构成三角形面积最大的点，
+    峰谷和突变在降采样后仍然可见。
+    """
+    n = len(values)
+    if threshold >= n or threshold < 3:
+        return list(times), list(values)
+    every = (n - 2) / (threshold - 2)
+    out_times = [times[0]]
+    out_values = [values[0]]
+    a = 0
+    for i in range(threshold - 2):
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+        # 下一个桶的平均点，最后一个桶用终点
+        if end < next_end and i < threshold - 3:
+            count = next_end - end
+            avg_t = sum(times[end:next_end]) / count
+            avg_v = sum(values[end:next_end]) / count
+        else:
+            avg_t, avg_v = times[n - 1], values[n - 1]
+        ax, ay = times[a], values[a]
+        dx, dy = ax - avg_t, avg_v - ay
+        best_area = -1.0
+        best = start
+        for j in range(start, end):
+            area = abs(dx * (values[j] - ay) - (ax - times[j]) * dy)
+            if area > best_area:
+                best_area = area
+                best = j
+        out_times.append(times[best])
+        out_values.append(values[best])
+        a = best
+    out_times.append(times[n - 1])
+    out_values.append(values[n - 1])
+    return out_times, out_values
+
+
+class DownsampledSeries:
+    """长时间运行的单通道时间序列，内存占用有上限
+
+    第 0 级保存最近 capacity 个原始点；某一级超过 capacity 时，把最旧的 block 个点
+    用 LTTB 压缩为 block // factor 个点移入下一级。最后一级超过 capacity 时就地压缩最旧的一块，
+    越早的数据分辨率越低，总点数不超过 levels × capacity，覆盖的时长不受限制。
+    """
+
+    def __init__(self, capacity=512, block=128, factor=8, levels=4):
+        if not 0 < block <= capacity or factor < 2 or levels < 1:
+            raise ValueError("参数必须满足 0 < block <= capacity、factor >= 2、levels >= 1")
+        self.capacity = capacity
+        self.block = block
+        self.factor = factor
+        self.levels = [(array("d"), array("d")) for _ in range(levels)]
+        # 旧数据每被压缩一次加一，图表据此判断缓存是否失效
+        self.version = 0
+    
+    def __len__(self):
+        return sum(len(times) for times, _ in self.levels)
+    
+    def append(self, timestamp, value):
+        times, values = self.levels[0]
+        times.append(timestamp)
+        values.append(value)
+        level = 0
+        while level < len(self.levels) and len(self.levels[level][0]) > self.capacity:
+            self._compact(level)
+            level += 1
+    
+    def _compact(self, level):
+        times, values = self.levels[level]
+        kept_t, kept_v = lttb(times[:self.block], values[:self.block], max(self.block // self.factor, 3))
+        del times[:self.block]
+        del values[:self.block]
+        if level + 1 < len(self.levels):
+            self.levels[level + 1][0].extend(kept_t)
+            self.levels[level + 1][1].extend(kept_v)
+        else:
+            times[0:0] = array("d", kept_t)
+            values[0:0] = array("d", kept_v)
+        self.version += 1
+    
+    def points(self):
+        """按时间顺序返回全部点 (时间列表, 数值列表)"""
+        times, values = [], []
+        for level_times, level_values in reversed(self.levels):
+            times.extend(level_times)
+            values.extend(level_values)
+        return times, values
+    
+    def clear(self):
+        for times, values in self.levels:
+            del times[:]
+            del values[:]
+        self.version += 1
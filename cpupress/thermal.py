@@ -0,0 +1,189 @@
+"""频率、温度与降频计数采集，以及降频事件检测
+
+数据来源按平台逐级退化，缺少的传感器返回 None 而不是报错:
+
+- 频率: psutil.cpu_freq(percpu=True)，否则读 cpu*/cpufreq/scaling_cur_freq
+- 温度: psutil.sensors_temperatures()，否则读 class/thermal/thermal_zone*/temp
+- 降频计数: cpu*/thermal_throttle/{core,package}_throttle_count (Linux x86)
+
+sysfs_root 可以指向伪造的目录树，此时默认不使用 psutil，只读该目录。
+"""
+
+import glob
+import os
+import re
+
+
+def _read_number(path):
+    try:
+        with open(path) as f:
+            return float(f.read().strip())
+    except (OSError, ValueError):
+        return None
+
+
+class ThermalProbe:
+    """读取 CPU 频率、温度和降频计数"""
+
+    def __init__(self, sysfs_root="/sys", use_psutil=None):
+        self.sysfs_root = sysfs_root
+        self.use_psutil = (sysfs_root == "/sys") if use_psutil is None else use_psutil
+        self.cpu_dir = os.path.join(sysfs_root, "devices", "system", "cpu")
+    
+    def _cpu_paths(self, relative):
+        """按 CPU 编号排序的 cpu*/relative 路径"""
+        paths = glob.glob(os.path.join(self.cpu_dir, "cpu[0-9]*", relative))
+        return sorted(paths, key=lambda p: int(re.match(r"cpu(\d+)", os.path.relpath(p, self.cpu_dir)).group(1)))
+    
+    def read_frequencies(self):
+        """各逻辑CPU当前频率 (MHz)，不可用时返回 None"""
+        if self.use_psutil:
+            try:
+                import psutil
+                
+                freqs = psutil.cpu_freq(percpu=True)
+                if freqs:
+                    return [f.current for f in freqs]
+            except Exception:
+                pass
+        values = [_read_number(p) for p in self._cpu_paths(os.path.join("cpufreq", "scaling_cur_freq"))]
+        values = [v / 1000 for v in values if v is not None]
+        return values or None
+    
+    def read_temperatures(self):
+        """各温度传感器读数 {名称: 摄氏度}，不可用时返回 None"""
+        if self.use_psutil:
+            try:
+                import psutil
+                
+                sensors = psutil.sensors_temperatures() if hasattr(psutil, "sensors_temperatures") else {}
+                result = {}
+                for chip, entries in sensors.items():
+                    for i, entry in enumerate(entries):
+                        if entry.current is not None:
+                            result[f"{chip}/{entry.label or i}"] = entry.current
+                if result:
+                    return result
+            except Exception:
+                pass
+        result = {}
+        for zone in sorted(glob.glob(os.path.join(self.sysfs_root, "class", "thermal", "thermal_zone*"))):
+            value = _read_number(os.path.join(zone, "temp"))
+            if value is not None:
+                name = os.path.basename(zone)
+                try:
+                    with open(os.path.join(zone, "type")) as f:
+                        name = f"{name}/{f.read().strip()}"
+                except OSError:
+                    pass
+                result[name] = value / 1000
+        return result or None
+    
+    def read_throttle_counts(self):
+        """累计降频次数 {"core": 各核心之和, "package": 各插槽之和}，不可用时返回 None"""
+        core = self._cpu_paths(os.path.join("thermal_throttle", "core_throttle_count"))
+        if not core:
+            return None
+        core_total = sum(v for v in map(_read_number, core) if v is not None)
+        
+        # 同一插槽的所有 CPU 报告相同的 package 计数，按数值去重前先按插槽分组
+        packages = {}
+        for path in self._cpu_paths(os.path.join("thermal_throttle", "package_throttle_count")):
+            cpu_path = os.path.dirname(os.path.dirname(path))
+            package = _read_number(os.path.join(cpu_path, "topology", "physical_package_id"))
+            value = _read_number(path)
+            if value is not None:
+                packages[package] = value
+        return {"core": int(core_total), "package": int(sum(packages.values()))}
+    
+    def sample(self):
+        """采集一次，返回可直接并入 CPU 样本的字段"""
+        freqs = self.read_frequencies()
+        temps = self.read_temperatures()
+        throttle = self.read_throttle_counts()
+        return {
+            "freq_mhz": round(sum(freqs) / len(freqs), 1) if freqs else None,
+            "freq_percpu": freqs,
+            "temp_c": max(temps.values()) if temps else None,
+            "temperatures": temps,
+            "throttle_core": throttle["core"] if throttle else None,
+            "throttle_package": throttle["package"] if throttle else None,
+        }
+
+
+class ThrottleDetector:
+    """降频事件检测
+
+    CPU 满载 (占用率 ≥ busy_threshold) 时记录频率和吞吐量的峰值作为基准；
+    若满载期间频率或吞吐量比基准低 drop_ratio 以上，或内核降频计数增加，
+    判定为降频。进入和退出降频状态时各产生一个事件。
+    """
+
+    def __init__(self, busy_threshold=95.0, drop_ratio=0.10, confirm=3):
+        self.busy_threshold = busy_threshold
+        self.drop_ratio = drop_ratio
+        self.confirm = confirm
+        self.reset()
+    
+    def reset(self):
+        self.peak_freq = None
+        self.peak_ops = None
+        self.last_counts = None
+        self.suspect = 0
+        self.throttled = False
+        self.events = []
+    
+    def update(self, sample):
+        """送入一个样本 (需含 time、cpu，可含 freq_mhz、ops_per_sec、throttle_*)，返回新事件或 None"""
+        reasons = []
+        counts = (sample.get("throttle_core"), sample.get("throttle_package"))
+        if self.last_counts is not None and None not in counts and None not in self.last_counts:
+            if counts[0] > self.last_counts[0] or counts[1] > self.last_counts[1]:
+                reasons.append(f"内核降频计数增加 {counts[0] - self.last_counts[0]}/{counts[1] - self.last_counts[1]}")
+        self.last_counts = counts
+        
+        busy = sample.get("cpu") is not None and sample["cpu"] >= self.busy_threshold
+        freq = sample.get("freq_mhz")
+        ops = sample.get("ops_per_sec")
+        if busy:
+            if freq:
+                if self.peak_freq and freq < self.peak_freq * (1 - self.drop_ratio):
+                    reasons.append(f"频率 {freq:.0f}MHz 低于峰值 {self.peak_freq:.0f}MHz")
+                self.peak_freq = max(self.peak_freq or 0, freq)
+            if ops:
+                if self.peak_ops and ops < self.peak_ops * (1 - self.drop_ratio):
+                    reasons.append(f"吞吐量 {ops:,.0f} ops/s 低于峰值 {self.peak_ops:,.0f} ops/s")
+                self.peak_ops = max(self.peak_ops or 0, ops)
+        
+        # 连续 confirm 个样本异常才判定为降频，计数增加则立即判定
+        if reasons:
+            self.suspect += 1
+        else:
+            self.suspect = 0
+        counter_hit = any(r.startswith("内核") for r in reasons)
+        event = None
+        if not self.throttled and (counter_hit or self.suspect >= self.confirm):
+            self.throttled = True
+            event = {"time": sample.get("time"), "type": "throttle_start", "reasons": reasons,
+                     "cpu": sample.get("cpu"), "freq_mhz": freq, "temp_c": sample.get("temp_c"), "ops_per_sec": ops}
+        elif self.throttled and not reasons and busy:
+            self.throttled = False
+            event = {"time": sample.get("time"), "type": "throttle_end", "reasons": [],
+                     "cpu": sample.get("cpu"), "freq_mhz": freq, "temp_c": sample.get("temp_c"), "ops_per_sec": ops}
+        if event:
+            self.events.append(event)
+        return event
+
+
+def describe_event(event):
+    """降频事件 (含 cgroup 配额节流事件) 的说明文字"""
+    if event["type"] == "cgroup_throttle_start":
+        seconds = f"，节流 {event['seconds']:.2f} 秒" if event.get("seconds") is not None else ""
+        return f"⏳ 检测到 cgroup 配额节流: {event['periods']} 个调度周期被节流{seconds}"
+    if event["type"] == "cgroup_throttle_end":
+        return "✅ cgroup 配额节流已停止"
+    if event["type"] == "throttle_start":
+        detail = "；".join(event["reasons"])
+        temp = f"，温度 {event['temp_c']:.0f}°C" if event.get("temp_c") is not None else ""
+        return f"🔥 检测到降频: {detail}{temp}"
+    return "✅ 降频已恢复"
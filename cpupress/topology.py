@@ -0,0 +1,195 @@
+"""CPU 拓扑读取与工作进程绑核策略
+
+拓扑信息来自 /sys/devices/system/cpu/cpu*/topology (Linux)，其他平台或读取失败时
+退化为每个逻辑 CPU 各自成为一个物理核心。sysfs_root 参数可以指向伪造的目录树。
+"""
+
+import os
+
+# 绑核策略
+PLACEMENT_POLICIES = {
+    "none": "不绑核，由系统调度",
+    "spread": "优先分散到不同物理核心和CPU插槽",
+    "compact": "依次填满每个物理核心的所有超线程",
+    "physical": "每个物理核心只使用一个逻辑CPU",
+    "list": "使用指定的核心列表",
+}
+
+
+def parse_cpu_list(text):
+    """解析 "0-3,8,10-11" 格式的核心列表"""
+    cpus = []
+    for part in str(text).replace(" ", "").split(","):
+        if not part:
+            continue
+        if "-" in part:
+            start, end = part.split("-", 1)
+            cpus.extend(range(int(start), int(end) + 1))
+        else:
+            cpus.append(int(part))
+    return cpus
+
+
+def format_cpu_list(cpus):
+    """把核心编号压缩成 "0-3,8" 格式"""
+    cpus = sorted(set(cpus))
+    parts = []
+    i = 0
+    while i < len(cpus):
+        j = i
+        while j + 1 < len(cpus) and cpus[j + 1] == cpus[j] + 1:
+            j += 1
+        parts.append(str(cpus[i]) if i == j else f"{cpus[i]}-{cpus[j]}")
+        i = j + 1
+    return ",".join(parts)
+
+
+def _read(path):
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def allowed_cpus():
+    """当前进程允许运行的逻辑CPU"""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def read_topology(sysfs_root="/sys"):
+    """读取CPU拓扑，返回 [{cpu, core, package, siblings}]，按 cpu 排序"""
+    cpu_dir = os.path.join(sysfs_root, "devices", "system", "cpu")
+    online = _read(os.path.join(cpu_dir, "online"))
+    cpus = parse_cpu_list(online) if online else list(range(os.cpu_count() or 1))
+    
+    topology = []
+    for cpu in cpus:
+        base = os.path.join(cpu_dir, f"cpu{cpu}", "topology")
+        core = _read(os.path.join(base, "core_id"))
+        package = _read(os.path.join(base, "physical_package_id"))
+        siblings = _read(os.path.join(base, "thread_siblings_list"))
+        topology.append({
+            "cpu": cpu,
+            "core": int(core) if core is not None else cpu,
+            "package": int(package) if package is not None else 0,
+            "siblings": parse_cpu_list(siblings) if siblings else [cpu],
+        })
+    return topology
+
+
+def read_cache_sizes(sysfs_root="/sys", cpu=0):
+    """读取数据缓存与统一缓存的大小，返回按层级排序的 [(层级, 字节数)]，读取失败时返回空列表"""
+    cache_dir = os.path.join(sysfs_root, "devices", "system", "cpu", f"cpu{cpu}", "cache")
+    try:
+        entries = sorted(name for name in os.listdir(cache_dir) if name.startswith("index"))
+    except OSError:
+        return []
+    caches = []
+    for name in entries:
+        base = os.path.join(cache_dir, name)
+        level, kind, size = (_read(os.path.join(base, key)) for key in ("level", "type", "size"))
+        if not level or not size or kind == "Instruction":
+            continue
+        units = {"K": 1 << 10, "M": 1 << 20, "G": 1 << 30}
+        multiplier = units.get(size[-1].upper(), 1)
+        caches.append((int(level), int(size.rstrip("KMGkmg")) * multiplier))
+    return sorted(caches)
+
+
+def physical_cores(topology):
+    """按 (插槽, 核心) 分组，返回 [[该物理核心的逻辑CPU...], ...]"""
+    cores = {}
+    for entry in topology:
+        cores.setdefault((entry["package"], entry["core"]), []).append(entry["cpu"])
+    return [sorted(cores[key]) for key in sorted(cores)]
+
+
+def candidate_cpus(policy, cpu_list=None, topology=None, allowed=None):
+    """按策略排好序的候选逻辑CPU列表，policy 为 none 时返回 None"""
+    if policy not in PLACEMENT_POLICIES:
+        raise ValueError(f"未知的绑核策略: {policy} (可选: {', '.join(PLACEMENT_POLICIES)})")
+    if policy == "none":
+        return None
+    
+    allowed = set(allowed_cpus() if allowed is None else allowed)
+    if policy == "list":
+        cpus = parse_cpu_list(cpu_list) if isinstance(cpu_list, str) else list(cpu_list or [])
+        invalid = [c for c in cpus if c not in allowed]
+        if not cpus:
+            raise ValueError("list 策略需要指定核心列表")
+        if invalid:
+            raise ValueError(f"核心 {format_cpu_list(invalid)} 不可用")
+        return cpus
+    
+    topology = read_topology() if topology is None else topology
+    cores = [[c for c in core if c in allowed] for core in physical_cores(topology)]
+    cores = [core for core in cores if core]
+    if policy == "compact":
+        return [cpu for core in cores for cpu in core]
+    if policy == "physical":
+        return [core[0] for core in cores]
+    
+    # spread: 各插槽轮流取一个物理核心，先用完所有核心的第一个线程再用超线程
+    packages = {}
+    for entry in topology:
+        packages.setdefault(entry["cpu"], entry["package"])
+    by_package = {}
+    for core in cores:
+        by_package.setdefault(packages[core[0]], []).append(core)
+    ordered_cores = []
+    queues = [by_package[k] for k in sorted(by_package)]
+    while any(queues):
+        for q in queues:
+            if q:
+                ordered_cores.append(q.pop(0))
+    depth = max(len(core) for core in ordered_cores)
+    return [core[level] for level in range(depth) for core in ordered_cores if level < len(core)]
+
+
+def plan_placement(workers, policy, cpu_list=None, topology=None, allowed=None):
+    """为每个工作进程分配一个逻辑CPU，进程数多于候选CPU时循环使用；不绑核返回 None"""
+    cpus = candidate_cpus(policy, cpu_list, topology, allowed)
+    if cpus is None:
+        return None
+    return [cpus[i % len(cpus)] for i in range(workers)]
+
+
+def pin_to_cpu(cpu):
+    """把当前进程绑定到指定逻辑CPU，成功返回 True"""
+    return set_affinity([cpu])
+
+
+def set_affinity(cpus):
+    """设置当前进程允许运行的CPU集合，平台不支持时返回 False"""
+    if hasattr(os, "sched_setaffinity"):
+        try:
+            os.sched_setaffinity(0, set(cpus))
+            return True
+        except OSError:
+            return False
+    try:
+        import psutil
+        
+        psutil.Process().cpu_affinity(list(cpus))
+        return True
+    except Exception:
+        return False
+
+
+def describe_placement(placement, topology=None):
+    """生成绑核结果的说明文字列表"""
+    if placement is None:
+        return ["不绑核，由系统调度"]
+    topology = read_topology() if topology is None else topology
+    info = {entry["cpu"]: entry for entry in topology}
+    lines = []
+    for worker_id, cpu in enumerate(placement):
+        entry = info.get(cpu)
+        if entry:
+            lines.append(f"进程 {worker_id} -> CPU {cpu} (插槽 {entry['package']} 核心 {entry['core']})")
+        else:
+            lines.append(f"进程 {worker_id} -> CPU {cpu}")
+    return lines
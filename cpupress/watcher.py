@@ -0,0 +1,61 @@
+"""运行完成监视线程
+
+监视线程阻塞在工作进程的 sentinel (进程池模式下为完成管道) 上，
+所有工作进程结束的瞬间调用回调，不再需要定时轮询 is_alive()。
+"""
+
+import multiprocessing
+import multiprocessing.connection
+import threading
+
+
+class CompletionWatcher(threading.Thread):
+    """等待所有工作进程结束后调用 callback
+
+    waitables() 返回当前仍需等待的对象列表，返回空列表表示全部结束。
+    callback 在监视线程中执行，GUI 需要自行转交到界面线程处理。
+    调用 cancel() 后线程立即退出且不再调用 callback。
+    """
+
+    def __init__(self, waitables, callback):
+        super().__init__(daemon=True)
+        self.waitables = waitables
+        self.callback = callback
+        self.cancelled = False
+        self._wake_r, self._wake_w = multiprocessing.Pipe(duplex=False)
+
+    def run(self):
+        try:
+            while not self.cancelled:
+                pending = self.waitables()
+                if not pending:
+                    break
+                ready = multiprocessing.connection.wait(pending + [self._wake_r])
+                if self._wake_r in ready:
+                    return
+        finally:
+            self._wake_r.close()
+        if not self.cancelled:
+            self.callback()
+
+    def cancel(self):
+        """取消监视"""
+        self.cancelled = True
+        try:
+            self._wake_w.send_bytes(b"x")
+        except (OSError, ValueError):
+            pass
+        finally:
+            self._wake_w.close()
+
+
+def sentinel_waitables(processes):
+    """冷启动模式: 返回仍在运行的进程 sentinel (只检查 sentinel，不与主线程争抢 waitpid)"""
+    pending = [p.sentinel for p in processes]
+
+    def waitables():
+        if pending:
+            done = set(multiprocessing.connection.wait(pending, 0))
+            pending[:] = [s for s in pending if s not in done]
+        return list(pending)
+    return waitables
@@ -0,0 +1,90 @@
+"""CgroupProbe 与 CgroupThrottleDetector: 使用伪造的 cgroup v1/v2 目录树"""
+
+import os
+
+from cpupress.cgroup import CgroupProbe, CgroupThrottleDetector, usable_cpus
+
+
+def write(root, relative, value):
+    path = os.path.join(root, relative)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(f"{value}\n")
+
+
+def probe(tmp_path):
+    return CgroupProbe(cgroup_root=str(tmp_path / "cgroup"), proc_root=str(tmp_path / "proc"))
+
+
+def test_v2_quota_and_stat(tmp_path):
+    root = str(tmp_path)
+    write(root, "proc/self/cgroup", "0::/app/worker")
+    write(root, "cgroup/cgroup.controllers", "cpu memory")
+    write(root, "cgroup/app/cpu.max", "150000 100000")
+    write(root, "cgroup/app/worker/cpu.max", "max 100000")
+    write(root, "cgroup/app/worker/cpu.stat",
+          "usage_usec 2500000\nuser_usec 2000000\nnr_periods 40\nnr_throttled 7\nthrottled_usec 350000")
+    cgroup = probe(tmp_path)
+    assert cgroup.version == 2
+    assert cgroup.cpu_dir == os.path.join(root, "cgroup", "app", "worker")
+    # 本级不受限，取上一级的配额
+    assert cgroup.quota == 1.5
+    assert cgroup.read_stat() == {
+        "nr_periods": 40, "nr_throttled": 7, "throttled_seconds": 0.35, "usage_seconds": 2.5,
+    }
+    sample = cgroup.sample()
+    assert sample["cgroup_usage"] is None
+    assert sample["cgroup_throttled"] == 7
+    assert usable_cpus(cgroup) == 1
+
+
+def test_v1_quota_and_stat(tmp_path):
+    root = str(tmp_path)
+    write(root, "proc/self/cgroup", "5:memory:/docker/abc\n4:cpu,cpuacct:/docker/abc")
+    mount = os.path.join("cgroup", "cpu,cpuacct")
+    write(root, os.path.join(mount, "cpu.cfs_quota_us"), -1)
+    write(root, os.path.join(mount, "cpu.cfs_period_us"), 100000)
+    write(root, os.path.join(mount, "cpuacct.usage"), 0)
+    write(root, os.path.join(mount, "docker", "abc", "cpu.cfs_quota_us"), 50000)
+    write(root, os.path.join(mount, "docker", "abc", "cpu.cfs_period_us"), 100000)
+    write(root, os.path.join(mount, "docker", "abc", "cpu.stat"), "nr_periods 10\nnr_throttled 3\nthrottled_time 120000000")
+    write(root, os.path.join(mount, "docker", "abc", "cpuacct.usage"), 4000000000)
+    cgroup = probe(tmp_path)
+    assert cgroup.version == 1
+    assert cgroup.quota == 0.5
+    assert cgroup.read_stat() == {
+        "nr_periods": 10, "nr_throttled": 3, "throttled_seconds": 0.12, "usage_seconds": 4.0,
+    }
+    assert usable_cpus(cgroup) == 1
+
+
+def test_v1_path_outside_namespace_falls_back_to_mount(tmp_path):
+    root = str(tmp_path)
+    write(root, "proc/self/cgroup", "3:cpu:/kubepods/pod1/c1\n2:cpuacct:/kubepods/pod1/c1")
+    write(root, "cgroup/cpu/cpu.cfs_quota_us", 200000)
+    write(root, "cgroup/cpu/cpu.cfs_period_us", 100000)
+    cgroup = probe(tmp_path)
+    assert cgroup.cpu_dir == os.path.join(root, "cgroup", "cpu")
+    assert cgroup.cpuacct_dir is None
+    assert cgroup.quota == 2.0
+    assert cgroup.read_stat()["usage_seconds"] is None
+
+
+def test_no_cgroup(tmp_path):
+    cgroup = probe(tmp_path)
+    assert not cgroup.available
+    assert cgroup.quota is None
+    assert cgroup.sample() == {}
+
+
+def test_throttle_detector():
+    detector = CgroupThrottleDetector(confirm=2)
+    assert detector.update({"time": 0, "cgroup_throttled": 5, "cgroup_throttled_seconds": 1.0}) is None
+    event = detector.update({"time": 1, "cgroup_throttled": 8, "cgroup_throttled_seconds": 1.25, "cgroup_usage": 99.0})
+    assert event["type"] == "cgroup_throttle_start"
+    assert event["periods"] == 3
+    assert event["seconds"] == 0.25
+    assert detector.update({"time": 2, "cgroup_throttled": 8, "cgroup_throttled_seconds": 1.25}) is None
+    event = detector.update({"time": 3, "cgroup_throttled": 8, "cgroup_throttled_seconds": 1.25, "cgroup_usage": 40.0})
+    assert event["type"] == "cgroup_throttle_end"
+    assert detector.totals() == {"throttled": 3, "throttled_seconds": 0.25, "usage": 69.5}
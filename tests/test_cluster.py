@@ -0,0 +1,72 @@
+"""两个本机 agent 与 coordinator 的完整往返"""
+
+import threading
+
+import pytest
+
+from cpupress.cluster import Agent, Coordinator, remote_profile_dir
+
+
+@pytest.fixture
+def agents(tmp_path, monkeypatch):
+    monkeypatch.setenv("CPUPRESS_HOME", str(tmp_path))
+    started = []
+    for _ in range(2):
+        agent = Agent(port=0, interval=0.1, sysfs_root=str(tmp_path))
+        threading.Thread(target=agent.serve_forever, daemon=True).start()
+        started.append(agent)
+    yield started
+    for agent in started:
+        agent.shutdown()
+
+
+def addresses(agents):
+    return [f"{host}:{port}" for host, port in (agent.address for agent in agents)]
+
+
+def test_coordinator_round_trip(agents):
+    coordinator = Coordinator(addresses(agents))
+    try:
+        hello = coordinator.connect()
+        assert len(hello) == 2
+        assert all(info["cpus"] >= 1 for info in hello.values())
+        
+        replies = coordinator.start(1.0, delay=0.2, workers=1, max_usage=30)
+        assert all(reply["ok"] for reply in replies.values())
+        assert coordinator.skew is not None
+        assert coordinator.wait(timeout=20)
+        
+        summaries = coordinator.summaries()
+        assert len(summaries) == 2
+        assert all(summary and summary["stop_reason"] == "completed" for summary in summaries.values())
+        
+        aggregate = coordinator.telemetry()
+        assert aggregate["connected"] == 2
+        assert aggregate["running"] == 0
+    finally:
+        coordinator.close()
+
+
+def test_agent_survives_coordinator_disconnect(agents):
+    first = Coordinator(addresses(agents))
+    first.connect()
+    first.close()
+    
+    # 断开的连接被退订，遥测线程仍在运行，新的 coordinator 可以正常使用
+    second = Coordinator(addresses(agents))
+    try:
+        second.connect()
+        assert second.start(0.5, delay=0.2, workers=1, max_usage=30)
+        assert second.wait(timeout=20)
+    finally:
+        second.close()
+    for agent in agents:
+        assert agent._telemetry_thread.is_alive()
+
+
+def test_remote_profile_dir_stays_under_data_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("CPUPRESS_HOME", str(tmp_path))
+    assert remote_profile_dir("run1") == str(tmp_path / "profiles" / "run1")
+    for name in ("/etc", "../outside", "a/../../b", "a\\..\\b"):
+        with pytest.raises(ValueError):
+            remote_profile_dir(name)
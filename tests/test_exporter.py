@@ -0,0 +1,38 @@
+"""指标端点: 唤醒延迟的 summary 指标族与 stop() 的关闭顺序"""
+
+import urllib.request
+from types import SimpleNamespace
+
+from cpupress.exporter import MetricsExporter, render_metrics
+from cpupress.latency import LatencyHistogram
+
+
+def fake_engine(latencies=()):
+    histogram = LatencyHistogram()
+    for value in latencies:
+        histogram.record(value)
+    probe = SimpleNamespace(running=True, histogram=histogram)
+    return SimpleNamespace(running=False, latency_probe=probe)
+
+
+def test_wakeup_latency_is_a_summary():
+    # 小于 64ns 的值各占一个桶，分位数是精确值
+    engine = fake_engine([10, 20, 30, 40])
+    for openmetrics in (True, False):
+        lines = render_metrics(engine, openmetrics=openmetrics).splitlines()
+        assert "# TYPE cpupress_wakeup_latency_seconds summary" in lines
+        assert 'cpupress_wakeup_latency_seconds{quantile="0.5"} 2e-08' in lines
+        assert 'cpupress_wakeup_latency_seconds{quantile="0.999"} 4e-08' in lines
+        assert "cpupress_wakeup_latency_seconds_sum 1e-07" in lines
+        assert "cpupress_wakeup_latency_seconds_count 4.0" in lines
+    # 没有数据时不输出
+    assert "wakeup" not in render_metrics(fake_engine())
+
+
+def test_stop_releases_engine_after_server():
+    exporter = MetricsExporter(fake_engine([1000]), port=0).start()
+    with urllib.request.urlopen(exporter.url, timeout=5) as response:
+        assert b"cpupress_wakeup_latency_seconds_count 1.0" in response.read()
+    exporter.stop()
+    assert exporter.engine is None
+    assert exporter._thread is None
@@ -0,0 +1,61 @@
+"""LatencyHistogram: 对数分桶的下标、区间与分位数计算"""
+
+import random
+from multiprocessing.sharedctypes import RawArray
+
+from cpupress.latency import BUCKET_COUNT, HALF_BUCKETS, SUB_BUCKETS, LatencyHistogram, bucket_index, bucket_range
+
+
+def test_bucket_range_contains_value():
+    values = list(range(0, 5000)) + [random.Random(1).randrange(1 << 39) for _ in range(2000)]
+    previous = 0
+    for value in sorted(values):
+        index = bucket_index(value)
+        low, high = bucket_range(index)
+        assert low <= value <= high
+        # 下标随数值单调不减，桶宽相对误差不超过 1/HALF_BUCKETS
+        assert index >= previous
+        assert high - low + 1 <= max(low // HALF_BUCKETS, 1)
+        previous = index
+
+
+def test_small_values_are_exact_and_large_values_clamp():
+    for value in range(SUB_BUCKETS):
+        assert bucket_range(bucket_index(value)) == (value, value)
+    assert bucket_index(-5) == 0
+    assert bucket_index(1 << 45) == BUCKET_COUNT - 1
+
+
+def test_percentiles():
+    histogram = LatencyHistogram()
+    assert histogram.percentile(99.0) is None
+    assert histogram.summary() == {"count": 0}
+    
+    for value in range(1, 1001):
+        histogram.record(value * 1000)
+    assert histogram.count == 1000
+    values = histogram.percentiles((50.0, 99.0, 100.0))
+    # 取所在桶的上界，误差在一个桶宽以内，且不超过最大值
+    for p, exact in ((50.0, 500000), (99.0, 990000)):
+        assert exact <= values[p] <= exact + exact // HALF_BUCKETS
+    assert values[100.0] == 1000000
+    
+    summary = histogram.summary((50.0, 99.0))
+    assert summary["count"] == 1000
+    assert summary["min_us"] == 1.0
+    assert summary["max_us"] == 1000.0
+    assert summary["mean_us"] == 500.5
+    assert 500.0 <= summary["p50_us"] <= 516.0
+
+
+def test_shared_arrays_and_reset():
+    counts, totals = RawArray("q", BUCKET_COUNT), RawArray("q", 4)
+    writer = LatencyHistogram(counts, totals)
+    for value in (10, 20, 30):
+        writer.record(value)
+    reader = LatencyHistogram(counts, totals)
+    assert reader.count == 3
+    assert reader.percentile(50.0) == 20
+    writer.reset()
+    assert reader.count == 0
+    assert reader.percentile(50.0) is None
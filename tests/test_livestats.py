@@ -0,0 +1,64 @@
+"""LiveStats 与 LiveSlot: 共享内存记录的写入与一致读取"""
+
+import pytest
+
+from cpupress.livestats import FINISHED, RUNNING, SEQ, LiveSlot, LiveStats
+
+
+@pytest.fixture
+def stats():
+    stats = LiveStats(4)
+    yield stats
+    stats.close()
+
+
+def test_record_round_trip(stats):
+    assert stats.read(0) is None
+    assert stats.snapshot() == {}
+    
+    slot = LiveSlot(stats.name, 2, started=100.0)
+    try:
+        slot.publish(RUNNING, iterations=500, busy=1.5, cpu_time=1.25, sleep=0.5, target=75.0, ops_per_sec=333.3)
+        record = stats.read(2)
+        assert record["worker"] == 2
+        assert record["state"] == "running"
+        assert record["iterations"] == 500
+        assert record["busy"] == 1.5
+        assert record["cpu_time"] == 1.25
+        assert record["sleep"] == 0.5
+        assert record["started_at"] == 100.0
+        assert record["target"] == 75.0
+        # 没有测量值时以 NaN 存放，读出为 None
+        assert record["achieved"] is None
+        assert record["ops_per_sec"] == 333.3
+        
+        slot.publish(FINISHED, iterations=600, achieved=74.987)
+        record = stats.read(2)
+        assert record["state"] == "finished"
+        assert record["achieved"] == 74.99
+        # 每次写入序号加 2，保持偶数
+        assert slot.seq == 4
+        assert list(stats.snapshot()) == [2]
+    finally:
+        slot.close()
+    
+    stats.reset()
+    assert stats.snapshot() == {}
+
+
+def test_read_skips_record_being_written(stats):
+    slot = LiveSlot(stats.name, 0)
+    try:
+        slot.publish(RUNNING, iterations=1)
+        # 奇数序号表示写入方正在写，读取方重试后放弃
+        SEQ.pack_into(stats.shm.buf, 0, slot.seq + 1)
+        assert stats.read(0) is None
+    finally:
+        slot.close()
+
+
+def test_slot_outside_capacity(stats):
+    with pytest.raises(ValueError):
+        LiveSlot(stats.name, 4)
+    with pytest.raises(ValueError):
+        LiveStats(0)
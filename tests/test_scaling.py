@@ -0,0 +1,51 @@
+"""fit_scaling: 由已知参数生成的扩展曲线应拟合回原参数"""
+
+import math
+
+import pytest
+
+from cpupress.scaling import fit_scaling, worker_counts
+
+
+def usl(n, sigma, kappa):
+    return n / (1 + sigma * (n - 1) + kappa * n * (n - 1))
+
+
+def test_worker_counts():
+    assert worker_counts(1) == [1]
+    assert worker_counts(6) == [1, 2, 4, 6]
+    assert worker_counts(8) == [1, 2, 4, 8]
+
+
+def test_fit_recovers_amdahl():
+    points = [(n, usl(n, 0.05, 0.0)) for n in (1, 2, 4, 8, 16)]
+    fit = fit_scaling(points)
+    assert fit["amdahl"]["sigma"] == pytest.approx(0.05, abs=1e-5)
+    assert fit["amdahl"]["max_speedup"] == 20.0
+    assert fit["amdahl"]["r2"] == 1.0
+    assert fit["usl"]["kappa"] == pytest.approx(0.0, abs=1e-6)
+    assert fit["usl"]["peak_workers"] is None
+
+
+def test_fit_recovers_usl_peak():
+    points = [(n, usl(n, 0.03, 0.002)) for n in (1, 2, 4, 8, 16, 32)]
+    fit = fit_scaling(points)
+    assert fit["usl"]["sigma"] == pytest.approx(0.03, abs=1e-5)
+    assert fit["usl"]["kappa"] == pytest.approx(0.002, abs=1e-6)
+    assert fit["usl"]["peak_workers"] == round(math.sqrt(0.97 / 0.002), 1)
+    assert fit["usl"]["r2"] == 1.0
+    # 吞吐量会回落时 Amdahl 拟合不如 USL
+    assert fit["amdahl"]["r2"] < fit["usl"]["r2"]
+
+
+def test_fit_linear_and_degenerate():
+    fit = fit_scaling([(n, float(n)) for n in (1, 2, 4)])
+    assert fit["amdahl"]["sigma"] == 0.0
+    assert fit["amdahl"]["max_speedup"] is None
+    assert fit["usl"]["sigma"] == 0.0 and fit["usl"]["kappa"] == 0.0
+    # 超线性的点不会得到负的参数
+    fit = fit_scaling([(1, 1.0), (2, 2.2), (4, 4.8)])
+    assert fit["usl"]["sigma"] >= 0 and fit["usl"]["kappa"] >= 0
+    
+    assert fit_scaling([(1, 1.0)]) is None
+    assert fit_scaling([]) is None
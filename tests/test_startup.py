@@ -0,0 +1,59 @@
+"""startup-check: 伪造的界面脚本验证报告解析与预算判定，真实界面在有显示器时检查预算"""
+
+import importlib.util
+import json
+import os
+import sys
+
+import pytest
+
+from cpupress.startup import DEFAULT_BUDGET, REPORT_PREFIX, StartupTimer, parse_report, startup_check
+
+
+def fake_gui(tmp_path, interactive):
+    """打印一份可交互时间为 interactive 秒的计时报告后退出的脚本"""
+    report = {"phases": {"imports": interactive / 2, "interactive": interactive / 2}, "total": interactive,
+              "interactive": interactive}
+    script = tmp_path / "fake_gui.py"
+    script.write_text(f"print('启动中')\nprint({REPORT_PREFIX + json.dumps(report)!r})\n", encoding="utf-8")
+    return str(script)
+
+
+def test_timer_report():
+    now = [10.0]
+    timer = StartupTimer(clock=lambda: now[0])
+    for phase, step in (("imports", 0.5), ("window", 0.25), ("imports", 1.0), ("interactive", 0.25)):
+        now[0] += step
+        timer.mark(phase)
+    report = timer.report()
+    # 同名阶段只记录第一次
+    assert list(report["phases"]) == ["imports", "window", "interactive"]
+    assert report["interactive"] == 2.0
+    assert parse_report(f"其他输出\n{REPORT_PREFIX}{json.dumps(report)}\n") == report
+    assert parse_report("没有报告") is None
+
+
+def test_startup_check_budget(tmp_path):
+    ok, report = startup_check(fake_gui(tmp_path, 0.4), budget=1.0)
+    assert ok
+    assert report["interactive"] == 0.4
+    ok, _ = startup_check(fake_gui(tmp_path, 1.5), budget=1.0)
+    assert not ok
+
+
+def test_startup_check_without_report(tmp_path):
+    script = tmp_path / "broken_gui.py"
+    script.write_text("import sys\nsys.exit('没有显示器')\n", encoding="utf-8")
+    with pytest.raises(RuntimeError, match="没有显示器"):
+        startup_check(str(script), budget=1.0)
+
+
+def test_gui_starts_within_budget():
+    """真实界面的冷启动，预算可用 CPUPRESS_STARTUP_BUDGET 覆盖"""
+    if importlib.util.find_spec("customtkinter") is None:
+        pytest.skip("未安装 customtkinter")
+    if sys.platform.startswith("linux") and not (os.environ.get("DISPLAY") or os.environ.get("WAYLAND_DISPLAY")):
+        pytest.skip("没有显示器")
+    budget = float(os.environ.get("CPUPRESS_STARTUP_BUDGET", DEFAULT_BUDGET))
+    ok, report = startup_check(budget=budget)
+    assert ok, f"可交互时间 {report['interactive']:.3f}s 超出预算 {budget:g}s"
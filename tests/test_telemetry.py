@@ -0,0 +1,57 @@
+"""LTTB 降采样与 DownsampledSeries 的分级压缩"""
+
+import pytest
+
+from cpupress.telemetry import DownsampledSeries, lttb
+
+
+def test_lttb_short_series_unchanged():
+    times, values = [0, 1, 2], [5, 6, 7]
+    assert lttb(times, values, 10) == ([0, 1, 2], [5, 6, 7])
+    # 少于 3 个点无法构成三角形，原样返回
+    assert lttb(times, values, 2) == ([0, 1, 2], [5, 6, 7])
+
+
+def test_lttb_keeps_endpoints_and_peaks():
+    times = list(range(100))
+    values = [0.0] * 100
+    values[37] = 100.0
+    values[71] = -50.0
+    out_times, out_values = lttb(times, values, 10)
+    assert len(out_times) == len(out_values) == 10
+    assert out_times[0] == 0 and out_times[-1] == 99
+    assert out_times == sorted(out_times)
+    # 孤立的峰谷必须保留
+    assert 37 in out_times and 71 in out_times
+    assert max(out_values) == 100.0 and min(out_values) == -50.0
+
+
+def test_series_memory_is_bounded():
+    series = DownsampledSeries(capacity=64, block=16, factor=4, levels=3)
+    for i in range(10000):
+        series.append(float(i), float(i % 7))
+    assert len(series) <= 3 * 64
+    assert series.version > 0
+    times, values = series.points()
+    assert len(times) == len(values) == len(series)
+    # 时间严格递增，最旧与最新的点都还在
+    assert all(a < b for a, b in zip(times, times[1:]))
+    assert times[0] == 0.0
+    assert times[-1] == 9999.0
+    # 最近 capacity 个点保持原始分辨率
+    assert times[-48:] == [float(i) for i in range(10000 - 48, 10000)]
+
+
+def test_series_clear_and_validation():
+    series = DownsampledSeries(capacity=8, block=4, factor=2, levels=2)
+    for i in range(20):
+        series.append(i, i)
+    version = series.version
+    series.clear()
+    assert len(series) == 0
+    assert series.points() == ([], [])
+    assert series.version == version + 1
+    
+    for kwargs in ({"capacity": 4, "block": 8}, {"factor": 1}, {"levels": 0}, {"block": 0}):
+        with pytest.raises(ValueError):
+            DownsampledSeries(**kwargs)
@@ -0,0 +1,106 @@
+"""ThermalProbe 与 ThrottleDetector: 使用伪造的 sysfs 目录树"""
+
+import os
+
+from cpupress.thermal import ThermalProbe, ThrottleDetector
+
+
+def write(root, relative, value):
+    path = os.path.join(root, relative)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(f"{value}\n")
+
+
+def fake_sysfs(root, freqs_khz, core_counts, package_counts, packages, zones):
+    """每个 CPU 的频率、核心/插槽降频计数与所属插槽，以及 {thermal_zone 编号: (类型, 毫摄氏度)}"""
+    cpu_dir = os.path.join("devices", "system", "cpu")
+    for cpu, (freq, core, package, package_id) in enumerate(zip(freqs_khz, core_counts, package_counts, packages)):
+        base = os.path.join(cpu_dir, f"cpu{cpu}")
+        write(root, os.path.join(base, "cpufreq", "scaling_cur_freq"), freq)
+        write(root, os.path.join(base, "thermal_throttle", "core_throttle_count"), core)
+        write(root, os.path.join(base, "thermal_throttle", "package_throttle_count"), package)
+        write(root, os.path.join(base, "topology", "physical_package_id"), package_id)
+    for zone, (kind, millidegrees) in zones.items():
+        write(root, os.path.join("class", "thermal", f"thermal_zone{zone}", "type"), kind)
+        write(root, os.path.join("class", "thermal", f"thermal_zone{zone}", "temp"), millidegrees)
+
+
+def test_probe_reads_fake_sysfs(tmp_path):
+    root = str(tmp_path)
+    # 10 个 CPU 用来检查按编号而不是按字符串排序
+    fake_sysfs(
+        root, [1000000 + i * 100000 for i in range(10)], [1] * 10, [5] * 5 + [7] * 5, [0] * 5 + [1] * 5,
+        {0: ("x86_pkg_temp", 61000), 1: ("acpitz", 45500)}
+    )
+    probe = ThermalProbe(root)
+    assert not probe.use_psutil
+    assert probe.read_frequencies() == [1000.0 + i * 100 for i in range(10)]
+    assert probe.read_temperatures() == {"thermal_zone0/x86_pkg_temp": 61.0, "thermal_zone1/acpitz": 45.5}
+    # 同一插槽的 package 计数只算一次
+    assert probe.read_throttle_counts() == {"core": 10, "package": 12}
+    
+    sample = probe.sample()
+    assert sample["freq_mhz"] == 1450.0
+    assert sample["temp_c"] == 61.0
+    assert sample["throttle_core"] == 10
+    assert sample["throttle_package"] == 12
+
+
+def test_probe_missing_sensors(tmp_path):
+    sample = ThermalProbe(str(tmp_path)).sample()
+    assert sample == {
+        "freq_mhz": None, "freq_percpu": None, "temp_c": None, "temperatures": None,
+        "throttle_core": None, "throttle_package": None,
+    }
+
+
+def test_probe_ignores_unreadable_values(tmp_path):
+    root = str(tmp_path)
+    fake_sysfs(root, [2000000, 2000000], [0, 0], [0, 0], [0, 0], {0: ("acpitz", 40000)})
+    write(root, os.path.join("devices", "system", "cpu", "cpu1", "cpufreq", "scaling_cur_freq"), "garbage")
+    write(root, os.path.join("class", "thermal", "thermal_zone1", "temp"), "")
+    probe = ThermalProbe(root)
+    assert probe.read_frequencies() == [2000.0]
+    assert probe.read_temperatures() == {"thermal_zone0/acpitz": 40.0}
+
+
+def test_detector_counter_increase_starts_immediately(tmp_path):
+    root = str(tmp_path)
+    fake_sysfs(root, [3000000], [0], [0], [0], {})
+    probe = ThermalProbe(root)
+    detector = ThrottleDetector()
+    assert detector.update(dict(probe.sample(), time=1.0, cpu=100.0)) is None
+    
+    write(root, os.path.join("devices", "system", "cpu", "cpu0", "thermal_throttle", "core_throttle_count"), 3)
+    event = detector.update(dict(probe.sample(), time=2.0, cpu=100.0))
+    assert event["type"] == "throttle_start"
+    assert event["reasons"][0].startswith("内核降频计数增加 3/0")
+    
+    event = detector.update(dict(probe.sample(), time=3.0, cpu=100.0))
+    assert event["type"] == "throttle_end"
+    assert [e["type"] for e in detector.events] == ["throttle_start", "throttle_end"]
+
+
+def test_detector_frequency_drop_needs_confirmation():
+    detector = ThrottleDetector(confirm=3)
+    assert detector.update({"time": 0, "cpu": 100.0, "freq_mhz": 3000, "ops_per_sec": 1000}) is None
+    for t in (1, 2):
+        assert detector.update({"time": t, "cpu": 100.0, "freq_mhz": 2500, "ops_per_sec": 1000}) is None
+    event = detector.update({"time": 3, "cpu": 100.0, "freq_mhz": 2500, "ops_per_sec": 1000})
+    assert event["type"] == "throttle_start"
+    assert "频率 2500MHz 低于峰值 3000MHz" in event["reasons"]
+    
+    # 未满载时的低频不算降频，也不结束降频状态
+    assert detector.update({"time": 4, "cpu": 20.0, "freq_mhz": 800}) is None
+    assert detector.throttled
+    assert detector.update({"time": 5, "cpu": 100.0, "freq_mhz": 2950, "ops_per_sec": 1000})["type"] == "throttle_end"
+
+
+def test_detector_throughput_drop():
+    detector = ThrottleDetector(confirm=2)
+    detector.update({"time": 0, "cpu": 99.0, "ops_per_sec": 10000})
+    assert detector.update({"time": 1, "cpu": 99.0, "ops_per_sec": 5000}) is None
+    event = detector.update({"time": 2, "cpu": 99.0, "ops_per_sec": 5000})
+    assert event["type"] == "throttle_start"
+    assert event["reasons"][0].startswith("吞吐量 5,000 ops/s")
@@ -1,12 +1,45 @@
+import time
+
+# 启动计时的起点，模块导入耗时从这里算起
+STARTUP_CLOCK = time.perf_counter()
+
 import tkinter as tk
 import customtkinter as ctk
+import argparse
 import multiprocessing
-import time
-import psutil
-import webbrowser
 import sys
 import os
-from PIL import Image, ImageTk
+import queue
+import json
+import threading
+
+# 首次绘制之前用到的模块；引擎 (multiprocessing 进程池、sqlite3 运行历史)、负载曲线和采样线程 (psutil)
+# 在第一次使用时才导入
+from cpupress.cgroup import CgroupProbe, describe_limits, usable_cpus
+from cpupress.executors import DEFAULT_EXECUTOR, DEFAULT_THREADS_PER_PROCESS, EXECUTORS, executor_warning
+from cpupress.kernels import DEFAULT_KERNEL, available_kernels
+from cpupress.logpipe import LogPipeline, default_log_file
+from cpupress.memory import DEFAULT_WORKING_SET, MEMORY_PATTERNS
+from cpupress.startup import REPORT_PREFIX, StartupTimer, format_startup
+from cpupress.telemetry import DownsampledSeries, lttb
+from cpupress.topology import PLACEMENT_POLICIES
+
+# 界面从采样队列取数据的间隔 (毫秒)
+UI_REFRESH_MS = 100
+
+# 日志批量刷新到界面的间隔 (毫秒)、内存中保留的记录数和文本框最多显示的行数
+LOG_FLUSH_MS = 100
+LOG_RING_SIZE = 5000
+LOG_MAX_LINES = 2000
+
+# 负载曲线预设
+PROFILE_PRESETS = ["constant:100", "ramp:0:100:5m", "step:25,50,75,100:60", "square:20:100:30", "sine:20:80:10m"]
+
+# 吞吐量标签中工作单元的叫法 (按执行方式)，混合模式统称工作单元
+UNIT_NAMES = {"process": "进程", "thread": "线程"}
+
+# 可选的采样间隔 (显示文本 -> 秒)
+SAMPLE_INTERVALS = {"100ms": 0.1, "250ms": 0.25, "500ms": 0.5, "1s": 1.0, "2s": 2.0, "5s": 5.0}
 
 # 确保资源路径正确
 def resource_path(relative_path):
@@ -16,28 +49,179 @@ def resource_path(relative_path):
         base_path = os.path.abspath(".")
     return os.path.join(base_path, relative_path)
 
-# CPU 压力测试工作函数
-def cpu_stress_worker(duration, speed_factor, max_usage, stop_event):
-    end_time = time.time() + duration
-    sleep_time = 0.01 * (100 / speed_factor)
-    
-    while time.time() < end_time and not stop_event.is_set():
-        start = time.time()
-        
-        # 计算一定量的数学运算
-        cycles = int(10000 * (max_usage / 100))
-        for _ in range(cycles):
-            result = sum(i * i for i in range(100))
-        
-        # 根据速度调整计算间隔
-        elapsed = time.time() - start
-        if elapsed < sleep_time:
-            time.sleep(sleep_time - elapsed)
+# 每核心热力图: 占用率量化为 5% 一档，只重绘档位变化的格子
+class CoreHeatmap(tk.Canvas):
+    LEVELS = 20
+    
+    def __init__(self, master, core_count, cell_height=22, **kwargs):
+        super().__init__(master, height=cell_height, highlightthickness=0, **kwargs)
+        self.core_count = core_count
+        self.cell_height = cell_height
+        self.colors = [self.level_color(i / self.LEVELS) for i in range(self.LEVELS + 1)]
+        self.cells = [self.create_rectangle(0, 0, 0, 0, width=0, fill=self.colors[0]) for _ in range(core_count)]
+        self.levels = [0] * core_count
+        self.columns = 1
+        self.cell_width = 1.0
+        self.bind("<Configure>", self.layout)
+    
+    @staticmethod
+    def level_color(ratio):
+        """绿 -> 黄 -> 红"""
+        if ratio < 0.5:
+            r, g = int(510 * ratio), 204
+        else:
+            r, g = 255, int(204 * (1 - ratio) * 2)
+        return f"#{r:02x}{g:02x}40"
+    
+    def layout(self, event=None):
+        """根据画布宽度重新排列格子"""
+        width = max(self.winfo_width(), 1)
+        columns = max(1, min(self.core_count, width // 18))
+        rows = -(-self.core_count // columns)
+        cell_w = width / columns
+        self.columns, self.cell_width = columns, cell_w
+        self.configure(height=rows * self.cell_height)
+        for i, cell in enumerate(self.cells):
+            row, col = divmod(i, columns)
+            x, y = col * cell_w, row * self.cell_height
+            self.coords(cell, x + 1, y + 1, x + cell_w - 1, y + self.cell_height - 1)
+    
+    def core_at(self, x, y):
+        """画布坐标处的核心编号，不在任何格子上时返回 None"""
+        col, row = int(x // self.cell_width), int(y // self.cell_height)
+        core = row * self.columns + col
+        return core if 0 <= col < self.columns and 0 <= core < self.core_count else None
+    
+    def update_values(self, percpu):
+        """更新各核心占用率，返回实际重绘的格子数"""
+        changed = 0
+        for i, value in enumerate(percpu[:self.core_count]):
+            level = min(self.LEVELS, max(0, int(value * self.LEVELS / 100 + 0.5)))
+            if level != self.levels[i]:
+                self.levels[i] = level
+                self.itemconfigure(self.cells[i], fill=self.colors[level])
+                changed += 1
+        return changed
+
+# 目标/实际占用率叠加图: 保留最近 points 个点，每次只更新两条折线的坐标
+class TargetOverlay(tk.Canvas):
+    def __init__(self, master, points=120, height=70, **kwargs):
+        super().__init__(master, height=height, highlightthickness=0, **kwargs)
+        self.points = points
+        self.targets = []
+        self.actuals = []
+        self.target_line = self.create_line(0, 0, 0, 0, fill="#3498db", width=2, dash=(4, 2))
+        self.actual_line = self.create_line(0, 0, 0, 0, fill="#2ecc71", width=2)
+        self.bind("<Configure>", lambda event: self.redraw())
+    
+    def clear(self):
+        self.targets.clear()
+        self.actuals.clear()
+        self.redraw()
+    
+    def add_point(self, target, actual):
+        self.targets.append(target)
+        self.actuals.append(actual)
+        if len(self.targets) > self.points:
+            del self.targets[0], self.actuals[0]
+        self.redraw()
+    
+    def _coords(self, values, width, height):
+        step = width / max(self.points - 1, 1)
+        coords = []
+        for i, value in enumerate(values):
+            coords += [i * step, height - 2 - (height - 4) * min(max(value, 0), 100) / 100]
+        return coords
+    
+    def redraw(self):
+        width, height = max(self.winfo_width(), 1), max(self.winfo_height(), 1)
+        for line, values in ((self.target_line, self.targets), (self.actual_line, self.actuals)):
+            if len(values) >= 2:
+                self.coords(line, *self._coords(values, width, height))
+            else:
+                self.coords(line, 0, 0, 0, 0)
+
+# 占用率时间序列图: 从打开程序起的完整历史，旧数据逐级降采样，内存占用有上限
+class UsageChart(tk.Canvas):
+    SERIES = (("cpu", "#e67e22", None), ("target", "#3498db", (4, 2)), ("achieved", "#2ecc71", None))
+    
+    def __init__(self, master, height=110, **kwargs):
+        super().__init__(master, height=height, highlightthickness=0, **kwargs)
+        self.series = {name: DownsampledSeries() for name, _, _ in self.SERIES}
+        self.grid_lines = [self.create_line(0, 0, 0, 0, fill="#7f8c8d", dash=(1, 3)) for _ in range(3)]
+        self.lines = {
+            name: self.create_line(0, 0, 0, 0, fill=color, width=2, dash=dash or "")
+            for name, color, dash in self.SERIES
+        }
+        self.span_text = self.create_text(0, 0, anchor="ne", fill="#7f8c8d", font=("", 9))
+        # 每条序列已拼接好的点 {名称: (version, 时间列表, 数值列表, 已拼入的第 0 级点数)}
+        self.cache = {}
+        self.dirty = False
+        self.bind("<Configure>", lambda event: self.redraw(force=True))
+    
+    def add(self, timestamp, **values):
+        """追加一个时间点，值为 None 的序列不追加"""
+        for name, value in values.items():
+            if value is not None:
+                self.series[name].append(timestamp, value)
+                self.dirty = True
+    
+    def points(self, name):
+        """某条序列的全部点；旧数据没有被压缩 (version 未变) 时只追加第 0 级的新点，不重新拼接"""
+        series = self.series[name]
+        level_times, level_values = series.levels[0]
+        cached = self.cache.get(name)
+        if cached is None or cached[0] != series.version:
+            times, values = series.points()
+        else:
+            _, times, values, seen = cached
+            times.extend(level_times[seen:])
+            values.extend(level_values[seen:])
+        self.cache[name] = (series.version, times, values, len(level_times))
+        return times, values
+    
+    def redraw(self, force=False):
+        """有新数据时重绘，每条折线只更新一次坐标"""
+        if not (self.dirty or force):
+            return
+        self.dirty = False
+        width, height = max(self.winfo_width(), 1), max(self.winfo_height(), 1)
+        for i, line in enumerate(self.grid_lines):
+            y = height - 2 - (height - 4) * (i + 1) / 4
+            self.coords(line, 0, y, width, y)
+        
+        points = {name: self.points(name) for name in self.series}
+        starts = [times[0] for times, _ in points.values() if times]
+        if not starts:
+            return
+        t0 = min(starts)
+        t1 = max(times[-1] for times, _ in points.values() if times)
+        scale = width / max(t1 - t0, 1e-6)
+        for name, (times, values) in points.items():
+            # 点数远多于像素时按画布宽度降采样
+            if len(times) > width * 2:
+                times, values = lttb(times, values, width)
+            coords = []
+            for t, value in zip(times, values):
+                coords += [(t - t0) * scale, height - 2 - (height - 4) * min(max(value, 0), 100) / 100]
+            if len(coords) >= 4:
+                self.coords(self.lines[name], *coords)
+            else:
+                self.coords(self.lines[name], 0, 0, 0, 0)
+        minutes, seconds = divmod(int(t1 - t0), 60)
+        hours, minutes = divmod(minutes, 60)
+        self.coords(self.span_text, width - 4, 2)
+        self.itemconfigure(self.span_text, text=f"{hours:02d}:{minutes:02d}:{seconds:02d}")
 
 class CPUTesterApp(ctk.CTk):
-    def __init__(self):
+    def __init__(self, startup=None, startup_budget=None):
         super().__init__()
         
+        # 启动计时 (--startup-timing / --startup-budget)，预算模式下显示第一个样本后自动退出
+        self.startup = startup
+        self.startup_budget = startup_budget
+        self.startup_ok = True
+        
         # 应用设置
         self.title("代码小梓-CPU压榨机 ")
         self.geometry("1145x693")
@@ -48,32 +232,106 @@ class CPUTesterApp(ctk.CTk):
             self.iconbitmap(resource_path("icon.ico"))
         except:
             pass
+        self.mark_startup("window")
+        
+        # 容器内的 cpuset 与 CPU 配额
+        self.cgroup = CgroupProbe()
         
         # 默认配置
         self.config = {
-            "cpu_threads": multiprocessing.cpu_count(),
+            "cpu_threads": usable_cpus(self.cgroup),
             "stress_speed": 100,
-            "max_cpu_usage": 100
+            "max_cpu_usage": 100,
+            "kernel": DEFAULT_KERNEL,
+            "sample_interval": "1s",
+            "use_pool": False,
+            "placement": "none",
+            "cpu_list": None,
+            "working_set": DEFAULT_WORKING_SET,
+            "memory_pattern": "random",
+            "executor": DEFAULT_EXECUTOR,
+            "threads_per_process": DEFAULT_THREADS_PER_PROCESS,
+            "latency_probe": False
         }
         
         # 主题设置
         self.current_theme = "dark"
         ctk.set_appearance_mode(self.current_theme)
         
-        # 压力测试进程列表
-        self.test_processes = []
-        self.stop_event = multiprocessing.Event()
+        # 压力测试引擎与运行历史数据库在第一次使用时创建 (见 engine 属性)
+        self._engine = None
+        
+        # 日志管道: 内存环形队列 + 轮转的 JSON Lines 文件
+        try:
+            self.log_pipeline = LogPipeline(capacity=LOG_RING_SIZE, log_file=default_log_file())
+        except OSError:
+            self.log_pipeline = LogPipeline(capacity=LOG_RING_SIZE)
+        self.mark_startup("services")
         
         # 监控标志
         self.monitoring = False
+        self.sampler = None
         self.emergency_stop = False
         
+        # OpenMetrics 指标端点 (可选)
+        self.exporter = None
+        
+        # 监视线程发来的运行结束通知 (运行开始时间)，由界面刷新循环处理
+        self.run_finished = queue.Queue()
+        
+        # 停止、收尾等会阻塞的引擎操作在后台线程执行，(回调, 结果) 由界面刷新循环取出处理
+        self.engine_task = None
+        self.engine_results = queue.Queue()
+        
         # 创建GUI组件
         self.create_widgets()
+        self.mark_startup("widgets")
+        
+        # 定时批量刷新日志
+        self.flush_logs()
         
-        # 开始监控
+        # 窗口绘制完成后才开始采样，不推迟首次显示
+        self.after_idle(self.on_interactive)
+    
+    @property
+    def engine(self):
+        """压力测试引擎，第一次访问时才导入引擎模块并打开运行历史数据库"""
+        if self._engine is None:
+            from cpupress.engine import StressEngine
+            from cpupress.history import RunHistory
+            
+            try:
+                history = RunHistory()
+            except Exception:
+                history = None
+            self._engine = StressEngine(self.config, history=history)
+        return self._engine
+    
+    def engine_running(self):
+        """是否有压力测试在运行 (引擎还没有创建时不创建)"""
+        return self._engine is not None and self._engine.is_running()
+    
+    def mark_startup(self, phase):
+        """记录启动阶段结束 (未开启启动计时时不做任何事)"""
+        if self.startup:
+            self.startup.mark(phase)
+    
+    def on_interactive(self):
+        """首次进入空闲事件循环: 窗口已绘制，开始监控"""
+        self.mark_startup("interactive")
         self.start_monitoring()
     
+    def report_startup(self):
+        """打印启动各阶段耗时；预算模式下检查可交互时间并退出"""
+        report = self.startup.report()
+        for line in format_startup(report, self.startup_budget):
+            print(line)
+            self.log_message(line)
+        print(REPORT_PREFIX + json.dumps(report), flush=True)
+        if self.startup_budget is not None:
+            self.startup_ok = report["interactive"] <= self.startup_budget
+            self.on_closing()
+    
     def create_widgets(self):
         # 主容器布局
         self.grid_columnconfigure(1, weight=1)
@@ -82,7 +340,7 @@ class CPUTesterApp(ctk.CTk):
         # 左侧边栏
         self.sidebar_frame = ctk.CTkFrame(self, width=220, corner_radius=0)
         self.sidebar_frame.grid(row=0, column=0, sticky="nsew")
-        self.sidebar_frame.grid_rowconfigure(4, weight=1)
+        self.sidebar_frame.grid_rowconfigure(5, weight=1)
         
         # 侧边栏标题
         self.sidebar_label = ctk.CTkLabel(
@@ -129,13 +387,25 @@ class CPUTesterApp(ctk.CTk):
         )
         self.settings_button.grid(row=3, column=0, padx=20, pady=5, sticky="ew")
         
+        self.history_button = ctk.CTkButton(
+            self.sidebar_frame, 
+            text="历 史 记 录",
+            command=self.show_history,
+            font=ctk.CTkFont(size=14),
+            height=40,
+            corner_radius=10,
+            anchor="w",
+            fg_color="transparent"
+        )
+        self.history_button.grid(row=4, column=0, padx=20, pady=5, sticky="ew")
+        
         # 主题切换
         self.theme_label = ctk.CTkLabel(
             self.sidebar_frame, 
             text="主题设置:",
             font=ctk.CTkFont(size=12)
         )
-        self.theme_label.grid(row=5, column=0, padx=20, pady=(10, 0))
+        self.theme_label.grid(row=6, column=0, padx=20, pady=(10, 0))
         
         self.theme_var = ctk.StringVar(value=self.current_theme)
         self.theme_menu = ctk.CTkOptionMenu(
@@ -147,7 +417,7 @@ class CPUTesterApp(ctk.CTk):
             height=30,
             anchor="center"
         )
-        self.theme_menu.grid(row=6, column=0, padx=20, pady=(0, 10))
+        self.theme_menu.grid(row=7, column=0, padx=20, pady=(0, 10))
         
         # 关于按钮
         self.about_button = ctk.CTkButton(
@@ -159,7 +429,7 @@ class CPUTesterApp(ctk.CTk):
             corner_radius=10,
             fg_color="transparent"
         )
-        self.about_button.grid(row=7, column=0, padx=20, pady=(0, 20))
+        self.about_button.grid(row=8, column=0, padx=20, pady=(0, 20))
         
         # 主内容区域
         self.main_frame = ctk.CTkFrame(self, corner_radius=10)
@@ -167,10 +437,14 @@ class CPUTesterApp(ctk.CTk):
         self.main_frame.grid_columnconfigure(0, weight=1)
         self.main_frame.grid_rowconfigure(0, weight=1)
         
-        # 创建不同的内容页面
-        self.create_dashboard()
-        self.create_logs_page()
-        self.create_settings_page()
+        # 内容页面在第一次显示时才创建
+        self.page_builders = {
+            "dashboard": self.create_dashboard,
+            "logs": self.create_logs_page,
+            "settings": self.create_settings_page,
+            "history": self.create_history_page
+        }
+        self.pages = {}
         
         # 默认显示仪表盘
         self.show_dashboard()
@@ -192,7 +466,7 @@ class CPUTesterApp(ctk.CTk):
         ).pack(side="left")
         
         # CPU 信息卡片
-        info_frame = ctk.CTkFrame(self.dashboard_frame, corner_radius=15)
+        info_frame = self.info_frame = ctk.CTkFrame(self.dashboard_frame, corner_radius=15)
         info_frame.grid(row=1, column=0, padx=20, pady=(0, 20), sticky="nsew")
         info_frame.grid_columnconfigure(0, weight=1)
         info_frame.grid_rowconfigure(2, weight=1)
@@ -203,10 +477,17 @@ class CPUTesterApp(ctk.CTk):
         
         ctk.CTkLabel(
             row1, 
-            text=f"CPU 核心数: {multiprocessing.cpu_count()}",
+            text=f"CPU 核心数: {multiprocessing.cpu_count()} (可用 {usable_cpus(self.cgroup)})",
             font=ctk.CTkFont(size=16)
         ).pack(side="left", padx=10)
         
+        self.thermal_var = ctk.StringVar(value="频率: -  温度: -")
+        ctk.CTkLabel(
+            row1, 
+            textvariable=self.thermal_var,
+            font=ctk.CTkFont(size=16)
+        ).pack(side="left", padx=(40, 10))
+        
         # 第二行信息
         row2 = ctk.CTkFrame(info_frame, fg_color="transparent")
         row2.grid(row=1, column=0, padx=20, pady=10, sticky="ew")
@@ -224,9 +505,22 @@ class CPUTesterApp(ctk.CTk):
             font=ctk.CTkFont(size=16, weight="bold")
         ).pack(side="left")
         
+        ctk.CTkLabel(
+            row2, 
+            text="吞吐量:",
+            font=ctk.CTkFont(size=16)
+        ).pack(side="left", padx=(40, 10))
+        
+        self.throughput_var = ctk.StringVar(value="-")
+        ctk.CTkLabel(
+            row2, 
+            textvariable=self.throughput_var,
+            font=ctk.CTkFont(size=16, weight="bold")
+        ).pack(side="left")
+        
         # 进度条
         progress_frame = ctk.CTkFrame(info_frame, fg_color="transparent")
-        progress_frame.grid(row=2, column=0, padx=10, pady=(1, 20), sticky="ew")
+        progress_frame.grid(row=2, column=0, padx=10, pady=(1, 0), sticky="ew")
         
         self.cpu_progress = ctk.CTkProgressBar(
             progress_frame, 
@@ -237,6 +531,45 @@ class CPUTesterApp(ctk.CTk):
         self.cpu_progress.pack(fill="x", padx=10, pady=10)
         self.cpu_progress.set(0)
         
+        # 占用率历史曲线 (橙色 CPU、蓝色虚线目标、绿色实际)
+        self.usage_chart = UsageChart(progress_frame, bg=self.canvas_bg())
+        self.usage_chart.pack(fill="x", padx=10, pady=(0, 10))
+        
+        # 每核心占用率热力图
+        heatmap_frame = ctk.CTkFrame(info_frame, fg_color="transparent")
+        heatmap_frame.grid(row=3, column=0, padx=10, pady=(0, 10), sticky="ew")
+        
+        self.heatmap_label_var = ctk.StringVar(value="各核心使用率:")
+        ctk.CTkLabel(
+            heatmap_frame, 
+            textvariable=self.heatmap_label_var,
+            font=ctk.CTkFont(size=14)
+        ).pack(anchor="w", padx=10)
+        
+        self.core_heatmap = CoreHeatmap(
+            heatmap_frame,
+            multiprocessing.cpu_count(),
+            bg=self.canvas_bg()
+        )
+        self.core_heatmap.pack(fill="x", padx=10, pady=(5, 0))
+        # 鼠标悬停在格子上时显示该核心最近一分钟的历史
+        self.core_heatmap.bind("<Motion>", self.show_core_history)
+        self.core_heatmap.bind("<Leave>", lambda event: self.heatmap_label_var.set("各核心使用率:"))
+        
+        # 目标与实际占用率叠加图
+        overlay_frame = ctk.CTkFrame(info_frame, fg_color="transparent")
+        overlay_frame.grid(row=4, column=0, padx=10, pady=(0, 20), sticky="ew")
+        
+        self.overlay_label_var = ctk.StringVar(value="目标 / 实际占用率: -")
+        ctk.CTkLabel(
+            overlay_frame, 
+            textvariable=self.overlay_label_var,
+            font=ctk.CTkFont(size=14)
+        ).pack(anchor="w", padx=10)
+        
+        self.target_overlay = TargetOverlay(overlay_frame, bg=self.canvas_bg())
+        self.target_overlay.pack(fill="x", padx=10, pady=(5, 0))
+        
         # 控制面板
         control_frame = ctk.CTkFrame(self.dashboard_frame, corner_radius=15)
         control_frame.grid(row=2, column=0, padx=20, pady=(0, 20), sticky="ew")
@@ -266,6 +599,56 @@ class CPUTesterApp(ctk.CTk):
         self.duration_entry.pack(side="left")
         self.duration_entry.insert(0, "30")
         
+        # 负载内核
+        ctk.CTkLabel(
+            duration_frame, 
+            text="负载内核:",
+            font=ctk.CTkFont(size=14)
+        ).pack(side="left", padx=(30, 10))
+        
+        self.kernel_var = ctk.StringVar(value=self.config["kernel"])
+        self.kernel_menu = ctk.CTkOptionMenu(
+            duration_frame, 
+            values=available_kernels(),
+            command=self.change_kernel,
+            variable=self.kernel_var,
+            width=160,
+            height=30,
+            anchor="center"
+        )
+        self.kernel_menu.pack(side="left")
+        
+        # 负载曲线
+        profile_frame = ctk.CTkFrame(control_frame, fg_color="transparent")
+        profile_frame.pack(fill="x", padx=20, pady=(0, 10))
+        
+        ctk.CTkLabel(
+            profile_frame, 
+            text="负载曲线:",
+            font=ctk.CTkFont(size=14)
+        ).pack(side="left", padx=(0, 10))
+        
+        self.profile_menu = ctk.CTkComboBox(
+            profile_frame, 
+            values=PROFILE_PRESETS,
+            width=220,
+            height=30
+        )
+        self.profile_menu.pack(side="left")
+        self.profile_menu.set(PROFILE_PRESETS[0])
+        
+        self.apply_profile_btn = ctk.CTkButton(
+            profile_frame, 
+            text="运行中切换",
+            command=self.apply_profile,
+            font=ctk.CTkFont(size=14),
+            width=100,
+            height=30,
+            corner_radius=10,
+            state="disabled"
+        )
+        self.apply_profile_btn.pack(side="left", padx=10)
+        
         # 按钮区域
         btn_frame = ctk.CTkFrame(control_frame, fg_color="transparent")
         btn_frame.pack(fill="x", padx=20, pady=20)
@@ -347,6 +730,10 @@ class CPUTesterApp(ctk.CTk):
         )
         self.log_text.grid(row=0, column=0, padx=10, pady=10, sticky="nsew")
         self.log_text.insert("0.0", "系统就绪，等待压力测试...\n")
+        # 回填页面创建之前的最近日志，待显示队列随之清空，不会重复显示
+        records = self.log_pipeline.recent(LOG_MAX_LINES, consume=True)
+        if records:
+            self.log_text.insert("end", "\n".join(record["message"] for record in records) + "\n")
         
         # 清除日志按钮
         btn_frame = ctk.CTkFrame(self.logs_frame, fg_color="transparent")
@@ -366,6 +753,8 @@ class CPUTesterApp(ctk.CTk):
     
     def create_settings_page(self):
         """创建设置页面"""
+        from cpupress.exporter import DEFAULT_METRICS_PORT
+        
         self.settings_frame = ctk.CTkFrame(self.main_frame, corner_radius=10, fg_color="transparent")
         
         # 设置标题
@@ -384,7 +773,7 @@ class CPUTesterApp(ctk.CTk):
         
         # 设置项
         setting_items = [
-            {"label": "测试线程数", "value": str(multiprocessing.cpu_count()), "description": "设置用于压力测试的CPU线程数"},
+            {"label": "测试线程数", "value": str(usable_cpus(self.cgroup)), "description": "设置用于压力测试的CPU线程数"},
             {"label": "最大CPU占用", "value": "100%", "description": "设置压力测试期间的最大CPU占用率"},
             {"label": "测试速度", "value": "100%", "description": "设置压力测试的计算速度"},
             {"label": "日志级别", "value": "标准", "description": "设置日志记录的详细程度"},
@@ -416,6 +805,127 @@ class CPUTesterApp(ctk.CTk):
                 text_color="#7f8c8d"
             ).pack(anchor="w")
         
+        # 采样间隔
+        self.sample_interval_var = ctk.StringVar(value=self.config["sample_interval"])
+        ctk.CTkOptionMenu(
+            self.create_setting_row(settings_card, "采样间隔", "设置CPU使用率的后台采样频率"), 
+            values=list(SAMPLE_INTERVALS),
+            command=self.change_sample_interval,
+            variable=self.sample_interval_var,
+            width=100,
+            height=28,
+            anchor="center"
+        ).pack(side="right")
+        
+        # 预热进程池
+        self.use_pool_var = ctk.BooleanVar(value=self.config["use_pool"])
+        ctk.CTkSwitch(
+            self.create_setting_row(settings_card, "预热进程池", "工作进程常驻复用，所有进程在起跑屏障上同时开始加压"), 
+            text="",
+            command=self.change_use_pool,
+            variable=self.use_pool_var,
+            width=50
+        ).pack(side="right")
+        
+        # 执行方式与 hybrid 模式下每个进程的线程数
+        executor_row = self.create_setting_row(
+            settings_card, "执行方式", "process 每单元一个进程 / thread 线程 (适合释放GIL的内核) / hybrid 进程×线程 (右侧为每进程线程数)"
+        )
+        self.threads_per_process_entry = ctk.CTkEntry(
+            executor_row, 
+            width=60,
+            placeholder_text=str(DEFAULT_THREADS_PER_PROCESS),
+            font=ctk.CTkFont(size=14)
+        )
+        self.threads_per_process_entry.pack(side="right", padx=(10, 0))
+        
+        self.executor_var = ctk.StringVar(value=self.config["executor"])
+        ctk.CTkOptionMenu(
+            executor_row, 
+            values=list(EXECUTORS),
+            command=self.change_executor,
+            variable=self.executor_var,
+            width=100,
+            height=28,
+            anchor="center"
+        ).pack(side="right")
+        
+        # 调度延迟探测
+        self.latency_var = ctk.BooleanVar(value=self.config["latency_probe"])
+        ctk.CTkSwitch(
+            self.create_setting_row(settings_card, "调度延迟探测", "运行时每 1ms 唤醒一次，统计满载下的唤醒延迟 p50/p99/p99.9/最大值"), 
+            text="",
+            command=self.change_latency_probe,
+            variable=self.latency_var,
+            width=50
+        ).pack(side="right")
+        
+        # 绑核策略
+        placement_row = self.create_setting_row(
+            settings_card, "绑核策略", "spread 分散 / compact 紧凑 / physical 仅物理核心 / list 指定核心列表 (如 0-15)"
+        )
+        self.cpu_list_entry = ctk.CTkEntry(
+            placement_row, 
+            width=120,
+            placeholder_text="0-15",
+            font=ctk.CTkFont(size=14)
+        )
+        self.cpu_list_entry.pack(side="right", padx=(10, 0))
+        
+        self.placement_var = ctk.StringVar(value=self.config["placement"])
+        ctk.CTkOptionMenu(
+            placement_row, 
+            values=list(PLACEMENT_POLICIES),
+            command=self.change_placement,
+            variable=self.placement_var,
+            width=100,
+            height=28,
+            anchor="center"
+        ).pack(side="right")
+        
+        # 指标端点
+        metrics_row = self.create_setting_row(
+            settings_card, "指标端点", "在本机端口提供 OpenMetrics/Prometheus 指标 (http://127.0.0.1:端口/metrics)"
+        )
+        self.metrics_var = ctk.BooleanVar(value=False)
+        ctk.CTkSwitch(
+            metrics_row, 
+            text="",
+            command=self.toggle_metrics,
+            variable=self.metrics_var,
+            width=50
+        ).pack(side="right", padx=(10, 0))
+        
+        self.metrics_port_entry = ctk.CTkEntry(
+            metrics_row, 
+            width=120,
+            placeholder_text=str(DEFAULT_METRICS_PORT),
+            font=ctk.CTkFont(size=14)
+        )
+        self.metrics_port_entry.pack(side="right")
+        
+        # 内存内核工作集
+        memory_row = self.create_setting_row(
+            settings_card, "内存工作集", "memory 内核每个进程的工作集大小 (如 16K、256M、4G) 与访问模式"
+        )
+        self.memory_pattern_var = ctk.StringVar(value=self.config["memory_pattern"])
+        ctk.CTkOptionMenu(
+            memory_row, 
+            values=list(MEMORY_PATTERNS),
+            variable=self.memory_pattern_var,
+            width=110,
+            height=28,
+            anchor="center"
+        ).pack(side="right", padx=(10, 0))
+        
+        self.working_set_entry = ctk.CTkEntry(
+            memory_row, 
+            width=120,
+            placeholder_text=DEFAULT_WORKING_SET,
+            font=ctk.CTkFont(size=14)
+        )
+        self.working_set_entry.pack(side="right")
+        
         # 保存按钮
         btn_frame = ctk.CTkFrame(settings_card, fg_color="transparent")
         btn_frame.pack(fill="x", padx=20, pady=20)
@@ -431,21 +941,149 @@ class CPUTesterApp(ctk.CTk):
         )
         save_btn.pack(side="right", padx=10)
     
+    def create_history_page(self):
+        """创建运行历史页面"""
+        self.history_frame = ctk.CTkFrame(self.main_frame, corner_radius=10, fg_color="transparent")
+        
+        # 历史标题
+        title_frame = ctk.CTkFrame(self.history_frame, fg_color="transparent")
+        title_frame.pack(fill="x", padx=20, pady=20)
+        
+        ctk.CTkLabel(
+            title_frame, 
+            text="运行历史",
+            font=ctk.CTkFont(size=24, weight="bold")
+        ).pack(side="left")
+        
+        # 历史记录区域
+        history_card = ctk.CTkFrame(self.history_frame, corner_radius=15)
+        history_card.pack(fill="both", expand=True, padx=20, pady=(0, 20))
+        history_card.grid_columnconfigure(0, weight=1)
+        history_card.grid_rowconfigure(0, weight=1)
+        
+        self.history_text = ctk.CTkTextbox(
+            history_card,
+            font=ctk.CTkFont(size=12, family="Consolas"),
+            wrap="none",
+            activate_scrollbars=True
+        )
+        self.history_text.grid(row=0, column=0, padx=10, pady=10, sticky="nsew")
+        
+        # 操作按钮
+        btn_frame = ctk.CTkFrame(self.history_frame, fg_color="transparent")
+        btn_frame.pack(fill="x", padx=20, pady=(0, 20))
+        
+        self.history_ids_entry = ctk.CTkEntry(
+            btn_frame, 
+            width=160,
+            placeholder_text="运行编号，如 3,5",
+            font=ctk.CTkFont(size=14)
+        )
+        self.history_ids_entry.pack(side="left", padx=10)
+        
+        for text, command in (("查看", self.show_history_run), ("对比", self.compare_history_runs), ("刷新", self.refresh_history)):
+            ctk.CTkButton(
+                btn_frame, 
+                text=text,
+                command=command,
+                font=ctk.CTkFont(size=14),
+                width=90,
+                height=40,
+                corner_radius=10,
+                fg_color="#2c3e50",
+                hover_color="#34495e"
+            ).pack(side="left", padx=5)
+    
+    def set_history_text(self, lines):
+        """替换历史页面的文本内容"""
+        self.history_text.delete("1.0", "end")
+        self.history_text.insert("1.0", "\n".join(lines) + "\n")
+    
+    def history_ids(self):
+        """解析输入框中的运行编号"""
+        try:
+            return [int(part) for part in self.history_ids_entry.get().replace("，", ",").split(",") if part.strip()]
+        except ValueError:
+            self.show_error("错误", "请输入有效的运行编号")
+            return None
+    
+    def refresh_history(self):
+        """刷新运行历史列表"""
+        from cpupress.history import format_runs
+        
+        if not self.engine.history:
+            self.set_history_text(["运行历史数据库不可用"])
+            return
+        runs = self.engine.list_runs(100)
+        self.set_history_text(format_runs(runs) if runs else ["暂无运行记录"])
+    
+    def show_history_run(self):
+        """显示一次运行的详细结果"""
+        from cpupress.engine import summary_lines
+        from cpupress.history import format_runs
+        
+        ids = self.history_ids()
+        if not ids or not self.engine.history:
+            return
+        run = self.engine.load_run(ids[0])
+        if run is None:
+            self.show_error("错误", f"运行记录 {ids[0]} 不存在")
+            return
+        cpu = [sample["cpu"] for sample in run["samples"] if sample["cpu"] is not None]
+        lines = format_runs([run])
+        lines.append(f"负载曲线: {run['profile'] or '-'}    遥测样本: {len(run['samples'])} 个")
+        if cpu:
+            lines.append(f"系统占用率: 平均 {sum(cpu) / len(cpu):.1f}%  最低 {min(cpu):.1f}%  最高 {max(cpu):.1f}%")
+        if run["summary"]:
+            lines += summary_lines(run["summary"])
+        self.set_history_text(lines)
+    
+    def compare_history_runs(self):
+        """对比多次运行"""
+        from cpupress.history import format_runs
+        
+        ids = self.history_ids()
+        if not ids or not self.engine.history:
+            return
+        if len(ids) < 2:
+            self.show_error("错误", "对比至少需要两个运行编号")
+            return
+        try:
+            self.set_history_text(format_runs(self.engine.compare_runs(ids), compare=True))
+        except ValueError as e:
+            self.show_error("错误", str(e))
+    
+    def create_setting_row(self, card, label, description):
+        """创建带说明的设置行，返回放置控件的右侧容器"""
+        frame = ctk.CTkFrame(card, fg_color="transparent")
+        frame.pack(fill="x", padx=20, pady=15)
+        
+        label_frame = ctk.CTkFrame(frame, fg_color="transparent")
+        label_frame.pack(fill="x", pady=(0, 5))
+        
+        ctk.CTkLabel(
+            label_frame, 
+            text=label,
+            font=ctk.CTkFont(size=16, weight="bold")
+        ).pack(side="left")
+        
+        ctk.CTkLabel(
+            frame, 
+            text=description,
+            font=ctk.CTkFont(size=14),
+            text_color="#7f8c8d"
+        ).pack(anchor="w")
+        return label_frame
+    
     def show_page(self, page):
-        """显示指定页面"""
-        self.dashboard_frame.grid_forget()
-        self.logs_frame.grid_forget()
-        self.settings_frame.grid_forget()
-        
-        if page == "dashboard":
-            self.dashboard_frame.grid(row=0, column=0, sticky="nsew")
-            self.home_button.configure(fg_color=("gray75", "gray25"))
-        elif page == "logs":
-            self.logs_frame.grid(row=0, column=0, sticky="nsew")
-            self.logs_button.configure(fg_color=("gray75", "gray25"))
-        elif page == "settings":
-            self.settings_frame.grid(row=0, column=0, sticky="nsew")
-            self.settings_button.configure(fg_color=("gray75", "gray25"))
+        """显示指定页面，页面第一次显示时才创建"""
+        if page not in self.pages:
+            self.page_builders[page]()
+            self.pages[page] = getattr(self, f"{page}_frame")
+        
+        for frame in self.pages.values():
+            frame.grid_forget()
+        self.pages[page].grid(row=0, column=0, sticky="nsew")
     
     def show_dashboard(self):
         """显示仪表盘页面"""
@@ -453,6 +1091,7 @@ class CPUTesterApp(ctk.CTk):
         self.home_button.configure(fg_color=("gray75", "gray25"))
         self.logs_button.configure(fg_color="transparent")
         self.settings_button.configure(fg_color="transparent")
+        self.history_button.configure(fg_color="transparent")
     
     def show_logs(self):
         """显示日志页面"""
@@ -460,6 +1099,7 @@ class CPUTesterApp(ctk.CTk):
         self.home_button.configure(fg_color="transparent")
         self.logs_button.configure(fg_color=("gray75", "gray25"))
         self.settings_button.configure(fg_color="transparent")
+        self.history_button.configure(fg_color="transparent")
     
     def show_settings(self):
         """显示设置页面"""
@@ -467,14 +1107,104 @@ class CPUTesterApp(ctk.CTk):
         self.home_button.configure(fg_color="transparent")
         self.logs_button.configure(fg_color="transparent")
         self.settings_button.configure(fg_color=("gray75", "gray25"))
+        self.history_button.configure(fg_color="transparent")
+    
+    def show_history(self):
+        """显示运行历史页面"""
+        self.show_page("history")
+        self.home_button.configure(fg_color="transparent")
+        self.logs_button.configure(fg_color="transparent")
+        self.settings_button.configure(fg_color="transparent")
+        self.history_button.configure(fg_color=("gray75", "gray25"))
+        self.refresh_history()
     
     def change_theme(self, choice):
         """切换主题"""
         ctk.set_appearance_mode(choice)
         self.current_theme = choice
+        self.core_heatmap.configure(bg=self.canvas_bg())
+        self.target_overlay.configure(bg=self.canvas_bg())
+        self.usage_chart.configure(bg=self.canvas_bg())
+    
+    def canvas_bg(self):
+        """与当前主题匹配的画布背景色"""
+        color = self.info_frame.cget("fg_color")
+        if isinstance(color, (list, tuple)):
+            color = color[1] if ctk.get_appearance_mode() == "Dark" else color[0]
+        return color
+    
+    def change_kernel(self, choice):
+        """切换负载内核"""
+        self.config["kernel"] = choice
+        self.log_message(f"负载内核已切换为: {choice}")
+    
+    def apply_profile(self):
+        """运行中切换负载曲线，不重启工作进程"""
+        from cpupress.profiles import parse_profile
+        
+        try:
+            profile = parse_profile(self.profile_menu.get())
+            self.engine.set_profile(profile)
+        except (ValueError, RuntimeError) as e:
+            self.show_error("错误", str(e))
+            return
+        self.log_message(f"负载曲线已切换为: {profile.spec()}")
+    
+    def change_sample_interval(self, choice):
+        """修改采样间隔"""
+        self.config["sample_interval"] = choice
+        if self.sampler:
+            self.sampler.set_interval(SAMPLE_INTERVALS[choice])
+        self.log_message(f"采样间隔已设置为: {choice}")
+    
+    def change_use_pool(self):
+        """切换预热进程池"""
+        self.config["use_pool"] = self.use_pool_var.get()
+        if self.config["use_pool"] and not self.engine_running():
+            spawn_time = self.engine.warm_up(self.config["cpu_threads"])
+            self.log_message(f"预热进程池已就绪: {self.config['cpu_threads']} 个进程，创建耗时 {spawn_time * 1000:.0f}ms")
+        else:
+            self.log_message(f"预热进程池: {'开启' if self.config['use_pool'] else '关闭'}")
+    
+    def change_executor(self, choice):
+        """切换执行方式"""
+        self.config["executor"] = choice
+        self.log_message(f"执行方式已切换为: {choice} ({EXECUTORS[choice]})")
+    
+    def change_latency_probe(self):
+        """切换调度延迟探测"""
+        self.config["latency_probe"] = self.latency_var.get()
+        self.log_message(f"调度延迟探测: {'开启' if self.config['latency_probe'] else '关闭'}")
+    
+    def toggle_metrics(self):
+        """开启或关闭指标端点"""
+        if self.exporter:
+            self.exporter.stop()
+            self.exporter = None
+            self.log_message("指标端点已关闭")
+        if not self.metrics_var.get():
+            return
+        # http.server 只在开启指标端点时才导入
+        from cpupress.exporter import DEFAULT_METRICS_PORT, MetricsExporter
+        
+        try:
+            port = int(self.metrics_port_entry.get().strip() or DEFAULT_METRICS_PORT)
+            self.exporter = MetricsExporter(self.engine, self.sampler, port=port).start()
+        except (ValueError, OSError) as e:
+            self.metrics_var.set(False)
+            self.show_error("错误", f"指标端点启动失败: {e}")
+            return
+        self.log_message(f"📈 指标端点: {self.exporter.url}")
+    
+    def change_placement(self, choice):
+        """切换绑核策略"""
+        self.config["placement"] = choice
+        self.log_message(f"绑核策略已切换为: {choice} ({PLACEMENT_POLICIES[choice]})")
     
     def show_about(self):
         """显示关于窗口"""
+        import webbrowser
+        
         about_win = ctk.CTkToplevel(self)
         about_win.title("关于 cpu压榨器 作者")
         about_win.geometry("500x400")
@@ -547,14 +1277,37 @@ class CPUTesterApp(ctk.CTk):
             corner_radius=8
         ).pack(pady=20)
     
-    def log_message(self, message):
-        """在日志区域添加消息"""
-        self.log_text.insert("end", message + "\n")
-        self.log_text.see("end")
+    def log_message(self, message, **fields):
+        """写入日志管道，由 flush_logs 批量显示"""
+        self.log_pipeline.emit(message, **fields)
+    
+    def flush_logs(self):
+        """把待显示的日志一次性写入文本框，并限制文本框的最大行数
+        
+        日志页面还没有创建时记录留在日志管道中，页面第一次创建时从最近记录回填。
+        """
+        if "logs" not in self.pages:
+            self.after(LOG_FLUSH_MS, self.flush_logs)
+            return
+        records = self.log_pipeline.drain()
+        dropped = self.log_pipeline.take_dropped()
+        if records:
+            lines = [record["message"] for record in records]
+            if dropped:
+                lines.insert(0, f"... 省略 {dropped} 条日志 (完整记录见日志文件)")
+            self.log_text.insert("end", "\n".join(lines) + "\n")
+            
+            line_count = int(self.log_text.index("end-1c").split(".")[0])
+            if line_count > LOG_MAX_LINES:
+                self.log_text.delete("1.0", f"{line_count - LOG_MAX_LINES + 1}.0")
+            self.log_text.see("end")
+        
+        self.after(LOG_FLUSH_MS, self.flush_logs)
     
     def clear_logs(self):
         """清除日志"""
         self.log_text.delete("1.0", "end")
+        self.log_pipeline.clear()
         self.log_message("日志已清除")
     
     def validate_int_entry(self, value):
@@ -685,14 +1438,31 @@ class CPUTesterApp(ctk.CTk):
     
     def start_stress_test(self, duration):
         """开始压力测试"""
+        from cpupress.profiles import parse_profile
+        
         try:
             self.emergency_stop = False
-            self.stop_event.clear()
+            profile = parse_profile(self.profile_menu.get())
+            if "settings" in self.pages:
+                threads = self.threads_per_process_entry.get().strip()
+                self.config["threads_per_process"] = int(threads) if threads else DEFAULT_THREADS_PER_PROCESS
             
-            self.log_message(f"🚀 开始压力测试，配置:")
+            self.log_message(f"🚀 开始压力测试，配置:", event="start", config=dict(self.config, duration=duration))
             self.log_message(f"• 线程数: {self.config['cpu_threads']}")
-            self.log_message(f"• 最大占用: {self.config['max_cpu_usage']}%")
+            self.log_message(f"• CPU 限制: {describe_limits(self.engine.cgroup)}")
+            self.log_message(f"• 负载曲线: {profile.spec()}")
             self.log_message(f"• 速度: {self.config['stress_speed']}%")
+            self.log_message(f"• 负载内核: {self.config['kernel']}")
+            per_process = f" ({self.config['threads_per_process']} 线程/进程)" if self.config["executor"] == "hybrid" else ""
+            self.log_message(f"• 执行方式: {self.config['executor']}{per_process}")
+            warning = executor_warning(self.config["executor"], self.config["kernel"])
+            if warning:
+                self.log_message(f"⚠️ {warning}", level="warning")
+            if "settings" in self.pages:
+                self.config["working_set"] = self.working_set_entry.get().strip() or DEFAULT_WORKING_SET
+                self.config["memory_pattern"] = self.memory_pattern_var.get()
+            if self.config["kernel"] == "memory":
+                self.log_message(f"• 工作集: {self.config['working_set']} ({self.config['memory_pattern']})")
             self.log_message(f"• 持续时间: {duration}秒")
             self.status_var.set("压力测试运行中...")
             
@@ -701,24 +1471,38 @@ class CPUTesterApp(ctk.CTk):
             self.stop_btn.configure(state="normal")
             self.emergency_btn.configure(state="normal")
             self.duration_entry.configure(state="disabled")
+            self.kernel_menu.configure(state="disabled")
+            self.apply_profile_btn.configure(state="normal")
             
             # 创建并启动进程
-            self.test_processes = []
-            for _ in range(self.config["cpu_threads"]):
-                p = multiprocessing.Process(
-                    target=cpu_stress_worker,
-                    args=(
-                        duration,
-                        self.config["stress_speed"],
-                        self.config["max_cpu_usage"],
-                        self.stop_event
-                    )
-                )
-                p.start()
-                self.test_processes.append(p)
+            if "settings" in self.pages:
+                self.config["cpu_list"] = self.cpu_list_entry.get().strip() or None
+            self.engine.start(
+                duration,
+                workers=self.config["cpu_threads"],
+                max_usage=self.config["max_cpu_usage"],
+                speed=self.config["stress_speed"],
+                kernel=self.config["kernel"],
+                use_pool=self.config["use_pool"],
+                placement=self.config["placement"],
+                cpu_list=self.config["cpu_list"],
+                profile=profile,
+                kernel_options={
+                    "working_set": self.config["working_set"],
+                    "memory_pattern": self.config["memory_pattern"]
+                },
+                latency={"latency_probe": self.config["latency_probe"]},
+                executor=self.config["executor"],
+                threads_per_process=self.config["threads_per_process"]
+            )
+            self.target_overlay.clear()
+            self.log_message(f"• 绑核策略: {self.config['placement']}")
+            for line in self.engine.describe_placement():
+                self.log_message(f"  - {line}")
                 
-            # 设置定时器检查进程是否完成
-            self.after(1000, self.check_stress_test_completion)
+            # 监视线程在所有进程结束时通知界面
+            started = self.engine.start_time
+            self.engine.watch(lambda: self.run_finished.put(started))
             
         except Exception as e:
             self.show_error("错误", f"启动压力测试失败: {str(e)}")
@@ -727,44 +1511,100 @@ class CPUTesterApp(ctk.CTk):
     def emergency_stop_test(self):
         """紧急停止测试"""
         self.emergency_stop = True
-        self.stop_stress_test()
         self.log_message("🛑 !!! 紧急停止已触发 !!!")
-        self.status_var.set("已紧急停止")
+        self.stop_stress_test("emergency")
+    
+    def run_engine_task(self, task, done):
+        """在后台线程执行会阻塞的引擎操作，完成后由界面刷新循环在界面线程调用 done(返回值或异常)"""
+        def worker():
+            try:
+                result = task()
+            except Exception as e:
+                result = e
+            self.engine_results.put((done, result))
+        
+        self.engine_task = threading.Thread(target=worker, name="engine-task", daemon=True)
+        self.engine_task.start()
+    
+    def engine_task_running(self):
+        """后台引擎操作是否还在进行 (进行期间界面线程不调用引擎)"""
+        return self.engine_task is not None and self.engine_task.is_alive()
+    
+    def process_engine_results(self):
+        """在界面线程处理后台引擎操作的结果"""
+        while not self.engine_results.empty():
+            done, result = self.engine_results.get_nowait()
+            done(result)
     
     def check_stress_test_completion(self):
-        """检查压力测试是否完成"""
-        if self.emergency_stop:
+        """处理监视线程发来的运行结束通知"""
+        while not self.run_finished.empty():
+            started = self.run_finished.get_nowait()
+            if self.emergency_stop or self._engine is None or started != self._engine.start_time:
+                continue
+            if self.engine_task_running():
+                # 正在停止，由停止操作完成收尾
+                continue
+            # sentinel 就绪后进程可能还未被回收，在后台等待片刻完成收尾
+            self.run_engine_task(
+                lambda: self._engine.wait(1.0),
+                lambda finished, started=started: self.on_run_completed(started, finished)
+            )
+    
+    def on_run_completed(self, started, finished):
+        """运行自然结束、收尾完成后记录摘要并恢复界面"""
+        if finished is not True or self.emergency_stop or started != self.engine.start_time:
             return
-            
-        for p in self.test_processes:
-            if p.is_alive():
-                # 如果还有进程在运行，1秒后再次检查
-                self.after(1000, self.check_stress_test_completion)
-                return
-                
+        if self.engine.stop_reason != "completed":
+            # 已被手动停止
+            return
+        
         # 所有进程都已完成
-        self.test_processes = []
-        self.log_message("✅ 压力测试完成")
+        self.log_message("✅ 压力测试完成", event="end", summary=self.engine.summary())
+        self.log_worker_stats()
         self.status_var.set("压力测试完成")
         self.reset_ui_state()
     
-    def stop_stress_test(self):
-        """停止压力测试"""
-        self.stop_event.set()
-            
-        if not self.test_processes:
+    def stop_stress_test(self, reason="stopped"):
+        """停止压力测试: 在后台线程等待工作进程退出 (可能需要数秒)，界面不被阻塞"""
+        if self.engine_task_running():
+            return
+        if not self.engine_running():
+            if self._engine is not None:
+                self._engine.stop(reason)
             self.show_info("信息", "没有正在运行的压力测试")
             return
-            
-        for p in self.test_processes:
-            if p.is_alive():
-                p.terminate()
-                
-        self.test_processes = []
-        self.log_message("⏹ 压力测试已停止")
-        self.status_var.set("压力测试已停止")
+        
+        self.stop_btn.configure(state="disabled")
+        self.emergency_btn.configure(state="disabled")
+        self.apply_profile_btn.configure(state="disabled")
+        self.status_var.set("正在停止...")
+        self.run_engine_task(lambda: self.engine.stop(reason), lambda result: self.on_run_stopped(reason, result))
+    
+    def on_run_stopped(self, reason, result):
+        """后台停止完成后记录摘要并恢复界面"""
+        if isinstance(result, Exception):
+            self.show_error("错误", f"停止压力测试失败: {result}")
+        else:
+            summary = self.engine.summary()
+            forced = [s for s in summary["stop_latency"] if s["method"] != "graceful"]
+            if forced:
+                self.log_message(f"⚠️ {len(forced)} 个进程未能及时退出，已强制结束", level="warning", stop_latency=forced)
+            self.log_message("⏹ 压力测试已停止", event="end", summary=summary)
+            self.log_worker_stats()
+        self.status_var.set("已紧急停止" if reason == "emergency" else "压力测试已停止")
         self.reset_ui_state()
     
+    def log_worker_stats(self):
+        """记录各进程实际占用率与控制误差"""
+        from cpupress.engine import summary_lines
+        
+        summary = self.engine.summary()
+        for line in summary_lines(summary):
+            self.log_message(line)
+        if summary["run_id"]:
+            self.log_message(f"• 运行记录已保存: #{summary['run_id']}")
+    
     def show_info(self, title, message):
         """显示信息对话框"""
         dialog = ctk.CTkToplevel(self)
@@ -809,54 +1649,150 @@ class CPUTesterApp(ctk.CTk):
         self.stop_btn.configure(state="disabled")
         self.emergency_btn.configure(state="disabled")
         self.duration_entry.configure(state="normal")
+        self.kernel_menu.configure(state="normal")
+        self.apply_profile_btn.configure(state="disabled")
     
     def start_monitoring(self):
         """开始监控CPU使用率"""
         if self.monitoring:
             return
             
+        # 采样线程 (psutil) 在窗口可以交互之后才导入
+        from cpupress.sampler import CpuSampler
+        from cpupress.thermal import ThermalProbe
+        
         self.monitoring = True
+        self.sampler = CpuSampler(SAMPLE_INTERVALS[self.config["sample_interval"]], thermal=ThermalProbe(),
+                                 cgroup=self.cgroup)
+        self.sampler.start()
         self.update_monitoring()
     
+    def show_core_history(self, event):
+        """在热力图标题中显示鼠标所在核心的当前、平均与峰值占用率 (读取采样线程的环形缓冲区)"""
+        core = self.core_heatmap.core_at(event.x, event.y)
+        if core is None or not self.sampler or not len(self.sampler.history):
+            self.heatmap_label_var.set("各核心使用率:")
+            return
+        values = self.sampler.history.channel(core, last=max(int(60 / self.sampler.interval), 1))
+        self.heatmap_label_var.set(
+            f"各核心使用率: 核心 {core} 当前 {values[-1]:.0f}%，最近一分钟平均 {sum(values) / len(values):.0f}%、"
+            f"峰值 {max(values):.0f}%"
+        )
+    
     def update_monitoring(self):
-        """更新监控数据"""
+        """从采样队列取出数据并更新监控界面"""
         if not self.monitoring:
             return
+        
+        self.process_engine_results()
+        self.check_stress_test_completion()
+        # 后台线程正在停止或收尾时不访问引擎
+        busy = self.engine_task_running()
             
-        # 获取CPU使用率
-        cpu_usage = psutil.cpu_percent(interval=1)
-        
-        # 更新UI
-        self.cpu_usage_var.set(f"{cpu_usage:.1f}%")
-        self.cpu_progress.set(cpu_usage / 100)
-        
-        # 根据使用率改变进度条颜色
-        if cpu_usage > 80:
-            self.cpu_progress.configure(progress_color="#e74c3c")
-        elif cpu_usage > 50:
-            self.cpu_progress.configure(progress_color="#f39c12")
-        else:
-            self.cpu_progress.configure(progress_color="#2ecc71")
+        # 只显示最新的样本
+        samples = self.sampler.drain()
+        engine = self._engine
+        running = bool(samples) and not busy and engine is not None and engine.running
+        if running:
+            from cpupress.thermal import describe_event
+            
+            engine.poll_stats()
+        for sample in samples:
+            if running:
+                for event in engine.record_sample(sample):
+                    self.log_message(describe_event(event), level="warning", event=event["type"], detail=event)
+            self.usage_chart.add(
+                sample["time"],
+                cpu=sample["cpu"],
+                target=engine.current_target() if running else None,
+                achieved=engine.achieved_usage() if running else None
+            )
+        self.usage_chart.redraw()
+        if samples:
+            if self.startup and "first_sample" not in self.startup.phases():
+                self.mark_startup("first_sample")
+                self.after_idle(self.report_startup)
+            cpu_usage = samples[-1]["cpu"]
+            latest = self.sampler.history.latest()
+            if latest is not None:
+                self.core_heatmap.update_values(latest[1])
+            
+            # 频率与温度，缺少传感器时显示 -
+            freq, temp = samples[-1].get("freq_mhz"), samples[-1].get("temp_c")
+            quota = samples[-1].get("cgroup_usage")
+            self.thermal_var.set(
+                f"频率: {f'{freq:.0f} MHz' if freq else '-'}  温度: {f'{temp:.0f}°C' if temp is not None else '-'}"
+                + (f"  配额占用: {quota:.0f}%" if quota is not None else "")
+            )
+            
+            # 更新UI
+            self.cpu_usage_var.set(f"{cpu_usage:.1f}%")
+            self.cpu_progress.set(cpu_usage / 100)
+            
+            # 根据使用率改变进度条颜色
+            if cpu_usage > 80:
+                self.cpu_progress.configure(progress_color="#e74c3c")
+            elif cpu_usage > 50:
+                self.cpu_progress.configure(progress_color="#f39c12")
+            else:
+                self.cpu_progress.configure(progress_color="#2ecc71")
+            
+            # 更新吞吐量 (直接读取共享内存中的实时记录)
+            if not busy and self.engine_running():
+                total, per_worker = self.engine.throughput()
+                unit = UNIT_NAMES.get(self.engine.config["executor"], "工作单元")
+                self.throughput_var.set(f"{total:,.0f} ops/s ({len(per_worker)} {unit})")
+                
+                # 目标与实际占用率
+                target, actual = self.engine.current_target(), self.engine.achieved_usage()
+                if actual is not None:
+                    self.target_overlay.add_point(target, actual)
+                    self.overlay_label_var.set(f"目标 / 实际占用率: {target:.1f}% / {actual:.1f}%")
         
         # 继续监控
-        self.after(1000, self.update_monitoring)
+        self.after(UI_REFRESH_MS, self.update_monitoring)
     
     def stop_monitoring(self):
         """停止监控"""
         self.monitoring = False
+        if self.sampler:
+            self.sampler.stop()
+            self.sampler = None
     
     def on_closing(self):
         """窗口关闭时清理资源"""
         self.stop_monitoring()
-        self.stop_stress_test()
+        # 先停止指标端点，避免抓取读到已关闭的引擎
+        if self.exporter:
+            self.exporter.stop()
+        if self._engine is not None:
+            # 等待后台的停止或收尾结束，再关闭引擎 (close() 会同步停止仍在运行的测试)
+            if self.engine_task:
+                self.engine_task.join()
+            self._engine.close()
+            if self._engine.history:
+                self._engine.history.close()
+        self.log_pipeline.close()
         self.destroy()
 
 if __name__ == "__main__":
     # 修复Windows下的multiprocessing问题
     multiprocessing.freeze_support()
     
+    # 启动计时: --startup-timing 打印各阶段耗时，--startup-budget 额外检查可交互时间并在首个样本后退出
+    parser = argparse.ArgumentParser(description="代码小梓-CPU压榨机 图形界面")
+    parser.add_argument("--startup-timing", action="store_true", help="打印启动各阶段耗时")
+    parser.add_argument("--startup-budget", type=float, metavar="SECONDS",
+                        help="可交互时间预算 (秒)，显示首个样本后退出，超出预算时返回 1")
+    # 打包后的程序可能被系统附加其他参数，忽略不认识的参数
+    args, _ = parser.parse_known_args()
+    startup = None
+    if args.startup_timing or args.startup_budget is not None:
+        startup = StartupTimer(started=STARTUP_CLOCK)
+        startup.mark("imports")
+    
     # 创建应用实例
-    app = CPUTesterApp()
+    app = CPUTesterApp(startup=startup, startup_budget=args.startup_budget)
     
     # 设置应用图标
     try:
@@ -866,4 +1802,6 @@ if __name__ == "__main__":
     
     # 运行应用
     app.protocol("WM_DELETE_WINDOW", app.on_closing)
-    app.mainloop()
\ No newline at end of file
+    app.mainloop()
+    if not app.startup_ok:
+        sys.exit(1)
\ No newline at end of file